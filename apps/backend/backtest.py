@@ -0,0 +1,492 @@
+"""
+Vectorized backtest engine
+Strategies produce a target-position array; execution, the equity curve,
+drawdown and trade statistics are array operations over all bars (and
+over every row when many series or parameter sets are stacked)
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from indicators import sma
+
+SECONDS_PER_YEAR = 365.25 * 86400
+TRADING_DAYS_PER_YEAR = 252
+
+BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", str(os.cpu_count() or 1)))
+SWEEP_MAX_PAIRS = int(os.getenv("SWEEP_MAX_PAIRS", "10000"))
+# Upper bound on one chunk's (pairs × bars) matrices; work is otherwise split evenly across workers
+SWEEP_CHUNK_CELLS = int(os.getenv("SWEEP_CHUNK_CELLS", "2000000"))
+# Jobs below this many (pairs × bars) cells run in-process: shipping them to workers costs more
+SWEEP_PARALLEL_MIN_CELLS = int(os.getenv("SWEEP_PARALLEL_MIN_CELLS", "50000"))
+
+# Metrics parameter sets can be ranked by, and whether higher is better
+RANK_METRICS = {"sharpe_ratio": True, "total_return_percent": True, "max_drawdown": False}
+
+
+# ============================================
+# Strategies
+# ============================================
+
+def ma_crossover(close: np.ndarray, fast_period: int, slow_period: int) -> np.ndarray:
+    """Long (1) while the fast SMA is above the slow SMA, flat (0) otherwise"""
+    close = np.atleast_2d(np.asarray(close, dtype=np.float64))
+    with np.errstate(invalid="ignore"):
+        return (sma(close, fast_period) > sma(close, slow_period)).astype(np.float64)
+
+
+# ============================================
+# Execution
+# ============================================
+
+def bar_returns(close: np.ndarray) -> np.ndarray:
+    """Simple close-to-close returns, 0 for the first bar and across gaps"""
+    close = np.atleast_2d(np.asarray(close, dtype=np.float64))
+    returns = np.zeros(close.shape)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[:, 1:] = close[:, 1:] / close[:, :-1] - 1.0
+    return np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def simulate(close: np.ndarray, target: np.ndarray, initial_capital: float = 10000.0) -> Dict[str, np.ndarray]:
+    """
+    Execute target positions against closes (rows are independent runs)
+
+    The target decided on a bar's close is held over the next bar, so a
+    signal never trades on the return it was computed from. close may be a
+    single row shared by every target row.
+    """
+    returns = bar_returns(close)
+    target = np.nan_to_num(np.atleast_2d(np.asarray(target, dtype=np.float64)))
+    position = np.zeros(np.broadcast_shapes(target.shape, returns.shape))
+    position[:, 1:] = target[:, :-1]
+    strategy_returns = position * returns
+    return {
+        "position": position,
+        "returns": strategy_returns,
+        "equity": initial_capital * np.cumprod(1.0 + strategy_returns, axis=1)
+    }
+
+
+# ============================================
+# Metrics
+# ============================================
+
+def max_drawdown(equity: np.ndarray, initial_capital: float) -> np.ndarray:
+    """Largest peak-to-trough fall of each equity row, in percent"""
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), initial_capital)
+    return ((peak - equity) / peak).max(axis=1) * 100
+
+
+def trade_stats(position: np.ndarray, equity: np.ndarray, initial_capital: float) -> Dict[str, np.ndarray]:
+    """
+    Trades per row from position-change indices
+
+    A trade is a run of bars with a non-zero position of one sign; a trade
+    still open on the last bar is marked to market there.
+    """
+    rows, bars = position.shape
+    side = np.sign(position)
+    before = np.zeros_like(side)
+    before[:, 1:] = side[:, :-1]
+    after = np.zeros_like(side)
+    after[:, :-1] = side[:, 1:]
+
+    start_rows, starts = np.nonzero((side != 0) & (side != before))
+    _, ends = np.nonzero((side != 0) & (side != after))  # row-major, so pairs with starts
+
+    # Equity before the trade's first bar and after its last bar
+    value = np.concatenate([np.full((rows, 1), float(initial_capital)), equity], axis=1)
+    growth = value[start_rows, ends + 1] / value[start_rows, starts]
+
+    trades = np.bincount(start_rows, minlength=rows)
+    wins = np.bincount(start_rows[growth > 1.0], minlength=rows)
+    return {"num_trades": trades, "winning_trades": wins, "losing_trades": trades - wins}
+
+
+def equity_metrics(
+    equity: np.ndarray,
+    returns: np.ndarray,
+    initial_capital: float,
+    timestamps: Optional[Sequence[int]] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Return, annualized return, drawdown and Sharpe of each equity row
+
+    timestamps (epoch ns) set the calendar span and bar frequency used to
+    annualize; without them bars are taken as trading days.
+    """
+    bars = equity.shape[1]
+    if timestamps is not None and len(timestamps) > 1:
+        years = (int(timestamps[-1]) - int(timestamps[0])) / 1e9 / SECONDS_PER_YEAR
+    else:
+        years = bars / TRADING_DAYS_PER_YEAR
+    periods_per_year = (bars - 1) / years if years > 0 else TRADING_DAYS_PER_YEAR
+
+    final_value = equity[:, -1]
+    growth = final_value / initial_capital
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annual_return = (np.power(growth, 1.0 / years) - 1.0) * 100 if years > 0 else np.zeros(len(growth))
+
+    period_returns = returns[:, 1:]
+    std = period_returns.std(axis=1, ddof=1) if bars > 2 else np.zeros(len(growth))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(std > 0, period_returns.mean(axis=1) / std * np.sqrt(periods_per_year), 0.0)
+
+    return {
+        "final_value": final_value,
+        "total_return": final_value - initial_capital,
+        "total_return_percent": (growth - 1.0) * 100,
+        "annual_return": annual_return,
+        "max_drawdown": max_drawdown(equity, initial_capital),
+        "sharpe_ratio": sharpe
+    }
+
+
+def performance(
+    sim: Dict[str, np.ndarray],
+    initial_capital: float,
+    timestamps: Optional[Sequence[int]] = None
+) -> Dict[str, np.ndarray]:
+    """equity_metrics() plus trade counts and win rate per row of a simulation"""
+    trades = trade_stats(sim["position"], sim["equity"], initial_capital)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        win_rate = np.where(trades["num_trades"] > 0, trades["winning_trades"] / trades["num_trades"] * 100, 0.0)
+    return {
+        **equity_metrics(sim["equity"], sim["returns"], initial_capital, timestamps),
+        "win_rate": win_rate,
+        **trades
+    }
+
+
+def backtest(
+    close: np.ndarray,
+    target: np.ndarray,
+    initial_capital: float = 10000.0,
+    timestamps: Optional[Sequence[int]] = None
+) -> Dict[str, float]:
+    """Backtest one target-position series, returns scalar metrics"""
+    metrics = performance(simulate(close, target, initial_capital), initial_capital, timestamps)
+    return {name: values[0].item() for name, values in metrics.items()}
+
+
+# ============================================
+# Portfolios
+# ============================================
+
+# Rebalancing frequency -> calendar period whose boundaries trigger a rebalance
+REBALANCE_FREQUENCIES = {"none": None, "daily": "D", "weekly": "W", "monthly": "M", "quarterly": "Q"}
+
+
+def rebalance_starts(index: pd.DatetimeIndex, frequency: str) -> np.ndarray:
+    """First bar of each holding period (weights are reset on the close before it)"""
+    period = REBALANCE_FREQUENCIES[frequency]
+    if period is None or len(index) == 0:
+        return np.array([0])
+    local = index.tz_localize(None) if index.tz is not None else index
+    labels = local.to_period(period).asi8
+    return np.concatenate([[0], np.flatnonzero(labels[1:] != labels[:-1]) + 1])
+
+
+def simulate_portfolio(
+    close: np.ndarray,
+    target: np.ndarray,
+    weights: np.ndarray,
+    starts: np.ndarray,
+    initial_capital: float = 10000.0
+) -> Dict[str, np.ndarray]:
+    """
+    Run one strategy sleeve per asset (rows of close/target) as a portfolio
+
+    Sleeves drift with their own strategy returns and are reset to the
+    target weights at each start bar. Everything is computed per holding
+    period with array operations, never per bar.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    sleeves = simulate(close, target, 1.0)
+    growth = sleeves["equity"]  # growth of one unit in each sleeve since bar 0
+    assets, bars = growth.shape
+
+    ends = np.append(starts[1:] - 1, bars - 1)
+    before = np.concatenate([np.ones((assets, 1)), growth], axis=1)  # before[:, t] = growth up to bar t - 1
+    period_growth = before[:, ends + 1] / before[:, starts]  # assets × periods
+
+    # Portfolio value at the start of each period
+    portfolio_growth = weights @ period_growth
+    period_value = initial_capital * np.concatenate([[1.0], np.cumprod(portfolio_growth)[:-1]])
+
+    period_of_bar = np.repeat(np.arange(len(starts)), ends - starts + 1)
+    drift = growth / before[:, starts][:, period_of_bar]
+    equity = period_value[period_of_bar] * (weights @ drift)
+
+    returns = np.zeros(bars)
+    returns[1:] = equity[1:] / equity[:-1] - 1.0
+    returns[0] = equity[0] / initial_capital - 1.0
+
+    return {
+        "equity": equity,
+        "returns": returns,
+        "asset_pnl": (period_value * weights[:, None] * (period_growth - 1.0)).sum(axis=1),
+        "asset_trades": trade_stats(sleeves["position"], growth, 1.0)["num_trades"]
+    }
+
+
+# ============================================
+# Parameter sweeps
+# ============================================
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def process_pool() -> ProcessPoolExecutor:
+    """Shared worker processes for CPU-bound backtests (spawned, so no forked locks)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=BACKTEST_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def _noop() -> None:
+    return None
+
+
+def warm_process_pool():
+    """Start the worker processes ahead of the first sweep (no-op without parallelism)"""
+    if BACKTEST_WORKERS > 1:
+        pool = process_pool()
+        for future in [pool.submit(_noop) for _ in range(BACKTEST_WORKERS)]:
+            future.result()
+
+
+def use_process_pool(parallel: bool, tasks: int, cells: int) -> bool:
+    """Whether a job of tasks independent parts and cells (pairs × bars) is worth the pool"""
+    return parallel and BACKTEST_WORKERS > 1 and tasks > 1 and cells >= SWEEP_PARALLEL_MIN_CELLS
+
+
+def shutdown_process_pool():
+    """Stop the worker processes (recreated on next use)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def rolling_mean_from_cumsum(csum: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean of the series behind csum (csum[0] == 0), NaN for the first window - 1 bars"""
+    out = np.full(len(csum) - 1, np.nan)
+    if window <= len(out):
+        out[window - 1:] = (csum[window:] - csum[:-window]) / window
+    return out
+
+
+def evaluate_ma_pairs(
+    close: np.ndarray,
+    csum: np.ndarray,
+    pairs: Sequence[Tuple[int, int]],
+    initial_capital: float,
+    timestamps: Optional[Sequence[int]] = None
+) -> Dict[str, np.ndarray]:
+    """MA crossover metrics for many (fast, slow) pairs in one stacked simulation"""
+    means = {w: rolling_mean_from_cumsum(csum, w) for w in {w for pair in pairs for w in pair}}
+    fast = np.stack([means[f] for f, _ in pairs])
+    slow = np.stack([means[s] for _, s in pairs])
+    with np.errstate(invalid="ignore"):
+        target = (fast > slow).astype(np.float64)
+    return performance(simulate(close, target, initial_capital), initial_capital, timestamps)
+
+
+def _chunks(items: List[Any], size: int) -> List[List[Any]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def chunk_size(items: int, cells_per_item: int, workers: int) -> int:
+    """Items per chunk: an even share per worker, capped at SWEEP_CHUNK_CELLS cells"""
+    share = -(-items // max(workers, 1))
+    cap = max(1, SWEEP_CHUNK_CELLS // max(cells_per_item, 1))
+    return max(1, min(share, cap))
+
+
+def sweep_ma_grid(
+    close: np.ndarray,
+    fast_periods: Sequence[int],
+    slow_periods: Sequence[int],
+    initial_capital: float = 10000.0,
+    timestamps: Optional[Sequence[int]] = None,
+    parallel: bool = True
+) -> Dict[str, np.ndarray]:
+    """
+    Evaluate every fast < slow MA pair, returns (fast × slow) metric matrices
+
+    Every rolling mean comes from one cumulative sum of the closes. Large
+    grids are split evenly across the process pool (chunks capped at
+    SWEEP_CHUNK_CELLS); cells where fast >= slow are NaN.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    csum = np.concatenate([[0.0], np.cumsum(close)])
+    index = [(i, j) for i, f in enumerate(fast_periods) for j, s in enumerate(slow_periods) if f < s]
+    pairs = [(fast_periods[i], slow_periods[j]) for i, j in index]
+
+    shape = (len(fast_periods), len(slow_periods))
+    names = ("total_return_percent", "sharpe_ratio", "max_drawdown", "num_trades", "win_rate")
+    matrices = {name: np.full(shape, np.nan) for name in names}
+    if not pairs:
+        return matrices
+
+    pooled = use_process_pool(parallel, len(pairs), len(pairs) * len(close))
+    chunks = _chunks(pairs, chunk_size(len(pairs), len(close), BACKTEST_WORKERS if pooled else 1))
+    if pooled:
+        n = len(chunks)
+        results = list(process_pool().map(
+            evaluate_ma_pairs, [close] * n, [csum] * n, chunks, [initial_capital] * n, [timestamps] * n
+        ))
+    else:
+        results = [evaluate_ma_pairs(close, csum, chunk, initial_capital, timestamps) for chunk in chunks]
+
+    rows, cols = np.array(index).T
+    for name in names:
+        matrices[name][rows, cols] = np.concatenate([result[name] for result in results])
+    return matrices
+
+
+# ============================================
+# Walk-forward optimization
+# ============================================
+
+def walk_forward_windows(bars: int, train_bars: int, test_bars: int, anchored: bool = False) -> List[Tuple[int, int, int]]:
+    """
+    (train_start, test_start, test_end) bar ranges
+
+    Test windows tile the history after the first train window; train
+    windows roll with them (or all start at bar 0 when anchored).
+    """
+    windows = []
+    test_start = train_bars
+    while test_start < bars:
+        train_start = 0 if anchored else test_start - train_bars
+        windows.append((train_start, test_start, min(test_start + test_bars, bars)))
+        test_start += test_bars
+    return windows
+
+
+def rank_score(metrics: Dict[str, np.ndarray], rank_by: str) -> np.ndarray:
+    """Metric oriented so that higher is better"""
+    return metrics[rank_by] if RANK_METRICS[rank_by] else -metrics[rank_by]
+
+
+def optimize_and_test(
+    close: np.ndarray,
+    fast_means: np.ndarray,
+    slow_means: np.ndarray,
+    fast_periods: Sequence[int],
+    slow_periods: Sequence[int],
+    train_bars: int,
+    initial_capital: float,
+    timestamps: Optional[Sequence[int]],
+    rank_by: str
+) -> Dict[str, Any]:
+    """
+    Pick the best MA pair on the first train_bars bars, then trade it on the rest
+
+    The means are slices of rolling means computed once over the whole
+    history, so no window recomputes them (they only look back).
+    """
+    pairs = [(i, j) for i, f in enumerate(fast_periods) for j, s in enumerate(slow_periods) if f < s]
+    rows, cols = np.array(pairs).T
+    with np.errstate(invalid="ignore"):
+        target = (fast_means[rows, :train_bars] > slow_means[cols, :train_bars]).astype(np.float64)
+    train_ts = timestamps[:train_bars] if timestamps is not None else None
+    train = performance(simulate(close[:train_bars], target, initial_capital), initial_capital, train_ts)
+    best = int(np.argmax(rank_score(train, rank_by)))
+    i, j = pairs[best]
+
+    # Out of sample: the position on the first test bar comes from the last train bar's signal
+    with np.errstate(invalid="ignore"):
+        test_target = (fast_means[i, train_bars - 1:] > slow_means[j, train_bars - 1:]).astype(np.float64)
+    sim = simulate(close[train_bars - 1:], test_target, initial_capital)
+    test_ts = timestamps[train_bars - 1:] if timestamps is not None else None
+    test = performance(sim, initial_capital, test_ts)
+
+    return {
+        "fast_period": int(fast_periods[i]),
+        "slow_period": int(slow_periods[j]),
+        "train_score": train[rank_by][best].item(),
+        "test": {name: values[0].item() for name, values in test.items()},
+        "test_returns": sim["returns"][0, 1:]
+    }
+
+
+def walk_forward(
+    close: np.ndarray,
+    fast_periods: Sequence[int],
+    slow_periods: Sequence[int],
+    train_bars: int,
+    test_bars: int,
+    anchored: bool = False,
+    initial_capital: float = 10000.0,
+    timestamps: Optional[Sequence[int]] = None,
+    rank_by: str = "sharpe_ratio",
+    parallel: bool = True
+) -> Dict[str, Any]:
+    """
+    Walk-forward MA optimization with a stitched out-of-sample equity curve
+
+    Rolling means for every period are computed once from one cumulative
+    sum and sliced per window; windows run across the process pool when
+    the whole job reaches SWEEP_PARALLEL_MIN_CELLS.
+    """
+    if not any(f < s for f in fast_periods for s in slow_periods):
+        raise ValueError("No fast period is shorter than a slow period")
+    close = np.asarray(close, dtype=np.float64)
+    timestamps = np.asarray(timestamps) if timestamps is not None else None
+    csum = np.concatenate([[0.0], np.cumsum(close)])
+    means = {w: rolling_mean_from_cumsum(csum, w) for w in set(fast_periods) | set(slow_periods)}
+    fast_means = np.stack([means[w] for w in fast_periods])
+    slow_means = np.stack([means[w] for w in slow_periods])
+
+    windows = walk_forward_windows(len(close), train_bars, test_bars, anchored)
+    if not windows:
+        raise ValueError(f"Need more than {train_bars} bars for one train window")
+
+    args = [
+        (
+            close[a:c], fast_means[:, a:c], slow_means[:, a:c], fast_periods, slow_periods,
+            b - a, initial_capital, timestamps[a:c] if timestamps is not None else None, rank_by
+        )
+        for a, b, c in windows
+    ]
+    pairs = sum(1 for f in fast_periods for s in slow_periods if f < s)
+    cells = pairs * sum(c - a for a, _, c in windows)
+    if use_process_pool(parallel, len(windows), cells):
+        results = list(process_pool().map(optimize_and_test, *zip(*args)))
+    else:
+        results = [optimize_and_test(*window_args) for window_args in args]
+
+    # Test windows are contiguous, so their returns chain into one curve
+    returns = np.concatenate([[0.0]] + [result["test_returns"] for result in results])
+    equity = initial_capital * np.cumprod(1.0 + returns)
+    first = windows[0][1] - 1
+    curve_ts = timestamps[first:] if timestamps is not None else None
+
+    for (a, b, c), result in zip(windows, results):
+        result.update(train_start=a, test_start=b, test_end=c)
+        del result["test_returns"]
+
+    metrics = equity_metrics(equity[None, :], returns[None, :], initial_capital, curve_ts)
+    return {
+        "windows": results,
+        "equity": equity,
+        "start": first,
+        **{name: values[0].item() for name, values in metrics.items()}
+    }
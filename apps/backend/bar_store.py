@@ -0,0 +1,322 @@
+"""
+Persistent OHLCV bar store
+One memory-mapped NumPy record file per ticker and interval; callers read
+period slices locally and only the missing tail is fetched from upstream
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from market_data import market_data
+
+BAR_STORE_DIR = os.getenv(
+    "BAR_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "bars")
+)
+BAR_STORE_REFRESH_SECONDS = int(os.getenv("BAR_STORE_REFRESH_SECONDS", "60"))
+
+BAR_DTYPE = np.dtype([
+    ("ts", "<i8"),  # bar open time, epoch nanoseconds (UTC)
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+
+PERIOD_OFFSETS = {
+    "1d": pd.DateOffset(days=1),
+    "5d": pd.DateOffset(days=5),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+# Units of free-form periods such as "60d" or "15y"
+PERIOD_UNITS = {"d": "days", "wk": "weeks", "mo": "months", "y": "years"}
+PERIOD_PATTERN = re.compile(r"^(\d+)(d|wk|mo|y)$")
+
+# Intervals yfinance serves; each names a directory under the store root
+INTERVALS = ("1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h", "1d", "5d", "1wk", "1mo", "3mo")
+# Upper-cased symbols such as BRK-B, 005930.KS, ^GSPC or EURUSD=X; each names store files
+TICKER_PATTERN = re.compile(r"^[A-Z0-9^][A-Z0-9.\-=^]{0,31}$")
+
+FRAME_COLUMNS = {"Open": "open", "High": "high", "Low": "low", "Close": "close", "Volume": "volume"}
+
+
+def period_offset(period: str) -> pd.DateOffset:
+    """DateOffset for a yfinance period string such as "3mo" or "60d" """
+    if period in PERIOD_OFFSETS:
+        return PERIOD_OFFSETS[period]
+    match = PERIOD_PATTERN.match(period)
+    if match is None or int(match.group(1)) == 0:
+        raise ValueError(f"Unsupported period: {period}")
+    return pd.DateOffset(**{PERIOD_UNITS[match.group(2)]: int(match.group(1))})
+
+
+def period_start(period: str, now: Optional[pd.Timestamp] = None) -> Optional[int]:
+    """Convert a yfinance period string to a start timestamp (epoch ns), None for max"""
+    now = now if now is not None else pd.Timestamp.now(tz="UTC")
+    if period == "max":
+        return None
+    if period == "ytd":
+        return pd.Timestamp(year=now.year, month=1, day=1, tz="UTC").value
+    return (now - period_offset(period)).value
+
+
+def period_covering(start: pd.Timestamp, now: Optional[pd.Timestamp] = None) -> str:
+    """Smallest period whose history reaches back to start"""
+    now = now if now is not None else pd.Timestamp.now(tz="UTC")
+    start = start.tz_localize("UTC") if start.tzinfo is None else start
+    for period, offset in PERIOD_OFFSETS.items():
+        if now - offset <= start:
+            return period
+    return "max"
+
+
+class BarStore:
+    """Local OHLCV store that syncs incrementally with the market data provider"""
+
+    def __init__(
+        self,
+        root: str = BAR_STORE_DIR,
+        provider: Any = market_data,
+        refresh_seconds: int = BAR_STORE_REFRESH_SECONDS
+    ):
+        self.root = root
+        self.provider = provider
+        self.refresh_seconds = refresh_seconds
+        self._locks: Dict[tuple, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.full_fetches = 0
+        self.tail_fetches = 0
+        self.local_reads = 0
+        self.adjustment_refetches = 0
+        self.passthrough_fetches = 0
+
+    # ---------- file layout ----------
+
+    def _paths(self, ticker: str, interval: str) -> tuple:
+        # Both come from request parameters; never let them leave the store root
+        if interval not in INTERVALS:
+            raise ValueError(f"Unsupported interval: {interval}")
+        if not TICKER_PATTERN.match(ticker):
+            raise ValueError(f"Invalid ticker: {ticker}")
+        directory = os.path.join(self.root, interval)
+        return (
+            os.path.join(directory, f"{ticker}.bars"),
+            os.path.join(directory, f"{ticker}.json")
+        )
+
+    def _lock_for(self, key: tuple) -> threading.Lock:
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    @staticmethod
+    def _read_bars(path: str) -> np.ndarray:
+        """Memory-map the bar file (empty array if missing)"""
+        if not os.path.exists(path) or os.path.getsize(path) < BAR_DTYPE.itemsize:
+            return np.empty(0, dtype=BAR_DTYPE)
+        return np.memmap(path, dtype=BAR_DTYPE, mode="r")
+
+    @staticmethod
+    def _read_meta(path: str) -> Dict[str, Any]:
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    @staticmethod
+    def _tmp_path(path: str) -> str:
+        # Unique per writer: other worker processes may be writing the same file
+        return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    @classmethod
+    def _write_meta(cls, path: str, meta: Dict[str, Any]):
+        tmp = cls._tmp_path(path)
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def _write_bars(cls, path: str, bars: np.ndarray):
+        """Atomically replace the bar file; readers keep their mapping of the old file"""
+        tmp = cls._tmp_path(path)
+        bars.tofile(tmp)
+        os.replace(tmp, path)
+
+    # ---------- conversions ----------
+
+    @staticmethod
+    def _frame_to_bars(frame: pd.DataFrame) -> np.ndarray:
+        index = pd.DatetimeIndex(frame.index)
+        if index.tz is None:
+            index = index.tz_localize("UTC")
+        bars = np.empty(len(frame), dtype=BAR_DTYPE)
+        bars["ts"] = index.tz_convert("UTC").asi8
+        for column, field in FRAME_COLUMNS.items():
+            bars[field] = frame[column].to_numpy(dtype=np.float64)
+        return bars
+
+    @staticmethod
+    def _bars_to_frame(bars: np.ndarray, tz: str) -> pd.DataFrame:
+        index = pd.to_datetime(bars["ts"], utc=True).tz_convert(tz)
+        frame = pd.DataFrame(
+            {column: np.asarray(bars[field]) for column, field in FRAME_COLUMNS.items()},
+            index=index
+        )
+        frame["Volume"] = frame["Volume"].fillna(0).astype("int64")
+        return frame
+
+    @staticmethod
+    def _frame_tz(frame: pd.DataFrame) -> str:
+        tz = getattr(frame.index, "tz", None)
+        return str(tz) if tz is not None else "UTC"
+
+    # ---------- sync ----------
+
+    def _full_fetch(self, ticker: str, period: str, interval: str, bars_path: str, meta_path: str):
+        """Replace the stored series with a fresh download covering period"""
+        frame = self.provider.get_history(ticker, period=period, interval=interval)
+        self.full_fetches += 1
+        if frame is None or frame.empty:
+            return
+
+        os.makedirs(os.path.dirname(bars_path), exist_ok=True)
+        self._write_bars(bars_path, self._frame_to_bars(frame))
+        self._write_meta(meta_path, {
+            "tz": self._frame_tz(frame),
+            "period": period,
+            "covered_from": period_start(period),
+            "synced_at": time.time()
+        })
+
+    @staticmethod
+    def _overlap_matches(bars: np.ndarray, new_bars: np.ndarray) -> bool:
+        """Whether fetched bars agree with the completed stored bars they overlap"""
+        # The last stored bar may have been partial when it was written
+        completed = bars[:-1]
+        common, stored_idx, new_idx = np.intersect1d(completed["ts"], new_bars["ts"], return_indices=True)
+        if len(common) == 0:
+            return True
+        return all(
+            np.allclose(completed[field][stored_idx], new_bars[field][new_idx], rtol=1e-6, equal_nan=True)
+            for field in ("open", "high", "low", "close")
+        )
+
+    @staticmethod
+    def _covering_period(covered_from: Optional[int]) -> str:
+        if covered_from is None:
+            return "max"
+        return period_covering(pd.Timestamp(covered_from, unit="ns", tz="UTC"))
+
+    def _tail_fetch(self, ticker: str, interval: str, bars: np.ndarray,
+                    bars_path: str, meta: Dict[str, Any], meta_path: str):
+        """
+        Fetch from the last completed stored bar onwards and append
+
+        The fetch overlaps one completed bar; if upstream has since adjusted
+        it (split or dividend), the whole stored history is stale and is
+        downloaded again.
+        """
+        overlap = bars["ts"][-2] if len(bars) > 1 else bars["ts"][-1]
+        first = pd.Timestamp(int(overlap), unit="ns", tz="UTC").tz_convert(meta.get("tz", "UTC"))
+        start = first.strftime("%Y-%m-%d") if interval.endswith(("d", "wk", "mo")) else first
+        frame = self.provider.get_history(ticker, interval=interval, start=start)
+        self.tail_fetches += 1
+
+        if frame is not None and not frame.empty:
+            new_bars = self._frame_to_bars(frame)
+            if not self._overlap_matches(bars, new_bars):
+                self.adjustment_refetches += 1
+                period = meta.get("period") or self._covering_period(meta.get("covered_from"))
+                self._full_fetch(ticker, period, interval, bars_path, meta_path)
+                return
+            keep = int(np.searchsorted(bars["ts"], new_bars["ts"][0], side="left"))
+            self._write_bars(bars_path, np.concatenate([bars[:keep], new_bars]))
+
+        meta["synced_at"] = time.time()
+        self._write_meta(meta_path, meta)
+
+    def get_history(self, ticker: str, period: str = "1mo", interval: str = "1d") -> pd.DataFrame:
+        """Get OHLCV history for period, shaped like yfinance Ticker.history()"""
+        ticker = ticker.upper()
+        bars_path, meta_path = self._paths(ticker, interval)
+        try:
+            start_ts = period_start(period)
+        except ValueError:
+            # Not a period the store can map to a start date; let upstream handle it
+            self.passthrough_fetches += 1
+            return self.provider.get_history(ticker, period=period, interval=interval)
+
+        with self._lock_for((ticker, interval)):
+            bars = self._read_bars(bars_path)
+            meta = self._read_meta(meta_path)
+
+            covered_from = meta.get("covered_from", 0)
+            covered = len(bars) > 0 and (
+                covered_from is None or (start_ts is not None and covered_from <= start_ts)
+            )
+
+            if not covered:
+                self._full_fetch(ticker, period, interval, bars_path, meta_path)
+            elif time.time() - meta.get("synced_at", 0) >= self.refresh_seconds:
+                self._tail_fetch(ticker, interval, bars, bars_path, meta, meta_path)
+            else:
+                self.local_reads += 1
+
+            bars = self._read_bars(bars_path)
+            if len(bars) == 0:
+                return pd.DataFrame(columns=list(FRAME_COLUMNS))
+
+            meta = self._read_meta(meta_path)
+            first = 0 if start_ts is None else int(np.searchsorted(bars["ts"], start_ts, side="left"))
+            return self._bars_to_frame(bars[first:], meta.get("tz", "UTC"))
+
+    def invalidate(self, ticker: str) -> int:
+        """Delete every stored interval of ticker, returns files removed"""
+        ticker = ticker.upper()
+        if not os.path.isdir(self.root) or not TICKER_PATTERN.match(ticker):
+            return 0
+        removed = 0
+        for interval in os.listdir(self.root):
+            if interval not in INTERVALS:
+                continue
+            with self._lock_for((ticker, interval)):
+                for path in self._paths(ticker, interval):
+                    try:
+                        os.remove(path)
+                        removed += 1
+                    except FileNotFoundError:
+                        pass
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store fetch statistics"""
+        return {
+            "full_fetches": self.full_fetches,
+            "tail_fetches": self.tail_fetches,
+            "local_reads": self.local_reads,
+            "adjustment_refetches": self.adjustment_refetches,
+            "passthrough_fetches": self.passthrough_fetches
+        }
+
+
+# ============================================
+# Global bar store instance
+# ============================================
+
+bar_store = BarStore()
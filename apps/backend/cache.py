@@ -3,10 +3,25 @@ Caching layer for API responses and expensive computations
 Implements in-memory cache with optional Redis support
 """
 
+import asyncio
+import base64
+import bisect
 import hashlib
+import heapq
+import inspect
 import json
+import math
+import os
+import random
+import socket
+import sys
+import threading
 import time
-from typing import Any, Optional, Dict, Callable
+import uuid
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Optional, Dict, Callable, List, Union
 from functools import wraps
 from datetime import datetime, timedelta
 from enum import Enum
@@ -16,103 +31,413 @@ from enum import Enum
 # ============================================
 
 class CacheTTL(Enum):
-    """Cache time-to-live durations"""
-    STOCK_PRICE = 300  # 5 minutes
-    FUNDAMENTAL = 3600  # 1 hour
-    TECHNICAL = 600  # 10 minutes
-    AI_REPORT = 7200  # 2 hours
-    NEWS = 1800  # 30 minutes
-    TRADING_AGENTS = 1800  # 30 minutes
-    MACRO_DATA = 86400  # 1 day
+    """Cache namespaces and their time-to-live durations"""
+    STOCK_PRICE = ("stock_price", 300)  # 5 minutes
+    QUOTE = ("quote", 300)  # 5 minutes, batched last prices
+    FUNDAMENTAL = ("fundamental", 3600)  # 1 hour
+    TECHNICAL = ("technical", 600)  # 10 minutes
+    AI_REPORT = ("ai_report", 7200)  # 2 hours
+    NEWS = ("news", 1800)  # 30 minutes
+    TRADING_AGENTS = ("trading_agents", 1800)  # 30 minutes
+    MACRO_DATA = ("macro_data", 86400)  # 1 day
+
+    def __init__(self, namespace: str, seconds: int):
+        # The explicit name keeps members with equal durations distinct
+        self.namespace = namespace
+        self.seconds = seconds
+
+
+# Soft TTLs for stale-while-revalidate namespaces. Entries are fresh until the
+# soft TTL, then served stale with a background refresh until the hard TTL
+# (the CacheTTL value); only past the hard TTL does a request block.
+CACHE_SOFT_TTL = {
+    CacheTTL.STOCK_PRICE: int(os.getenv("CACHE_STOCK_PRICE_SOFT_TTL", "60")),
+    CacheTTL.FUNDAMENTAL: int(os.getenv("CACHE_FUNDAMENTAL_SOFT_TTL", "900")),
+}
+
+
+def ticker_tag(ticker: str) -> str:
+    """Tag shared by every cache entry derived from a ticker"""
+    return f"ticker:{ticker.upper()}"
+
+
+def namespace_name(namespace: Union[CacheTTL, str]) -> str:
+    """Namespace name for a CacheTTL member or explicit name"""
+    return namespace.namespace if isinstance(namespace, CacheTTL) else namespace
+
+
+def namespace_tag(namespace: Union[CacheTTL, str]) -> str:
+    """Tag shared by every cache entry in a namespace"""
+    return f"ns:{namespace_name(namespace)}"
+
+
+def key_namespace(key: str) -> str:
+    """Default namespace of a cache key: its prefix ("stock_price:AAPL" -> "stock_price")"""
+    return key.split(":", 1)[0]
+
+
+def entry_namespace(key: str, tags) -> str:
+    """Namespace of a stored entry: its namespace tag, else its key prefix"""
+    for tag in tags:
+        if tag.startswith("ns:"):
+            return tag[3:]
+    return key_namespace(key)
 
 
 # ============================================
 # In-Memory Cache (Default)
 # ============================================
 
-class InMemoryCache:
-    """Simple in-memory cache with TTL support"""
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_EVICTION_POLICY = os.getenv("CACHE_EVICTION_POLICY", "lru")
 
-    def __init__(self):
-        self.store: Dict[str, Dict[str, Any]] = {}
+
+def estimate_size(value: Any, _seen: Optional[set] = None) -> int:
+    """Approximate in-memory size of a cached value in bytes"""
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(v, _seen) for v in value)
+    elif hasattr(value, "__dict__"):
+        size += estimate_size(vars(value), _seen)
+    return size
+
+
+class InMemoryCache:
+    """Bounded in-memory cache with TTL, LRU/LFU eviction and a byte budget"""
+
+    def __init__(
+        self,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        max_bytes: int = CACHE_MAX_BYTES,
+        policy: str = CACHE_EVICTION_POLICY
+    ):
+        if policy not in ("lru", "lfu"):
+            raise ValueError(f"Unknown eviction policy: {policy}")
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.store: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._expiry_heap: List[tuple] = []  # (expires_at, key), stale items skipped lazily
+        self._freq_buckets: Dict[int, "OrderedDict[str, None]"] = {}  # LFU only
+        self._tag_index: Dict[str, set] = {}  # tag -> keys
+        self._lock = threading.RLock()
+
+        self.current_bytes = 0
         self.hits = 0
         self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.evictions_by_namespace: Dict[str, int] = {}
 
-    def get(self, key: str) -> Optional[Any]:
-        """Get value from cache"""
-        if key not in self.store:
-            self.misses += 1
-            return None
+    # ---------- internal bookkeeping (lock held) ----------
+
+    def _touch(self, key: str, entry: Dict[str, Any]):
+        """Record an access for the eviction policy"""
+        if self.policy == "lru":
+            self.store.move_to_end(key)
+            return
 
-        entry = self.store[key]
+        bucket = self._freq_buckets[entry["freq"]]
+        del bucket[key]
+        if not bucket:
+            del self._freq_buckets[entry["freq"]]
+        entry["freq"] += 1
+        self._freq_buckets.setdefault(entry["freq"], OrderedDict())[key] = None
 
-        # Check if expired
-        if entry["expires_at"] < time.time():
-            del self.store[key]
-            self.misses += 1
+    def _remove(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.store.pop(key, None)
+        if entry is None:
             return None
+        self.current_bytes -= entry["size"]
+        for tag in entry["tags"]:
+            keys = self._tag_index[tag]
+            keys.discard(key)
+            if not keys:
+                del self._tag_index[tag]
+        if self.policy == "lfu":
+            bucket = self._freq_buckets[entry["freq"]]
+            del bucket[key]
+            if not bucket:
+                del self._freq_buckets[entry["freq"]]
+        return entry
+
+    def _evict_one(self):
+        if self.policy == "lru":
+            key = next(iter(self.store))
+        else:
+            key = next(iter(self._freq_buckets[min(self._freq_buckets)]))
+        entry = self._remove(key)
+        self.evictions += 1
+        namespace = entry_namespace(key, entry["tags"])
+        self.evictions_by_namespace[namespace] = self.evictions_by_namespace.get(namespace, 0) + 1
+
+    def _purge_expired(self, now: float) -> int:
+        """Pop expired entries off the expiry heap, O(k log n) for k expired"""
+        removed = 0
+        heap = self._expiry_heap
+        while heap and heap[0][0] < now:
+            expires_at, key = heapq.heappop(heap)
+            entry = self.store.get(key)
+            if entry is not None and entry["expires_at"] == expires_at:
+                self._remove(key)
+                self.expirations += 1
+                removed += 1
+
+        # Overwrites leave stale heap items behind; compact when they dominate
+        if len(heap) > 2 * len(self.store) + 64:
+            self._expiry_heap = [(e["expires_at"], k) for k, e in self.store.items()]
+            heapq.heapify(self._expiry_heap)
+        return removed
+
+    # ---------- public API ----------
 
-        self.hits += 1
-        return entry["value"]
-
-    def set(self, key: str, value: Any, ttl: int):
-        """Set value in cache with TTL"""
-        self.store[key] = {
-            "value": value,
-            "expires_at": time.time() + ttl,
-            "created_at": time.time()
-        }
+    def get(self, key: str) -> Optional[Any]:
+        """Get value from cache"""
+        with self._lock:
+            entry = self.store.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            # Check if expired
+            if entry["expires_at"] < time.time():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._touch(key, entry)
+            self.hits += 1
+            return entry["value"]
+
+    def peek(self, key: str) -> Optional[Any]:
+        """Get an unexpired value without counting a hit or miss or refreshing its recency"""
+        with self._lock:
+            entry = self.store.get(key)
+            if entry is None or entry["expires_at"] < time.time():
+                return None
+            return entry["value"]
+
+    def set(self, key: str, value: Any, ttl: int, tags: Optional[List[str]] = None):
+        """Set value in cache with TTL, evicting to stay within budget"""
+        now = time.time()
+        tags = tuple(tags or ())
+        size = estimate_size(key) + estimate_size(value)
+
+        with self._lock:
+            self._remove(key)
+            self._purge_expired(now)
+            if size > self.max_bytes:
+                return
+
+            while self.store and (
+                len(self.store) >= self.max_entries or self.current_bytes + size > self.max_bytes
+            ):
+                self._evict_one()
+
+            entry = {
+                "value": value,
+                "expires_at": now + ttl,
+                "created_at": now,
+                "size": size,
+                "freq": 1,
+                "tags": tags
+            }
+            self.store[key] = entry
+            self.current_bytes += size
+            for tag in tags:
+                self._tag_index.setdefault(tag, set()).add(key)
+            heapq.heappush(self._expiry_heap, (entry["expires_at"], key))
+            if self.policy == "lfu":
+                self._freq_buckets.setdefault(1, OrderedDict())[key] = None
 
     def delete(self, key: str):
         """Delete value from cache"""
-        if key in self.store:
-            del self.store[key]
+        with self._lock:
+            self._remove(key)
+
+    def invalidate_tag(self, tag: str) -> int:
+        """Delete every entry carrying tag, O(entries with that tag)"""
+        with self._lock:
+            keys = list(self._tag_index.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
 
     def clear(self):
         """Clear all cache"""
-        self.store.clear()
+        with self._lock:
+            self.store.clear()
+            self._expiry_heap.clear()
+            self._freq_buckets.clear()
+            self._tag_index.clear()
+            self.current_bytes = 0
 
     def cleanup_expired(self):
         """Remove expired entries"""
-        current_time = time.time()
-        expired_keys = [
-            key for key, entry in self.store.items()
-            if entry["expires_at"] < current_time
-        ]
-        for key in expired_keys:
-            del self.store[key]
-        return len(expired_keys)
+        with self._lock:
+            return self._purge_expired(time.time())
 
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
-        total = self.hits + self.misses
-        hit_rate = (self.hits / total * 100) if total > 0 else 0
+        with self._lock:
+            total = self.hits + self.misses
+
+            return {
+                "entries": len(self.store),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total > 0 else 0.0,
+                "total_requests": total,
+                "evictions": self.evictions,
+                "evictions_by_namespace": dict(self.evictions_by_namespace),
+                "expirations": self.expirations,
+                "bytes": self.current_bytes,
+                "tags": len(self._tag_index),
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "policy": self.policy
+            }
 
-        return {
-            "entries": len(self.store),
-            "hits": self.hits,
-            "misses": self.misses,
-            "hit_rate": f"{hit_rate:.1f}%",
-            "total_requests": total
-        }
+
+# ============================================
+# Binary codec for Redis values
+# ============================================
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import lz4.frame
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+CACHE_COMPRESS_THRESHOLD = int(os.getenv("CACHE_COMPRESS_THRESHOLD", "1024"))
+
+
+# JSON has no binary type; bytes travel as {"__bytes__": "<base64>"}
+JSON_BYTES_KEY = "__bytes__"
+
+
+def _to_serializable(value: Any) -> Any:
+    """Fallback for types msgpack/json do not know (numpy scalars, pydantic models, bytes under json)"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {JSON_BYTES_KEY: base64.b64encode(value).decode("ascii")}
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if hasattr(value, "item"):
+        return value.item()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
+
+
+def _from_json_object(obj: Dict[str, Any]) -> Any:
+    """Restore bytes encoded by _to_serializable"""
+    if len(obj) == 1 and JSON_BYTES_KEY in obj:
+        return base64.b64decode(obj[JSON_BYTES_KEY])
+    return obj
+
+
+class CacheCodec:
+    """
+    Serialize cache values to compact bytes
+
+    Layout: 1 byte format (m=msgpack, j=json), 1 byte compression
+    (n=none, z=zlib, l=lz4), then the payload. Payloads above
+    compress_threshold bytes are compressed.
+    """
+
+    def __init__(self, compress_threshold: int = CACHE_COMPRESS_THRESHOLD, compression: Optional[str] = None,
+                 use_msgpack: Optional[bool] = None):
+        self.compress_threshold = compress_threshold
+        self.compression = compression or ("lz4" if LZ4_AVAILABLE else "zlib")
+        self.use_msgpack = MSGPACK_AVAILABLE if use_msgpack is None else use_msgpack
+
+    def encode(self, value: Any) -> bytes:
+        if self.use_msgpack:
+            fmt = b"m"
+            payload = msgpack.packb(value, use_bin_type=True, default=_to_serializable)
+        else:
+            fmt = b"j"
+            payload = json.dumps(value, default=_to_serializable).encode()
+
+        if len(payload) < self.compress_threshold:
+            return fmt + b"n" + payload
+        if self.compression == "lz4":
+            return fmt + b"l" + lz4.frame.compress(payload)
+        return fmt + b"z" + zlib.compress(payload, 1)
+
+    def decode(self, data: bytes) -> Any:
+        fmt, compression, payload = data[:1], data[1:2], data[2:]
+        if compression == b"z":
+            payload = zlib.decompress(payload)
+        elif compression == b"l":
+            payload = lz4.frame.decompress(payload)
+
+        if fmt == b"m":
+            return msgpack.unpackb(payload, raw=False)
+        return json.loads(payload, object_hook=_from_json_object)
 
 
 # ============================================
 # Redis Cache (Optional)
 # ============================================
 
-class RedisCache:
-    """Redis-based cache (requires redis-py)"""
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+REDIS_DB = int(os.getenv("REDIS_DB", "0"))
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5"))
+REDIS_RETRY_SECONDS = float(os.getenv("REDIS_RETRY_SECONDS", "30"))
 
-    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0):
-        try:
-            import redis
-            self.redis_client = redis.Redis(
+_redis_pools: Dict[tuple, Any] = {}
+_redis_pools_lock = threading.Lock()
+
+
+def get_redis_pool(host: str = REDIS_HOST, port: int = REDIS_PORT, db: int = REDIS_DB):
+    """Shared blocking connection pool per Redis endpoint"""
+    import redis
+
+    with _redis_pools_lock:
+        key = (host, port, db)
+        if key not in _redis_pools:
+            _redis_pools[key] = redis.ConnectionPool(
                 host=host,
                 port=port,
                 db=db,
-                decode_responses=True
+                max_connections=REDIS_MAX_CONNECTIONS,
+                socket_timeout=REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=REDIS_SOCKET_TIMEOUT
             )
+        return _redis_pools[key]
+
+
+class RedisCache:
+    """Redis-based cache (requires redis-py)"""
+
+    TAG_PREFIX = "tag:"
+
+    def __init__(self, host: str = REDIS_HOST, port: int = REDIS_PORT, db: int = REDIS_DB,
+                 codec: Optional[CacheCodec] = None):
+        self.codec = codec or CacheCodec()
+        try:
+            import redis
+            self.redis_client = redis.Redis(connection_pool=get_redis_pool(host, port, db))
             # Test connection
             self.redis_client.ping()
             self.available = True
@@ -129,26 +454,83 @@ class RedisCache:
         try:
             value = self.redis_client.get(key)
             if value:
-                return json.loads(value)
+                return self.codec.decode(value)
             return None
         except Exception as e:
             print(f"⚠️  Redis get error: {str(e)}")
             return None
 
-    def set(self, key: str, value: Any, ttl: int):
-        """Set value in Redis with TTL"""
-        if not self.available:
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Get several values in one MGET round trip (missing keys omitted)"""
+        if not self.available or not keys:
+            return {}
+
+        try:
+            values = self.redis_client.mget(keys)
+            return {
+                key: self.codec.decode(value)
+                for key, value in zip(keys, values)
+                if value
+            }
+        except Exception as e:
+            print(f"⚠️  Redis mget error: {str(e)}")
+            return {}
+
+    def _queue_set(self, pipe, key: str, value: Any, ttl: int, tags: Optional[List[str]]):
+        pipe.setex(key, ttl, self.codec.encode(value))
+        for tag in tags or ():
+            tag_key = f"{self.TAG_PREFIX}{tag}"
+            pipe.sadd(tag_key, key)
+            # Outlive every member; refreshed on each write to the tag
+            pipe.expire(tag_key, max(ttl, CacheTTL.MACRO_DATA.seconds))
+
+    def set(self, key: str, value: Any, ttl: int, tags: Optional[List[str]] = None):
+        """Set value in Redis with TTL, indexing key under each tag set"""
+        self.set_many({key: value}, ttl, tags)
+
+    def set_many(self, items: Dict[str, Any], ttl: int, tags: Optional[List[str]] = None):
+        """Set several values with one pipelined round trip"""
+        if not self.available or not items:
             return
 
         try:
-            self.redis_client.setex(
-                key,
-                ttl,
-                json.dumps(value)
-            )
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, value in items.items():
+                self._queue_set(pipe, key, value, ttl, tags)
+            pipe.execute()
         except Exception as e:
             print(f"⚠️  Redis set error: {str(e)}")
 
+    def pop_tag(self, tag: str) -> List[str]:
+        """Delete every key indexed under tag, returns the deleted keys"""
+        if not self.available:
+            return []
+
+        try:
+            tag_key = f"{self.TAG_PREFIX}{tag}"
+            keys = list(self.redis_client.smembers(tag_key))
+            if keys:
+                self.redis_client.delete(*keys)
+            self.redis_client.delete(tag_key)
+            return [key.decode() for key in keys]
+        except Exception as e:
+            print(f"⚠️  Redis invalidate error: {str(e)}")
+            return []
+
+    def invalidate_tag(self, tag: str) -> int:
+        """Delete every key indexed under tag"""
+        return len(self.pop_tag(tag))
+
+    def publish(self, channel: str, message: str):
+        """Publish message on a pub/sub channel"""
+        if not self.available:
+            return
+
+        try:
+            self.redis_client.publish(channel, message)
+        except Exception as e:
+            print(f"⚠️  Redis publish error: {str(e)}")
+
     def delete(self, key: str):
         """Delete value from Redis"""
         if not self.available:
@@ -170,58 +552,804 @@ class RedisCache:
             print(f"⚠️  Redis clear error: {str(e)}")
 
 
+class AsyncRedisCache:
+    """
+    asyncio-native Redis cache (redis.asyncio) with the RedisCache API
+
+    Connects lazily on first use. After a connection error the backend
+    reports unavailable for REDIS_RETRY_SECONDS so callers fall back to
+    the in-memory cache instead of waiting on a dead server.
+    """
+
+    TAG_PREFIX = RedisCache.TAG_PREFIX
+
+    def __init__(self, host: str = REDIS_HOST, port: int = REDIS_PORT, db: int = REDIS_DB,
+                 codec: Optional[CacheCodec] = None, retry_seconds: float = REDIS_RETRY_SECONDS):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.codec = codec or CacheCodec()
+        self.retry_seconds = retry_seconds
+        self._client = None
+        self._loop = None
+        self._down_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def _get_client(self):
+        # Pools are bound to the event loop that created them
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            import redis.asyncio as aioredis
+            pool = aioredis.ConnectionPool(
+                host=self.host,
+                port=self.port,
+                db=self.db,
+                max_connections=REDIS_MAX_CONNECTIONS,
+                socket_timeout=REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=REDIS_SOCKET_TIMEOUT
+            )
+            self._client = aioredis.Redis(connection_pool=pool)
+            self._loop = loop
+        return self._client
+
+    def _mark_down(self, operation: str, error: Exception):
+        if self.available:
+            print(f"⚠️  Async Redis {operation} error: {str(error)} - using in-memory cache")
+        self._down_until = time.monotonic() + self.retry_seconds
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get value from Redis"""
+        if not self.available:
+            return None
+
+        try:
+            value = await self._get_client().get(key)
+            if value:
+                return self.codec.decode(value)
+            return None
+        except Exception as e:
+            self._mark_down("get", e)
+            return None
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Get several values in one MGET round trip (missing keys omitted)"""
+        if not self.available or not keys:
+            return {}
+
+        try:
+            values = await self._get_client().mget(keys)
+            return {
+                key: self.codec.decode(value)
+                for key, value in zip(keys, values)
+                if value
+            }
+        except Exception as e:
+            self._mark_down("mget", e)
+            return {}
+
+    async def set(self, key: str, value: Any, ttl: int, tags: Optional[List[str]] = None):
+        """Set value in Redis with TTL, indexing key under each tag set"""
+        await self.set_many({key: value}, ttl, tags)
+
+    async def set_many(self, items: Dict[str, Any], ttl: int, tags: Optional[List[str]] = None):
+        """Set several values with one pipelined round trip"""
+        if not self.available or not items:
+            return
+
+        try:
+            pipe = self._get_client().pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.setex(key, ttl, self.codec.encode(value))
+                for tag in tags or ():
+                    tag_key = f"{self.TAG_PREFIX}{tag}"
+                    pipe.sadd(tag_key, key)
+                    pipe.expire(tag_key, max(ttl, CacheTTL.MACRO_DATA.seconds))
+            await pipe.execute()
+        except Exception as e:
+            self._mark_down("set", e)
+
+    async def pop_tag(self, tag: str) -> List[str]:
+        """Delete every key indexed under tag, returns the deleted keys"""
+        if not self.available:
+            return []
+
+        try:
+            client = self._get_client()
+            tag_key = f"{self.TAG_PREFIX}{tag}"
+            keys = list(await client.smembers(tag_key))
+            if keys:
+                await client.delete(*keys)
+            await client.delete(tag_key)
+            return [key.decode() for key in keys]
+        except Exception as e:
+            self._mark_down("invalidate", e)
+            return []
+
+    async def invalidate_tag(self, tag: str) -> int:
+        """Delete every key indexed under tag"""
+        return len(await self.pop_tag(tag))
+
+    async def publish(self, channel: str, message: str):
+        """Publish message on a pub/sub channel"""
+        if not self.available:
+            return
+
+        try:
+            await self._get_client().publish(channel, message)
+        except Exception as e:
+            self._mark_down("publish", e)
+
+    async def delete(self, key: str):
+        """Delete value from Redis"""
+        if not self.available:
+            return
+
+        try:
+            await self._get_client().delete(key)
+        except Exception as e:
+            self._mark_down("delete", e)
+
+    async def clear(self):
+        """Clear all cache"""
+        if not self.available:
+            return
+
+        try:
+            await self._get_client().flushdb()
+        except Exception as e:
+            self._mark_down("clear", e)
+
+
+# ============================================
+# Cache telemetry
+# ============================================
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram in milliseconds"""
+
+    BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(self.BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (max observed for +Inf)"""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= rank:
+                return float(bound)
+        return self.max_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.BUCKETS_MS, self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = self.count
+        return {
+            "count": self.count,
+            "sum_ms": self.total_ms,
+            "mean_ms": (self.total_ms / self.count) if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": buckets  # cumulative counts per upper bound (ms)
+        }
+
+
+class NamespaceStats:
+    """Counters and latency histograms for one cache namespace"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.stale_served = 0
+        self.coalesced = 0
+        self.loads = 0
+        self.load_errors = 0
+        self.get_latency = LatencyHistogram()
+        self.load_latency = LatencyHistogram()
+
+
+class CacheTelemetry:
+    """Per-namespace cache counters and latency histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._namespaces: Dict[str, NamespaceStats] = {}
+
+    def _ns(self, namespace: str) -> NamespaceStats:
+        stats = self._namespaces.get(namespace)
+        if stats is None:
+            stats = self._namespaces[namespace] = NamespaceStats()
+        return stats
+
+    def record_get(self, namespace: str, hit: bool, seconds: float):
+        with self._lock:
+            stats = self._ns(namespace)
+            if hit:
+                stats.hits += 1
+            else:
+                stats.misses += 1
+            stats.get_latency.observe(seconds * 1000)
+
+    def record_stale(self, namespace: str):
+        with self._lock:
+            self._ns(namespace).stale_served += 1
+
+    def record_coalesced(self, namespace: str):
+        with self._lock:
+            self._ns(namespace).coalesced += 1
+
+    def record_load(self, namespace: str, seconds: float, error: bool = False):
+        with self._lock:
+            stats = self._ns(namespace)
+            stats.loads += 1
+            if error:
+                stats.load_errors += 1
+            stats.load_latency.observe(seconds * 1000)
+
+    def snapshot(self, evictions: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        """Machine-readable per-namespace stats"""
+        evictions = evictions or {}
+        with self._lock:
+            names = set(self._namespaces) | set(evictions)
+            result = {}
+            for name in sorted(names):
+                stats = self._namespaces.get(name) or NamespaceStats()
+                lookups = stats.hits + stats.misses
+                result[name] = {
+                    "hits": stats.hits,
+                    "misses": stats.misses,
+                    "hit_rate": (stats.hits / lookups) if lookups else 0.0,
+                    "stale_served": stats.stale_served,
+                    "coalesced": stats.coalesced,
+                    "evictions": evictions.get(name, 0),
+                    "loads": stats.loads,
+                    "load_errors": stats.load_errors,
+                    "get_latency": stats.get_latency.snapshot(),
+                    "load_latency": stats.load_latency.snapshot()
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._namespaces.clear()
+
+
+class _LoadTimer:
+    """Context manager recording a loader call's latency and outcome"""
+
+    def __init__(self, telemetry: CacheTelemetry, namespace: str):
+        self.telemetry = telemetry
+        self.namespace = namespace
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.telemetry.record_load(self.namespace, time.perf_counter() - self.started, exc_type is not None)
+        return False
+
+
+# ============================================
+# Cross-worker invalidation bus
+# ============================================
+
+CACHE_NEAR_CACHE = os.getenv("CACHE_NEAR_CACHE", "False").lower() == "true"
+CACHE_NEAR_CACHE_TTL = int(os.getenv("CACHE_NEAR_CACHE_TTL", "30"))
+CACHE_INVALIDATION_CHANNEL = os.getenv("CACHE_INVALIDATION_CHANNEL", "nexus-alpha:cache-invalidation")
+
+
+class InvalidationBus(ABC):
+    """
+    Broadcasts cache invalidations between workers
+
+    Messages are dicts: {"origin": worker id, "op": "evict" | "clear",
+    "keys": [...], "tags": [...]}. Subscribers receive their own messages
+    too and are expected to skip them by origin.
+    """
+
+    @abstractmethod
+    def publish(self, message: Dict[str, Any]):
+        """Deliver message to every subscribed worker"""
+
+    async def apublish(self, message: Dict[str, Any]):
+        self.publish(message)
+
+    @abstractmethod
+    def subscribe(self, handler: Callable[[Dict[str, Any]], None]):
+        """Call handler with every message published on the bus"""
+
+    def close(self):
+        pass
+
+
+class LocalInvalidationBus(InvalidationBus):
+    """In-process bus, stands in for Redis pub/sub in tests and single-process runs"""
+
+    def __init__(self):
+        self._handlers: List[Callable[[Dict[str, Any]], None]] = []
+
+    def publish(self, message: Dict[str, Any]):
+        for handler in list(self._handlers):
+            handler(message)
+
+    def subscribe(self, handler: Callable[[Dict[str, Any]], None]):
+        self._handlers.append(handler)
+
+    def close(self):
+        self._handlers.clear()
+
+
+class RedisInvalidationBus(InvalidationBus):
+    """Redis pub/sub bus; a daemon thread delivers incoming messages"""
+
+    def __init__(
+        self,
+        redis_cache: RedisCache,
+        async_redis_cache: Optional[AsyncRedisCache] = None,
+        channel: str = CACHE_INVALIDATION_CHANNEL
+    ):
+        self.redis_cache = redis_cache
+        self.async_redis_cache = async_redis_cache
+        self.channel = channel
+        self._pubsub = None
+        self._thread = None
+
+    def publish(self, message: Dict[str, Any]):
+        self.redis_cache.publish(self.channel, json.dumps(message))
+
+    async def apublish(self, message: Dict[str, Any]):
+        if self.async_redis_cache is None:
+            self.publish(message)
+        else:
+            await self.async_redis_cache.publish(self.channel, json.dumps(message))
+
+    def subscribe(self, handler: Callable[[Dict[str, Any]], None]):
+        def on_message(raw):
+            try:
+                handler(json.loads(raw["data"]))
+            except Exception as e:
+                print(f"⚠️  Cache invalidation message error: {str(e)}")
+
+        self._pubsub = self.redis_cache.redis_client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{self.channel: on_message})
+        self._thread = self._pubsub.run_in_thread(sleep_time=0.25, daemon=True)
+
+    def close(self):
+        if self._thread is not None:
+            self._thread.stop()
+        if self._pubsub is not None:
+            self._pubsub.close()
+
+
+def _default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
 # ============================================
 # Hybrid Cache Manager
 # ============================================
 
 class CacheManager:
-    """Unified cache manager with fallback strategy"""
-
-    def __init__(self, use_redis: bool = False):
+    """
+    Unified cache manager with fallback strategy
+
+    In near-cache mode the in-memory cache is an L1 in front of Redis: reads
+    hit L1 first, L1 copies live at most near_cache_ttl seconds, and every
+    write or invalidation is broadcast on the bus so other workers evict
+    their L1 copies.
+    """
+
+    def __init__(
+        self,
+        use_redis: bool = False,
+        near_cache: bool = False,
+        bus: Optional[InvalidationBus] = None,
+        near_cache_ttl: int = CACHE_NEAR_CACHE_TTL,
+        worker_id: Optional[str] = None
+    ):
         self.memory_cache = InMemoryCache()
+        self._refreshing: set = set()
+        self._background_tasks: set = set()
+        self.stale_served = 0
+        self.background_refreshes = 0
+        self.durable_store: Optional[Any] = None  # DurableCache, attached on startup
+        self.telemetry = CacheTelemetry()
 
         if use_redis:
             self.redis_cache = RedisCache()
+            self.async_redis_cache = AsyncRedisCache()
         else:
             self.redis_cache = None
+            self.async_redis_cache = None
+
+        self.near_cache = near_cache
+        self.near_cache_ttl = near_cache_ttl
+        self.worker_id = worker_id or _default_worker_id()
+        self.invalidations_received = 0
+        self.bus = bus
+        if self.bus is None and near_cache and self.redis_cache and self.redis_cache.available:
+            self.bus = RedisInvalidationBus(self.redis_cache, self.async_redis_cache)
+        if self.bus is not None:
+            self.bus.subscribe(self._on_invalidation)
+
+    # ---------- near-cache ----------
+
+    def _l1_ttl(self, ttl: int) -> int:
+        return min(ttl, self.near_cache_ttl) if self.near_cache else ttl
+
+    def _on_invalidation(self, message: Dict[str, Any]):
+        """Evict L1 copies named by another worker's broadcast"""
+        if message.get("origin") == self.worker_id:
+            return
+        self.invalidations_received += 1
+        if message.get("op") == "clear":
+            self.memory_cache.clear()
+            return
+        for key in message.get("keys", ()):
+            self.memory_cache.delete(key)
+        for tag in message.get("tags", ()):
+            self.memory_cache.invalidate_tag(tag)
+
+    def _message(self, op: str, keys=(), tags=()) -> Optional[Dict[str, Any]]:
+        if self.bus is None:
+            return None
+        return {"origin": self.worker_id, "op": op, "keys": list(keys), "tags": list(tags)}
+
+    def _broadcast(self, op: str, keys=(), tags=()):
+        message = self._message(op, keys, tags)
+        if message is not None:
+            self.bus.publish(message)
+
+    async def _abroadcast(self, op: str, keys=(), tags=()):
+        message = self._message(op, keys, tags)
+        if message is not None:
+            await self.bus.apublish(message)
+
+    # ---------- sync API ----------
+
+    def get(self, key: str, namespace: Optional[str] = None) -> Optional[Any]:
+        """Get value from cache (tries Redis first, then memory; L1 first in near-cache mode)"""
+        started = time.perf_counter()
+        value = self._get(key)
+        self.telemetry.record_get(namespace or key_namespace(key), value is not None,
+                                  time.perf_counter() - started)
+        return value
+
+    def _get(self, key: str) -> Optional[Any]:
+        if self.near_cache:
+            value = self.memory_cache.get(key)
+            if value is not None:
+                return value
 
-    def get(self, key: str) -> Optional[Any]:
-        """Get value from cache (tries Redis first, then memory)"""
         # Try Redis first if available
         if self.redis_cache and self.redis_cache.available:
             value = self.redis_cache.get(key)
             if value is not None:
+                if self.near_cache:
+                    self.memory_cache.set(key, value, self.near_cache_ttl)
                 return value
 
         # Fallback to memory cache
-        return self.memory_cache.get(key)
+        return None if self.near_cache else self.memory_cache.get(key)
 
-    def set(self, key: str, value: Any, ttl: int):
+    def set(self, key: str, value: Any, ttl: int, tags: Optional[List[str]] = None):
         """Set value in both caches"""
         # Always use memory cache
-        self.memory_cache.set(key, value, ttl)
+        self.memory_cache.set(key, value, self._l1_ttl(ttl), tags)
 
         # Also use Redis if available
         if self.redis_cache and self.redis_cache.available:
-            self.redis_cache.set(key, value, ttl)
+            self.redis_cache.set(key, value, ttl, tags)
+        self._broadcast("evict", keys=[key])
+
+    def get_many(self, keys: List[str], namespace: Optional[str] = None) -> Dict[str, Any]:
+        """Get several values at once (Redis MGET first, then memory for the rest)"""
+        started = time.perf_counter()
+        found = self._get_many(keys)
+        self._record_batch(keys, found, namespace, time.perf_counter() - started)
+        return found
+
+    def _record_batch(self, keys: List[str], found: Dict[str, Any],
+                      namespace: Optional[str], seconds: float):
+        # Each key is charged an equal share of the batch round trip
+        share = seconds / len(keys) if keys else 0.0
+        for key in keys:
+            self.telemetry.record_get(namespace or key_namespace(key), key in found, share)
+
+    def _get_many(self, keys: List[str]) -> Dict[str, Any]:
+        found: Dict[str, Any] = {}
+        if self.near_cache:
+            for key in keys:
+                value = self.memory_cache.get(key)
+                if value is not None:
+                    found[key] = value
+
+        if self.redis_cache and self.redis_cache.available:
+            remote = self.redis_cache.get_many([key for key in keys if key not in found])
+            if self.near_cache:
+                for key, value in remote.items():
+                    self.memory_cache.set(key, value, self.near_cache_ttl)
+            found.update(remote)
+
+        if not self.near_cache:
+            for key in keys:
+                if key not in found:
+                    value = self.memory_cache.get(key)
+                    if value is not None:
+                        found[key] = value
+        return found
+
+    def set_many(self, items: Dict[str, Any], ttl: int, tags: Optional[List[str]] = None):
+        """Set several values at once (pipelined to Redis)"""
+        for key, value in items.items():
+            self.memory_cache.set(key, value, self._l1_ttl(ttl), tags)
+
+        if self.redis_cache and self.redis_cache.available:
+            self.redis_cache.set_many(items, ttl, tags)
+        self._broadcast("evict", keys=list(items))
+
+    def invalidate_tag(self, tag: str) -> int:
+        """Delete every entry carrying tag from both caches"""
+        removed = self.memory_cache.invalidate_tag(tag)
+        keys: List[str] = []
+        if self.redis_cache:
+            keys = self.redis_cache.pop_tag(tag)
+            removed = max(removed, len(keys))
+        # L1 copies pulled from Redis carry no tags, so name their keys too
+        self._broadcast("evict", keys=keys, tags=[tag])
+        return removed
 
     def delete(self, key: str):
         """Delete from both caches"""
         self.memory_cache.delete(key)
         if self.redis_cache:
             self.redis_cache.delete(key)
+        self._broadcast("evict", keys=[key])
 
     def clear(self):
         """Clear both caches"""
         self.memory_cache.clear()
         if self.redis_cache:
             self.redis_cache.clear()
+        self._broadcast("clear")
+
+    # ---------- async API (non-blocking Redis I/O) ----------
+
+    def _async_redis(self) -> Optional[AsyncRedisCache]:
+        if self.async_redis_cache and self.async_redis_cache.available:
+            return self.async_redis_cache
+        return None
+
+    async def aget(self, key: str, namespace: Optional[str] = None) -> Optional[Any]:
+        """Get value from cache without blocking the event loop"""
+        started = time.perf_counter()
+        value = await self._aget(key)
+        self.telemetry.record_get(namespace or key_namespace(key), value is not None,
+                                  time.perf_counter() - started)
+        return value
+
+    async def _aget(self, key: str) -> Optional[Any]:
+        if self.near_cache:
+            value = self.memory_cache.get(key)
+            if value is not None:
+                return value
+
+        redis_cache = self._async_redis()
+        if redis_cache:
+            value = await redis_cache.get(key)
+            if value is not None:
+                if self.near_cache:
+                    self.memory_cache.set(key, value, self.near_cache_ttl)
+                return value
+
+        return None if self.near_cache else self.memory_cache.get(key)
+
+    async def apeek(self, key: str) -> Optional[Any]:
+        """Read key for background bookkeeping: no telemetry, hit/miss counts or L1 fill"""
+        if self.near_cache:
+            value = self.memory_cache.peek(key)
+            if value is not None:
+                return value
+
+        redis_cache = self._async_redis()
+        if redis_cache:
+            value = await redis_cache.get(key)
+            if value is not None:
+                return value
+
+        return None if self.near_cache else self.memory_cache.peek(key)
+
+    async def aset(self, key: str, value: Any, ttl: int, tags: Optional[List[str]] = None):
+        """Set value in both caches without blocking the event loop"""
+        self.memory_cache.set(key, value, self._l1_ttl(ttl), tags)
+
+        redis_cache = self._async_redis()
+        if redis_cache:
+            await redis_cache.set(key, value, ttl, tags)
+        await self._abroadcast("evict", keys=[key])
+
+    async def aget_many(self, keys: List[str], namespace: Optional[str] = None) -> Dict[str, Any]:
+        """Async get_many"""
+        started = time.perf_counter()
+        found = await self._aget_many(keys)
+        self._record_batch(keys, found, namespace, time.perf_counter() - started)
+        return found
+
+    async def _aget_many(self, keys: List[str]) -> Dict[str, Any]:
+        found: Dict[str, Any] = {}
+        if self.near_cache:
+            for key in keys:
+                value = self.memory_cache.get(key)
+                if value is not None:
+                    found[key] = value
+
+        redis_cache = self._async_redis()
+        if redis_cache:
+            remote = await redis_cache.get_many([key for key in keys if key not in found])
+            if self.near_cache:
+                for key, value in remote.items():
+                    self.memory_cache.set(key, value, self.near_cache_ttl)
+            found.update(remote)
+
+        if not self.near_cache:
+            for key in keys:
+                if key not in found:
+                    value = self.memory_cache.get(key)
+                    if value is not None:
+                        found[key] = value
+        return found
+
+    async def ainvalidate_tag(self, tag: str) -> int:
+        """Async invalidate_tag"""
+        removed = self.memory_cache.invalidate_tag(tag)
+        keys: List[str] = []
+        redis_cache = self._async_redis()
+        if redis_cache:
+            keys = await redis_cache.pop_tag(tag)
+            removed = max(removed, len(keys))
+        await self._abroadcast("evict", keys=keys, tags=[tag])
+        return removed
+
+    async def adelete(self, key: str):
+        """Async delete"""
+        self.memory_cache.delete(key)
+        redis_cache = self._async_redis()
+        if redis_cache:
+            await redis_cache.delete(key)
+        await self._abroadcast("evict", keys=[key])
+
+    async def aclear(self):
+        """Async clear"""
+        self.memory_cache.clear()
+        redis_cache = self._async_redis()
+        if redis_cache:
+            await redis_cache.clear()
+        await self._abroadcast("clear")
+
+    # ---------- stale-while-revalidate ----------
+
+    @staticmethod
+    def soft_ttl(ttl: CacheTTL) -> int:
+        """Seconds an entry in this namespace is served as fresh"""
+        return min(CACHE_SOFT_TTL.get(ttl, ttl.seconds), ttl.seconds)
+
+    async def _load_and_store(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: CacheTTL,
+                              tags: Optional[List[str]], persist: Optional[str]) -> Any:
+        namespace = key_namespace(key)
+        with _LoadTimer(self.telemetry, namespace):
+            value = await loader()
+        envelope = {"value": value, "expires_at": time.time() + self.soft_ttl(ttl), "delta": 0.0}
+        await self.aset(key, envelope, ttl.seconds, [namespace_tag(namespace), *(tags or ())])
+
+        if persist and self.durable_store is not None:
+            ticker = next((tag.split(":", 1)[1] for tag in tags or () if tag.startswith("ticker:")), None)
+            self.durable_store.put(key, envelope, ttl.seconds, persist, ticker)
+        return value
+
+    async def _revalidate(self, key: str, loader: Callable[[], Awaitable[Any]],
+                          ttl: CacheTTL, tags: Optional[List[str]], persist: Optional[str]):
+        try:
+            await self._load_and_store(key, loader, ttl, tags, persist)
+            self.background_refreshes += 1
+        except Exception as e:
+            print(f"⚠️  Background refresh failed for {key}: {str(e)}")
+        finally:
+            self._refreshing.discard(key)
+
+    async def refresh(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: CacheTTL,
+        tags: Optional[List[str]] = None,
+        persist: Optional[str] = None
+    ) -> bool:
+        """Reload key now unless a background refresh is already running for it"""
+        if key in self._refreshing:
+            return False
+        self._refreshing.add(key)
+        try:
+            await self._load_and_store(key, loader, ttl, tags, persist)
+            return True
+        finally:
+            self._refreshing.discard(key)
+
+    async def aget_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: CacheTTL,
+        tags: Optional[List[str]] = None,
+        persist: Optional[str] = None
+    ) -> Any:
+        """
+        Get key or load it with stale-while-revalidate semantics
+
+        Fresh (before soft TTL): return cached value.
+        Stale (soft < age < hard TTL): return cached value, refresh in background.
+        Missing/hard-expired: block on loader (one loader per key).
+        The key prefix is the namespace ("trading_agents:AAPL:..."), so
+        namespaces sharing a TTL duration stay distinct. With persist (an
+        analysis type), loaded values are also written behind to the
+        durable store.
+        """
+        entry = await self.aget(key)
+        if entry is not None:
+            if time.time() >= entry["expires_at"]:
+                self.stale_served += 1
+                self.telemetry.record_stale(key_namespace(key))
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    task = asyncio.create_task(self._revalidate(key, loader, ttl, tags, persist))
+                    self._background_tasks.add(task)  # keep a reference until done
+                    task.add_done_callback(self._background_tasks.discard)
+            return entry["value"]
+
+        lock = _async_locks.checkout(key)
+        try:
+            async with lock:
+                # Loaded by the caller that held the lock before us
+                entry = await self._aget(key)
+                if entry is not None:
+                    self.telemetry.record_coalesced(key_namespace(key))
+                    return entry["value"]
+                return await self._load_and_store(key, loader, ttl, tags, persist)
+        finally:
+            _async_locks.checkin(key)
 
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
         return {
             "memory_cache": self.memory_cache.get_stats(),
-            "redis_available": self.redis_cache.available if self.redis_cache else False
+            "stale_served": self.stale_served,
+            "background_refreshes": self.background_refreshes,
+            "redis_available": self.redis_cache.available if self.redis_cache else False,
+            "async_redis_available": self.async_redis_cache.available if self.async_redis_cache else False,
+            "near_cache": self.near_cache,
+            "invalidations_received": self.invalidations_received,
+            "namespaces": self.telemetry.snapshot(self.memory_cache.evictions_by_namespace)
         }
 
 
@@ -229,33 +1357,149 @@ class CacheManager:
 # Global cache instance
 # ============================================
 
-cache_manager = CacheManager(use_redis=False)  # Set to True if Redis available
+cache_manager = CacheManager(
+    use_redis=os.getenv("REDIS_ENABLED", "False").lower() == "true",
+    near_cache=CACHE_NEAR_CACHE
+)
 
 
 # ============================================
 # Decorators for automatic caching
 # ============================================
 
-def cache_result(ttl: CacheTTL):
-    """Decorator to cache function results"""
+class KeyedLocks:
+    """Per-key locks, dropped once nobody holds or waits on them"""
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._guard = threading.Lock()
+        self._locks: Dict[str, list] = {}  # key -> [lock, refcount]
+
+    def is_locked(self, key: str) -> bool:
+        with self._guard:
+            item = self._locks.get(key)
+            return item is not None and item[0].locked()
+
+    def checkout(self, key: str):
+        with self._guard:
+            item = self._locks.get(key)
+            if item is None:
+                item = self._locks[key] = [self._factory(), 0]
+            item[1] += 1
+            return item[0]
+
+    def checkin(self, key: str):
+        with self._guard:
+            item = self._locks[key]
+            item[1] -= 1
+            if item[1] == 0:
+                del self._locks[key]
+
+
+_sync_locks = KeyedLocks(threading.Lock)
+_async_locks = KeyedLocks(asyncio.Lock)
+
+
+def _needs_refresh(entry: Optional[Dict[str, Any]], beta: float, now: float) -> bool:
+    """True when the entry is missing, expired, or picked for probabilistic early refresh"""
+    if entry is None:
+        return True
+    if now >= entry["expires_at"]:
+        return True
+    if beta > 0:
+        # XFetch: recompute early with probability rising as expiry nears,
+        # scaled by how long the last computation took
+        return now - entry["delta"] * beta * math.log(random.random() or 1e-12) >= entry["expires_at"]
+    return False
+
+
+def _ticker_args(signature: inspect.Signature, args: tuple, kwargs: dict) -> List[str]:
+    """Ticker values among a call's arguments (parameters named like *ticker*, comma lists split)"""
+    try:
+        bound = signature.bind_partial(*args, **kwargs)
+    except TypeError:
+        return []
+    tickers = []
+    for name, value in bound.arguments.items():
+        if "ticker" not in name:
+            continue
+        if isinstance(value, str):
+            tickers.extend(value.split(","))
+        elif isinstance(value, (list, tuple, set)):
+            tickers.extend(v for v in value if isinstance(v, str))
+    return [t.strip() for t in tickers if t.strip()]
+
+
+def _refreshed_since(entry: Optional[Dict[str, Any]], latest: Optional[Dict[str, Any]]) -> bool:
+    """True when another caller stored a fresh entry after we read entry"""
+    if latest is None or time.time() >= latest["expires_at"]:
+        return False
+    return entry is None or latest["expires_at"] != entry["expires_at"]
+
+
+def cache_result(ttl: CacheTTL, stale_ttl: int = 0, early_refresh_beta: float = 0.0,
+                 namespace: Optional[str] = None):
+    """
+    Decorator to cache function results with stampede protection
+
+    Only one caller per key recomputes an expired entry. While it runs, other
+    callers get the stale value if it is still within stale_ttl seconds past
+    expiry, otherwise they wait for the recomputed result. With
+    early_refresh_beta > 0, hot keys are refreshed probabilistically before
+    they expire (beta=1 is the usual XFetch setting). Telemetry and the
+    namespace tag use namespace, defaulting to the TTL's name.
+    """
+    ns = namespace or namespace_name(ttl)
+
     def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        def envelope_for(result: Any, delta: float, args: tuple, kwargs: dict) -> tuple:
+            envelope = {"value": result, "expires_at": time.time() + ttl.seconds, "delta": delta}
+            tags = [namespace_tag(ns)] + [ticker_tag(t) for t in _ticker_args(signature, args, kwargs)]
+            return envelope, tags
+
+        def served_while_locked(entry: Dict[str, Any]) -> Any:
+            if time.time() >= entry["expires_at"]:
+                cache_manager.telemetry.record_stale(ns)
+            else:
+                cache_manager.telemetry.record_coalesced(ns)
+            return entry["value"]
+
         @wraps(func)
         async def async_wrapper(*args, **kwargs) -> Any:
             # Generate cache key from function name and arguments
             cache_key = generate_cache_key(func.__name__, args, kwargs)
 
             # Check cache
-            cached = cache_manager.get(cache_key)
-            if cached is not None:
-                return cached
-
-            # Call function
-            result = await func(*args, **kwargs)
-
-            # Cache result
-            cache_manager.set(cache_key, result, ttl.value)
-
-            return result
+            entry = await cache_manager.aget(cache_key, ns)
+            if not _needs_refresh(entry, early_refresh_beta, time.time()):
+                return entry["value"]
+
+            # Someone is already recomputing: serve what we have
+            if entry is not None and _async_locks.is_locked(cache_key):
+                return served_while_locked(entry)
+
+            lock = _async_locks.checkout(cache_key)
+            try:
+                async with lock:
+                    # The previous holder may have refreshed it meanwhile
+                    latest = await cache_manager._aget(cache_key)
+                    if _refreshed_since(entry, latest):
+                        cache_manager.telemetry.record_coalesced(ns)
+                        return latest["value"]
+
+                    # Call function
+                    started = time.time()
+                    with _LoadTimer(cache_manager.telemetry, ns):
+                        result = await func(*args, **kwargs)
+
+                    # Cache result
+                    envelope, tags = envelope_for(result, time.time() - started, args, kwargs)
+                    await cache_manager.aset(cache_key, envelope, ttl.seconds + stale_ttl, tags)
+                    return result
+            finally:
+                _async_locks.checkin(cache_key)
 
         @wraps(func)
         def sync_wrapper(*args, **kwargs) -> Any:
@@ -263,20 +1507,36 @@ def cache_result(ttl: CacheTTL):
             cache_key = generate_cache_key(func.__name__, args, kwargs)
 
             # Check cache
-            cached = cache_manager.get(cache_key)
-            if cached is not None:
-                return cached
-
-            # Call function
-            result = func(*args, **kwargs)
-
-            # Cache result
-            cache_manager.set(cache_key, result, ttl.value)
-
-            return result
+            entry = cache_manager.get(cache_key, ns)
+            if not _needs_refresh(entry, early_refresh_beta, time.time()):
+                return entry["value"]
+
+            # Someone is already recomputing: serve what we have
+            if entry is not None and _sync_locks.is_locked(cache_key):
+                return served_while_locked(entry)
+
+            lock = _sync_locks.checkout(cache_key)
+            try:
+                with lock:
+                    # The previous holder may have refreshed it meanwhile
+                    latest = cache_manager._get(cache_key)
+                    if _refreshed_since(entry, latest):
+                        cache_manager.telemetry.record_coalesced(ns)
+                        return latest["value"]
+
+                    # Call function
+                    started = time.time()
+                    with _LoadTimer(cache_manager.telemetry, ns):
+                        result = func(*args, **kwargs)
+
+                    # Cache result
+                    envelope, tags = envelope_for(result, time.time() - started, args, kwargs)
+                    cache_manager.set(cache_key, envelope, ttl.seconds + stale_ttl, tags)
+                    return result
+            finally:
+                _sync_locks.checkin(cache_key)
 
         # Return appropriate wrapper
-        import inspect
         if inspect.iscoroutinefunction(func):
             return async_wrapper
         else:
@@ -298,31 +1558,205 @@ def generate_cache_key(func_name: str, args: tuple, kwargs: dict) -> str:
     }
 
     key_string = json.dumps(key_data, sort_keys=True)
-    return hashlib.md5(key_string.encode()).hexdigest()
+    return f"{func_name}:{hashlib.md5(key_string.encode()).hexdigest()}"
+
+
+def invalidate_ticker_cache(ticker: str) -> int:
+    """Invalidate all cache entries for a specific ticker, including its stored bars"""
+    # Imported lazily: bar_store depends on market_data, which imports this module
+    from bar_store import bar_store
+
+    removed = cache_manager.invalidate_tag(ticker_tag(ticker))
+    bar_store.invalidate(ticker)
+    print(f"✅ Cache invalidated for {ticker} ({removed} entries)")
+    return removed
+
 
+def invalidate_namespace_cache(namespace: Union[CacheTTL, str]) -> int:
+    """Invalidate all cache entries in a namespace"""
+    return cache_manager.invalidate_tag(namespace_tag(namespace))
+
+
+# ============================================
+# Access-driven prefetcher
+# ============================================
 
-def invalidate_ticker_cache(ticker: str):
-    """Invalidate all cache entries for a specific ticker"""
-    patterns = [
-        f"stock_price_{ticker}",
-        f"fundamental_{ticker}",
-        f"technical_{ticker}",
-        f"ai_report_{ticker}",
-        f"news_{ticker}",
-        f"trading_agents_{ticker}"
-    ]
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "True").lower() == "true"
+PREFETCH_TOP_N = int(os.getenv("PREFETCH_TOP_N", "50"))
+PREFETCH_INTERVAL = float(os.getenv("PREFETCH_INTERVAL", "15"))
+PREFETCH_LEAD_SECONDS = float(os.getenv("PREFETCH_LEAD_SECONDS", "30"))
+PREFETCH_BUDGET_PER_MINUTE = int(os.getenv("PREFETCH_BUDGET_PER_MINUTE", "60"))
+PREFETCH_HALF_LIFE = float(os.getenv("PREFETCH_HALF_LIFE", "3600"))
+PREFETCH_SEED_TICKERS = [
+    t.strip().upper() for t in os.getenv("PREFETCH_SEED_TICKERS", "").split(",") if t.strip()
+]
+
+
+class _PrefetchTarget:
+    """How to rebuild one endpoint's cache entry for a ticker"""
+
+    def __init__(self, loader: Callable[[str], Awaitable[Any]], key: Callable[[str], str],
+                 ttl: CacheTTL, persist: Optional[str]):
+        self.loader = loader
+        self.key = key
+        self.ttl = ttl
+        self.persist = persist
+
+
+class Prefetcher:
+    """
+    Refresh the most requested (endpoint, ticker) entries before they expire
+
+    Access counts decay with a half-life so the hot set follows current
+    traffic. Each cycle, entries of the top-N hot set that are missing or
+    within lead_seconds of their soft expiry are reloaded, spending at most
+    budget_per_minute upstream loads (token bucket). Counts are snapshotted
+    to the cache so a restart with Redis can warm the same hot set.
+    """
+
+    COUNTS_KEY = "prefetch:access_counts"
+
+    def __init__(
+        self,
+        manager: CacheManager,
+        top_n: int = PREFETCH_TOP_N,
+        interval: float = PREFETCH_INTERVAL,
+        lead_seconds: float = PREFETCH_LEAD_SECONDS,
+        budget_per_minute: int = PREFETCH_BUDGET_PER_MINUTE,
+        half_life: float = PREFETCH_HALF_LIFE
+    ):
+        self.manager = manager
+        self.top_n = top_n
+        self.interval = interval
+        self.lead_seconds = lead_seconds
+        self.budget_per_minute = budget_per_minute
+        self.half_life = half_life
+        self._targets: Dict[str, _PrefetchTarget] = {}
+        self._counts: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        self._decayed_at = time.monotonic()
+        self._tokens = float(budget_per_minute)
+        self._tokens_at = time.monotonic()
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.skipped_budget = 0
+
+    def register(self, endpoint: str, loader: Callable[[str], Awaitable[Any]],
+                 key: Callable[[str], str], ttl: CacheTTL, persist: Optional[str] = None):
+        """Make endpoint prefetchable: loader(ticker) rebuilds the value stored at key(ticker)"""
+        self._targets[endpoint] = _PrefetchTarget(loader, key, ttl, persist)
+
+    def record_access(self, endpoint: str, ticker: str):
+        """Count one request for (endpoint, ticker)"""
+        with self._lock:
+            item = (endpoint, ticker.upper())
+            self._counts[item] = self._counts.get(item, 0.0) + 1.0
+
+    def _decay(self):
+        now = time.monotonic()
+        factor = 0.5 ** ((now - self._decayed_at) / self.half_life)
+        self._decayed_at = now
+        self._counts = {item: count * factor for item, count in self._counts.items() if count * factor >= 0.01}
+
+    def hot_set(self, n: Optional[int] = None) -> List[tuple]:
+        """Top-n prefetchable (endpoint, ticker) pairs by decayed access count"""
+        with self._lock:
+            self._decay()
+            candidates = [(count, item) for item, count in self._counts.items() if item[0] in self._targets]
+        return [item for _, item in heapq.nlargest(n or self.top_n, candidates)]
+
+    def _take_token(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(
+            float(self.budget_per_minute),
+            self._tokens + (now - self._tokens_at) * self.budget_per_minute / 60.0
+        )
+        self._tokens_at = now
+        if self._tokens < 1.0:
+            return False
+        self._tokens -= 1.0
+        return True
+
+    async def _refresh(self, endpoint: str, ticker: str) -> bool:
+        target = self._targets[endpoint]
+        try:
+            await self.manager.refresh(
+                target.key(ticker),
+                lambda: target.loader(ticker),
+                target.ttl,
+                tags=[ticker_tag(ticker)],
+                persist=target.persist
+            )
+            self.refreshes += 1
+            return True
+        except Exception as e:
+            self.refresh_errors += 1
+            print(f"⚠️  Prefetch failed for {endpoint}/{ticker}: {str(e)}")
+            return False
+
+    async def refresh_due(self) -> int:
+        """Reload hot entries that are missing or about to expire, returns loads done"""
+        done = 0
+        deadline = time.time() + self.lead_seconds
+        for endpoint, ticker in self.hot_set():
+            entry = await self.manager.apeek(self._targets[endpoint].key(ticker))
+            if entry is not None and entry["expires_at"] > deadline:
+                continue
+            if not self._take_token():
+                self.skipped_budget += 1
+                break
+            done += await self._refresh(endpoint, ticker)
+        return done
+
+    async def warm(self) -> int:
+        """Load the hot set (snapshot from the last run, else seed tickers) into the cache"""
+        snapshot = await self.manager.apeek(self.COUNTS_KEY)
+        with self._lock:
+            for endpoint, ticker, count in snapshot or ():
+                self._counts[(endpoint, ticker)] = max(self._counts.get((endpoint, ticker), 0.0), count)
+            if not self._counts:
+                for ticker in PREFETCH_SEED_TICKERS:
+                    for endpoint in self._targets:
+                        self._counts[(endpoint, ticker)] = 1.0
+        return await self.refresh_due()
+
+    async def snapshot(self):
+        """Store current counts so the next process can warm the same hot set"""
+        with self._lock:
+            counts = [[endpoint, ticker, count] for (endpoint, ticker), count in self._counts.items()]
+        await self.manager.aset(self.COUNTS_KEY, counts, CacheTTL.MACRO_DATA.seconds)
+
+    async def run(self):
+        """Prefetch loop: refresh due entries every interval"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh_due()
+                await self.snapshot()
+            except Exception as e:
+                print(f"⚠️  Prefetch cycle failed: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get prefetch statistics"""
+        return {
+            "tracked": len(self._counts),
+            "hot_set": [f"{endpoint}:{ticker}" for endpoint, ticker in self.hot_set()],
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "skipped_budget": self.skipped_budget,
+            "budget_per_minute": self.budget_per_minute
+        }
 
-    for pattern in patterns:
-        cache_manager.delete(pattern)
 
-    print(f"✅ Cache invalidated for {ticker}")
+prefetcher = Prefetcher(cache_manager)
 
 
-def cache_warmup():
+async def cache_warmup() -> int:
     """Pre-populate cache with frequently accessed data"""
     print("🔥 Warming up cache...")
-    # This can be called on startup to pre-populate common requests
-    # Implementation depends on your specific use case
+    loaded = await prefetcher.warm()
+    print(f"✅ Cache warmed ({loaded} entries)")
+    return loaded
 
 
 # ============================================
@@ -331,17 +1765,84 @@ def cache_warmup():
 
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+    strip_weak = lambda tag: tag[2:] if tag.startswith("W/") else tag
+    return strip_weak(etag) in {strip_weak(tag) for tag in candidates}
 
 
 class CacheMiddleware(BaseHTTPMiddleware):
-    """Middleware to cache GET requests"""
+    """Middleware to cache GET responses with ETag / If-None-Match support"""
 
-    CACHEABLE_PATHS = [
-        "/api/stock/",
-        "/api/fundamental/",
-        "/api/technical/",
-        "/api/news/"
-    ]
+    CACHEABLE_PATHS = {
+        "/api/stock/": CacheTTL.STOCK_PRICE,
+        "/api/fundamental/": CacheTTL.FUNDAMENTAL,
+        "/api/technical/": CacheTTL.TECHNICAL,
+        "/api/news/": CacheTTL.NEWS
+    }
+
+    # Recomputed by Response from the cached body
+    EXCLUDED_HEADERS = {"content-length", "etag", "x-cache"}
+
+    @classmethod
+    def ttl_for(cls, path: str) -> Optional[CacheTTL]:
+        """Return the TTL of the longest cacheable prefix matching path"""
+        matches = [prefix for prefix in cls.CACHEABLE_PATHS if path.startswith(prefix)]
+        if not matches:
+            return None
+        return cls.CACHEABLE_PATHS[max(matches, key=len)]
+
+    # Literal path segments that sit where a ticker would
+    NON_TICKER_SEGMENTS = {"batch"}
+
+    @classmethod
+    def ticker_for(cls, path: str) -> Optional[str]:
+        """Ticker path segment following the cacheable prefix, if any"""
+        prefix = max((p for p in cls.CACHEABLE_PATHS if path.startswith(p)), key=len, default=None)
+        if prefix is None:
+            return None
+        segment = path[len(prefix):].split("/", 1)[0]
+        if segment in cls.NON_TICKER_SEGMENTS:
+            return None
+        return segment or None
+
+    @classmethod
+    def tickers_for(cls, request: Request) -> List[str]:
+        """Every ticker a response covers: the path ticker, or a batch's tickers query"""
+        ticker = cls.ticker_for(request.url.path)
+        if ticker:
+            return [ticker]
+        return [t.strip() for t in request.query_params.get("tickers", "").split(",") if t.strip()]
+
+    @classmethod
+    def endpoint_for(cls, path: str) -> str:
+        """Endpoint name of a cacheable path ("/api/stock/AAPL" -> "stock")"""
+        prefix = max((p for p in cls.CACHEABLE_PATHS if path.startswith(p)), key=len)
+        return prefix.strip("/").split("/")[-1]
+
+    @staticmethod
+    def _not_modified(etag: str) -> Response:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    @staticmethod
+    def _from_cache(entry: Dict[str, Any], cache_status: str) -> Response:
+        response = Response(
+            content=entry["body"],
+            status_code=entry["status"],
+            headers=dict(entry["headers"])
+        )
+        response.headers["ETag"] = entry["etag"]
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Cache"] = cache_status
+        return response
 
     async def dispatch(self, request: Request, call_next):
         # Only cache GET requests
@@ -349,28 +1850,46 @@ class CacheMiddleware(BaseHTTPMiddleware):
             return await call_next(request)
 
         # Check if path is cacheable
-        is_cacheable = any(
-            request.url.path.startswith(path)
-            for path in self.CACHEABLE_PATHS
-        )
-
-        if not is_cacheable:
+        ttl = self.ttl_for(request.url.path)
+        if ttl is None:
             return await call_next(request)
 
+        ticker = self.ticker_for(request.url.path)
+        if ticker:
+            prefetcher.record_access(self.endpoint_for(request.url.path), ticker)
+
         # Generate cache key
         cache_key = f"http_{request.url.path}_{request.url.query}"
+        if_none_match = request.headers.get("if-none-match")
 
         # Check cache
-        cached_response = cache_manager.get(cache_key)
-        if cached_response:
-            return cached_response
+        cached = await cache_manager.aget(cache_key, f"http:{namespace_name(ttl)}")
+        if cached is not None:
+            if _etag_matches(if_none_match, cached["etag"]):
+                return self._not_modified(cached["etag"])
+            return self._from_cache(cached, "HIT")
 
         # Call endpoint
         response = await call_next(request)
 
         # Only cache successful responses
-        if response.status_code == 200:
-            # Note: This is simplified - real implementation needs to handle response body
-            cache_manager.set(cache_key, response, CacheTTL.STOCK_PRICE.value)
+        if response.status_code != 200:
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        entry = {
+            "status": response.status_code,
+            "headers": [
+                (name, value) for name, value in response.headers.items()
+                if name.lower() not in self.EXCLUDED_HEADERS
+            ],
+            "body": body,
+            "etag": f'"{hashlib.sha1(body).hexdigest()}"'
+        }
+        # Soft TTL so stale-while-revalidate namespaces reach the handler after it
+        tags = [namespace_tag(ttl)] + [ticker_tag(t) for t in self.tickers_for(request)]
+        await cache_manager.aset(cache_key, entry, cache_manager.soft_ttl(ttl), tags)
 
-        return response
+        if _etag_matches(if_none_match, entry["etag"]):
+            return self._not_modified(entry["etag"])
+        return self._from_cache(entry, "MISS")
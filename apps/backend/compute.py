@@ -0,0 +1,91 @@
+"""
+CPU-bound work executor
+Indicator passes and backtests run on their own thread pool so long
+computations neither occupy upstream I/O workers nor inherit the upstream
+timeout; NumPy releases the GIL inside its array kernels
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+COMPUTE_MAX_WORKERS = int(os.getenv("COMPUTE_MAX_WORKERS", str(os.cpu_count() or 1)))
+
+
+class ComputeExecutor:
+    """Thread pool for CPU-bound calls, with utilization statistics"""
+
+    def __init__(self, max_workers: int = COMPUTE_MAX_WORKERS):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="compute")
+        self._lock = threading.Lock()
+
+        self.pending = 0  # submitted and not yet finished (queued + running)
+        self.active = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+
+    def _invoke(self, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        """Run fn on a worker thread, tracking busy time"""
+        started = time.monotonic()
+        with self._lock:
+            self.active += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.busy_seconds += time.monotonic() - started
+
+    def _on_done(self, future):
+        with self._lock:
+            self.pending -= 1
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Await fn(*args, **kwargs) on the pool without blocking the event loop"""
+        with self._lock:
+            self.pending += 1
+            self.submitted += 1
+        try:
+            future = self._pool.submit(self._invoke, fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self.pending -= 1
+            raise
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool utilization statistics"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "active": self.active,
+                "queued": max(self.pending - self.active, 0),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "busy_seconds": self.busy_seconds
+            }
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting work and release worker threads"""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+# ============================================
+# Global compute executor instance
+# ============================================
+
+compute_executor = ComputeExecutor()
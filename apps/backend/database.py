@@ -5,7 +5,9 @@ Database initialization and session management
 from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
+from contextlib import nullcontext
 import os
+import threading
 from typing import Generator
 
 from models import Base, DatabaseConfig
@@ -49,6 +51,10 @@ Base.metadata.create_all(bind=engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Every SQLite session shares one connection (StaticPool), so stores that open
+# sessions from worker threads hold this lock; PostgreSQL pools real connections
+session_lock = nullcontext() if "postgresql" in DATABASE_URL else threading.Lock()
+
 
 # ============================================
 # Dependency Injection
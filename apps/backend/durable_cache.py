@@ -0,0 +1,208 @@
+"""
+Durable cache tier backed by the AnalysisCache table
+Expensive results (AI reports, TradingAgents runs, fundamentals) are
+written behind in batches and preloaded into the cache on startup,
+so a restart does not begin cold
+"""
+
+import asyncio
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from cache import CacheManager, namespace_tag, ticker_tag
+
+DURABLE_CACHE_ENABLED = os.getenv("ENABLE_DATABASE_PERSISTENCE", "True").lower() == "true"
+DURABLE_CACHE_FLUSH_SECONDS = float(os.getenv("DURABLE_CACHE_FLUSH_SECONDS", "5"))
+DURABLE_CACHE_BATCH_SIZE = int(os.getenv("DURABLE_CACHE_BATCH_SIZE", "100"))
+DURABLE_CACHE_PURGE_SECONDS = int(os.getenv("DURABLE_CACHE_PURGE_SECONDS", "3600"))
+
+# Analysis types double as the cache namespaces they are preloaded into
+DURABLE_ANALYSIS_TYPES = ("ai_report", "trading_agents", "fundamental")
+
+
+def _default_session_factory():
+    # Imported lazily: database creates the engine and tables on import
+    from database import SessionLocal
+    return SessionLocal()
+
+
+def _default_session_lock():
+    # Shared by every store on SessionLocal (see database.session_lock)
+    from database import session_lock
+    return session_lock
+
+
+class DurableCache:
+    """Write-behind persistence of cache entries to the analysis_cache table"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Any] = _default_session_factory,
+        batch_size: int = DURABLE_CACHE_BATCH_SIZE,
+        flush_interval: float = DURABLE_CACHE_FLUSH_SECONDS,
+        purge_interval: int = DURABLE_CACHE_PURGE_SECONDS,
+        session_lock: Callable[[], Any] = _default_session_lock
+    ):
+        self.session_factory = session_factory
+        self.session_lock = session_lock
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.purge_interval = purge_interval
+        self._pending: Dict[str, Dict[str, Any]] = {}  # cache_key -> row values, last write wins
+        self._lock = threading.Lock()
+        self._flush_needed = asyncio.Event()
+        self.rows_written = 0
+        self.batches_written = 0
+        self.rows_preloaded = 0
+        self.rows_purged = 0
+        self.write_errors = 0
+
+    def put(self, key: str, value: Any, ttl: int, analysis_type: str, ticker: Optional[str] = None):
+        """Queue an entry for the next batch write"""
+        now = datetime.utcnow()
+        with self._lock:
+            self._pending[key] = {
+                "cache_key": key,
+                "ticker": ticker.upper() if ticker else None,
+                "analysis_type": analysis_type,
+                "data": value,
+                "ttl": ttl,
+                "created_at": now,
+                "expires_at": now + timedelta(seconds=ttl)
+            }
+            if len(self._pending) >= self.batch_size:
+                self._flush_needed.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """Upsert all queued entries in one transaction, returns rows written"""
+        from models import AnalysisCache
+
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+
+        with self.session_lock():
+            db = self.session_factory()
+            try:
+                existing = {
+                    row.cache_key: row
+                    for row in db.query(AnalysisCache).filter(AnalysisCache.cache_key.in_(list(batch)))
+                }
+                for key, values in batch.items():
+                    row = existing.get(key)
+                    if row is None:
+                        db.add(AnalysisCache(**values))
+                    else:
+                        for column, value in values.items():
+                            setattr(row, column, value)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                self.write_errors += 1
+                # Requeue unless a newer write for the key arrived meanwhile
+                with self._lock:
+                    for key, values in batch.items():
+                        self._pending.setdefault(key, values)
+                print(f"⚠️  Durable cache write failed: {str(e)}")
+                return 0
+            finally:
+                db.close()
+
+        self.rows_written += len(batch)
+        self.batches_written += 1
+        return len(batch)
+
+    def preload(self, manager: CacheManager) -> int:
+        """Load unexpired rows into the cache, returns rows loaded"""
+        from models import AnalysisCache
+
+        now = datetime.utcnow()
+        with self.session_lock():
+            db = self.session_factory()
+            try:
+                rows = (
+                    db.query(AnalysisCache)
+                    .filter(AnalysisCache.expires_at > now)
+                    .filter(AnalysisCache.analysis_type.in_(DURABLE_ANALYSIS_TYPES))
+                    .all()
+                )
+                for row in rows:
+                    remaining = int((row.expires_at - now).total_seconds())
+                    if remaining <= 0:
+                        continue
+                    tags = [namespace_tag(row.analysis_type)]
+                    if row.ticker:
+                        tags.append(ticker_tag(row.ticker))
+                    manager.set(row.cache_key, row.data, remaining, tags)
+            finally:
+                db.close()
+
+        self.rows_preloaded += len(rows)
+        return len(rows)
+
+    def purge_expired(self) -> int:
+        """Bulk delete expired rows (uses the expires_at index)"""
+        from models import AnalysisCache
+
+        with self.session_lock():
+            db = self.session_factory()
+            try:
+                removed = (
+                    db.query(AnalysisCache)
+                    .filter(AnalysisCache.expires_at <= datetime.utcnow())
+                    .delete(synchronize_session=False)
+                )
+                db.commit()
+            finally:
+                db.close()
+
+        self.rows_purged += removed
+        return removed
+
+    async def run_writer(self):
+        """Flush queued entries every flush_interval (or when a batch fills) and purge hourly"""
+        loop = asyncio.get_running_loop()
+        last_purge = loop.time()
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._flush_needed.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._flush_needed.clear()
+
+                try:
+                    await asyncio.to_thread(self.flush)
+                    if loop.time() - last_purge >= self.purge_interval:
+                        await asyncio.to_thread(self.purge_expired)
+                        last_purge = loop.time()
+                except Exception as e:
+                    print(f"⚠️  Durable cache writer error: {str(e)}")
+        finally:
+            # Don't lose the last batch on shutdown
+            self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get write-behind statistics"""
+        return {
+            "pending": self.pending(),
+            "rows_written": self.rows_written,
+            "batches_written": self.batches_written,
+            "rows_preloaded": self.rows_preloaded,
+            "rows_purged": self.rows_purged,
+            "write_errors": self.write_errors
+        }
+
+
+# ============================================
+# Global durable cache instance
+# ============================================
+
+durable_cache = DurableCache()
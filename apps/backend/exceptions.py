@@ -109,6 +109,30 @@ class RateLimitError(NexusAlphaException):
         )
 
 
+class UpstreamTimeoutError(NexusAlphaException):
+    """Upstream data source did not respond in time"""
+
+    def __init__(self, service: str = "Upstream", timeout: Optional[float] = None):
+        super().__init__(
+            message=f"{service} request timed out after {timeout}s",
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            error_code="UPSTREAM_TIMEOUT",
+            details={"service": service, "timeout": timeout}
+        )
+
+
+class UpstreamBusyError(NexusAlphaException):
+    """Too many upstream requests queued"""
+
+    def __init__(self, service: str = "Upstream", max_queue: Optional[int] = None):
+        super().__init__(
+            message=f"{service} request queue is full. Please try again later.",
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            error_code="UPSTREAM_BUSY",
+            details={"service": service, "max_queue": max_queue}
+        )
+
+
 class ValidationError(NexusAlphaException):
     """Data validation error"""
 
@@ -3,29 +3,76 @@ Extended API Endpoints for Advanced Features
 포트폴리오, 알림, 비교, 예측, 감정, 차트, 백테스팅
 """
 
+import asyncio
+import os
+from typing import Dict, List, Optional
+
 from fastapi import FastAPI, HTTPException
 from features import (
     portfolio_manager, alert_manager,
     Position, Portfolio, PriceAlert,
     StockComparison, SentimentAnalysis, PricePrediction,
-    ChartData, BacktestResult,
+    ChartData, BacktestResult, SweepResult,
+    PortfolioBacktestRequest, PortfolioBacktestResult, WalkForwardResult,
+    StrategyInfo, StrategyBacktestRequest,
     compare_stocks, analyze_sentiment, predict_stock_price,
-    get_chart_data, backtest_simple_ma_strategy
+    get_chart_data, backtest_simple_ma_strategy, backtest_ma_sweep, backtest_portfolio,
+    backtest_walk_forward, list_strategies, backtest_registered_strategy
+)
+from market_data import market_data, upstream_executor
+from compute import compute_executor
+from bar_store import INTERVALS, TICKER_PATTERN, bar_store, period_start
+from backtest import (
+    RANK_METRICS, REBALANCE_FREQUENCIES, SWEEP_MAX_PAIRS, shutdown_process_pool, warm_process_pool
 )
+from exceptions import InvalidParameterError, NexusAlphaException
+from strategies import STRATEGIES, resolve_params
+
+MAX_PORTFOLIO_TICKERS = int(os.getenv("MAX_PORTFOLIO_TICKERS", "500"))
 
 def setup_extended_endpoints(app: FastAPI):
     """Setup all extended endpoints"""
 
+    background_tasks = []
+
+    @app.on_event("startup")
+    async def start_alert_scheduler():
+        background_tasks.append(asyncio.create_task(alert_manager.run_scheduler()))
+
+    @app.on_event("startup")
+    async def start_backtest_workers():
+        # Spawning worker processes takes about a second; pay it before the first sweep
+        background_tasks.append(asyncio.create_task(asyncio.to_thread(warm_process_pool)))
+
+    @app.on_event("shutdown")
+    async def stop_alert_scheduler():
+        for task in background_tasks:
+            task.cancel()
+        shutdown_process_pool()
+
     # ============================================
     # 1. Portfolio Management (포트폴리오)
     # ============================================
 
+    @app.get("/api/portfolios/value", response_model=Dict[str, Portfolio])
+    async def get_portfolios_value(user_ids: Optional[str] = None):
+        """Value many users' portfolios against one price snapshot (comma-separated user_ids, default all)"""
+        try:
+            ids = [u.strip() for u in user_ids.split(",") if u.strip()] if user_ids else None
+            return await upstream_executor.run(portfolio_manager.get_portfolio_values, ids)
+        except NexusAlphaException as e:
+            raise e.to_http_exception()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
     @app.get("/api/portfolio/{user_id}", response_model=Portfolio)
     async def get_portfolio(user_id: str):
         """Get user portfolio with current values"""
         try:
-            portfolio = portfolio_manager.get_portfolio_value(user_id)
+            portfolio = await upstream_executor.run(portfolio_manager.get_portfolio_value, user_id)
             return portfolio
+        except NexusAlphaException as e:
+            raise e.to_http_exception()
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -75,11 +122,13 @@ def setup_extended_endpoints(app: FastAPI):
     async def check_alerts(user_id: str):
         """Check triggered alerts"""
         try:
-            triggered = alert_manager.check_alerts(user_id)
+            triggered = await upstream_executor.run(alert_manager.check_alerts, user_id)
             return {
                 "triggered_count": len(triggered),
                 "alerts": triggered
             }
+        except NexusAlphaException as e:
+            raise e.to_http_exception()
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -91,8 +140,10 @@ def setup_extended_endpoints(app: FastAPI):
     async def compare_two_stocks(ticker1: str, ticker2: str):
         """Compare two stocks"""
         try:
-            result = compare_stocks(ticker1, ticker2)
+            result = await upstream_executor.run(compare_stocks, ticker1, ticker2)
             return result
+        except NexusAlphaException as e:
+            raise e.to_http_exception()
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -104,8 +155,10 @@ def setup_extended_endpoints(app: FastAPI):
     async def get_sentiment(ticker: str):
         """Get market sentiment analysis for a stock"""
         try:
-            sentiment = analyze_sentiment(ticker)
+            sentiment = await upstream_executor.run(analyze_sentiment, ticker)
             return sentiment
+        except NexusAlphaException as e:
+            raise e.to_http_exception()
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -117,8 +170,10 @@ def setup_extended_endpoints(app: FastAPI):
     async def predict_price(ticker: str):
         """Get price prediction for a stock"""
         try:
-            prediction = predict_stock_price(ticker)
+            prediction = await upstream_executor.run(predict_stock_price, ticker)
             return prediction
+        except NexusAlphaException as e:
+            raise e.to_http_exception()
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -130,8 +185,14 @@ def setup_extended_endpoints(app: FastAPI):
     async def get_chart(ticker: str, interval: str = "1d", period: str = "3mo"):
         """Get chart data for visualization"""
         try:
-            chart = get_chart_data(ticker, interval, period)
+            if interval not in INTERVALS:
+                raise InvalidParameterError("interval", f"Must be one of: {', '.join(INTERVALS)}")
+            if not TICKER_PATTERN.match(ticker.upper()):
+                raise InvalidParameterError("ticker", "Not a valid ticker symbol")
+            chart = await upstream_executor.run(get_chart_data, ticker, interval, period)
             return chart
+        except NexusAlphaException as e:
+            raise e.to_http_exception()
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -139,6 +200,88 @@ def setup_extended_endpoints(app: FastAPI):
     # 7. Backtesting (백테스팅)
     # ============================================
 
+    @app.post("/api/backtest/portfolio", response_model=PortfolioBacktestResult)
+    async def backtest_portfolio_strategy(request: PortfolioBacktestRequest):
+        """Run the moving average strategy across a weighted, rebalanced basket"""
+        try:
+            # Normalized once; weights stay aligned with this list from here on
+            tickers = [t.strip().upper() for t in request.tickers]
+            if not tickers:
+                raise InvalidParameterError("tickers", "At least one ticker is required")
+            if not all(tickers):
+                raise InvalidParameterError("tickers", "Blank ticker")
+            if len(tickers) > MAX_PORTFOLIO_TICKERS:
+                raise InvalidParameterError("tickers", f"At most {MAX_PORTFOLIO_TICKERS} tickers per portfolio")
+            if len(set(tickers)) != len(tickers):
+                raise InvalidParameterError("tickers", "Duplicate tickers")
+            if request.weights is not None:
+                if len(request.weights) != len(tickers):
+                    raise InvalidParameterError("weights", "Must have one weight per ticker")
+                if any(w < 0 for w in request.weights) or sum(request.weights) <= 0:
+                    raise InvalidParameterError("weights", "Must be non-negative with a positive sum")
+            if request.rebalance not in REBALANCE_FREQUENCIES:
+                raise InvalidParameterError("rebalance", f"Must be one of: {', '.join(REBALANCE_FREQUENCIES)}")
+            if request.fast_period < 1 or request.slow_period < 1:
+                raise InvalidParameterError("fast_period/slow_period", "Must be at least 1")
+            try:
+                period_start(request.period)
+            except ValueError as e:
+                raise InvalidParameterError("period", str(e))
+            request = request.model_copy(update={"tickers": tickers})
+
+            # Load every history once, within the upstream pool's capacity
+            slots = asyncio.Semaphore(upstream_executor.max_workers)
+
+            async def load(symbol: str):
+                async with slots:
+                    return await upstream_executor.run(bar_store.get_history, symbol, request.period)
+
+            histories = await asyncio.gather(*[load(symbol) for symbol in tickers], return_exceptions=True)
+            closes = {
+                symbol: hist['Close']
+                for symbol, hist in zip(tickers, histories)
+                if not isinstance(hist, Exception) and not hist.empty
+            }
+
+            result = await compute_executor.run(backtest_portfolio, request, closes)
+            return result
+        except NexusAlphaException as e:
+            raise e.to_http_exception()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @app.post("/api/backtest/{strategy}", response_model=BacktestResult)
+    async def backtest_named_strategy(strategy: str, request: StrategyBacktestRequest):
+        """Run a registered strategy (see /api/backtest/strategies) on one ticker"""
+        try:
+            if strategy not in STRATEGIES:
+                raise InvalidParameterError("strategy", f"Must be one of: {', '.join(STRATEGIES)}")
+            try:
+                resolve_params(STRATEGIES[strategy], request.params)
+            except ValueError as e:
+                raise InvalidParameterError("params", str(e))
+            try:
+                period_start(request.period)
+            except ValueError as e:
+                raise InvalidParameterError("period", str(e))
+            ticker = request.ticker.strip().upper()
+            if not ticker:
+                raise InvalidParameterError("ticker", "Ticker is required")
+            request = request.model_copy(update={"ticker": ticker})
+
+            hist = await upstream_executor.run(bar_store.get_history, ticker, request.period)
+            result = await compute_executor.run(backtest_registered_strategy, strategy, request, hist)
+            return result
+        except NexusAlphaException as e:
+            raise e.to_http_exception()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @app.get("/api/backtest/strategies", response_model=List[StrategyInfo])
+    async def get_backtest_strategies():
+        """Registered backtest strategies and their default parameters"""
+        return list_strategies()
+
     @app.get("/api/backtest/{ticker}", response_model=BacktestResult)
     async def backtest_strategy(
         ticker: str,
@@ -148,13 +291,117 @@ def setup_extended_endpoints(app: FastAPI):
     ):
         """Run backtesting on moving average strategy"""
         try:
-            result = backtest_simple_ma_strategy(
+            hist = await upstream_executor.run(bar_store.get_history, ticker, "2y")
+            result = await compute_executor.run(
+                backtest_simple_ma_strategy,
                 ticker,
+                hist,
                 initial_capital,
                 fast_period,
                 slow_period
             )
             return result
+        except NexusAlphaException as e:
+            raise e.to_http_exception()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    def period_range(name: str, start: int, stop: int, step: int) -> List[int]:
+        """Inclusive integer range for a sweep parameter"""
+        if start < 1 or step < 1 or stop < start:
+            raise InvalidParameterError(name, "Expected 1 <= min <= max and step >= 1")
+        return list(range(start, stop + 1, step))
+
+    @app.get("/api/backtest/{ticker}/sweep", response_model=SweepResult)
+    async def backtest_sweep(
+        ticker: str,
+        fast_min: int = 5,
+        fast_max: int = 50,
+        fast_step: int = 5,
+        slow_min: int = 20,
+        slow_max: int = 200,
+        slow_step: int = 10,
+        initial_capital: float = 10000,
+        top_k: int = 10,
+        rank_by: str = "sharpe_ratio"
+    ):
+        """Run the moving average strategy over a grid of fast/slow periods"""
+        try:
+            fast_periods = period_range("fast", fast_min, fast_max, fast_step)
+            slow_periods = period_range("slow", slow_min, slow_max, slow_step)
+            if len(fast_periods) * len(slow_periods) > SWEEP_MAX_PAIRS:
+                raise InvalidParameterError("fast/slow", f"At most {SWEEP_MAX_PAIRS} parameter pairs per sweep")
+            if rank_by not in RANK_METRICS:
+                raise InvalidParameterError("rank_by", f"Must be one of: {', '.join(RANK_METRICS)}")
+            if top_k < 1:
+                raise InvalidParameterError("top_k", "Must be at least 1")
+
+            hist = await upstream_executor.run(bar_store.get_history, ticker, "2y")
+            result = await compute_executor.run(
+                backtest_ma_sweep,
+                ticker,
+                hist,
+                fast_periods,
+                slow_periods,
+                initial_capital,
+                top_k,
+                rank_by
+            )
+            return result
+        except NexusAlphaException as e:
+            raise e.to_http_exception()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @app.get("/api/backtest/{ticker}/walk-forward", response_model=WalkForwardResult)
+    async def backtest_walk_forward_strategy(
+        ticker: str,
+        fast_min: int = 5,
+        fast_max: int = 50,
+        fast_step: int = 5,
+        slow_min: int = 20,
+        slow_max: int = 200,
+        slow_step: int = 10,
+        train_bars: int = 252,
+        test_bars: int = 63,
+        anchored: bool = False,
+        initial_capital: float = 10000,
+        rank_by: str = "sharpe_ratio",
+        period: str = "5y"
+    ):
+        """Optimize the moving average periods on rolling train windows and test out of sample"""
+        try:
+            fast_periods = period_range("fast", fast_min, fast_max, fast_step)
+            slow_periods = period_range("slow", slow_min, slow_max, slow_step)
+            if len(fast_periods) * len(slow_periods) > SWEEP_MAX_PAIRS:
+                raise InvalidParameterError("fast/slow", f"At most {SWEEP_MAX_PAIRS} parameter pairs per sweep")
+            if fast_periods[0] >= slow_periods[-1]:
+                raise InvalidParameterError("fast/slow", "No fast period is shorter than a slow period")
+            if rank_by not in RANK_METRICS:
+                raise InvalidParameterError("rank_by", f"Must be one of: {', '.join(RANK_METRICS)}")
+            if train_bars < 2 or test_bars < 1:
+                raise InvalidParameterError("train_bars/test_bars", "Expected train_bars >= 2 and test_bars >= 1")
+            try:
+                period_start(period)
+            except ValueError as e:
+                raise InvalidParameterError("period", str(e))
+
+            hist = await upstream_executor.run(bar_store.get_history, ticker, period)
+            result = await compute_executor.run(
+                backtest_walk_forward,
+                ticker,
+                hist,
+                fast_periods,
+                slow_periods,
+                train_bars,
+                test_bars,
+                anchored,
+                initial_capital,
+                rank_by
+            )
+            return result
+        except NexusAlphaException as e:
+            raise e.to_http_exception()
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -166,9 +413,7 @@ def setup_extended_endpoints(app: FastAPI):
     async def get_news_summary(ticker: str):
         """Get news summary and analysis"""
         try:
-            import yfinance as yf
-            stock = yf.Ticker(ticker)
-            news = stock.news
+            news = await upstream_executor.run(market_data.get_news, ticker)
 
             summary = {
                 "ticker": ticker.upper(),
@@ -183,6 +428,8 @@ def setup_extended_endpoints(app: FastAPI):
 
             return summary
 
+        except NexusAlphaException as e:
+            raise e.to_http_exception()
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -194,11 +441,10 @@ def setup_extended_endpoints(app: FastAPI):
     async def get_analytics_summary(ticker: str):
         """Get comprehensive analytics summary for a stock"""
         try:
-            import yfinance as yf
-
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            hist = stock.history(period="1y")
+            info, hist = await asyncio.gather(
+                upstream_executor.run(market_data.get_info, ticker),
+                upstream_executor.run(bar_store.get_history, ticker, period="1y")
+            )
 
             # Calculate metrics
             pe_ratio = info.get('trailingPE')
@@ -237,6 +483,8 @@ def setup_extended_endpoints(app: FastAPI):
                 "last_updated": __import__('datetime').datetime.now().isoformat()
             }
 
+        except NexusAlphaException as e:
+            raise e.to_http_exception()
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -3,11 +3,27 @@ Advanced Features Module
 포트폴리오, 알림, 뉴스, 비교, 예측, 감정 분석, 실시간 차트, 백테스팅
 """
 
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Union
 from pydantic import BaseModel
 from datetime import datetime, timedelta
-import yfinance as yf
+import asyncio
+import bisect
 import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from market_data import market_data, upstream_executor
+from bar_store import bar_store
+from backtest import (
+    backtest, equity_metrics, ma_crossover, rank_score, rebalance_starts, simulate_portfolio, sweep_ma_grid,
+    walk_forward
+)
+from strategies import STRATEGIES, bars_from_frames, resolve_params, strategy_label
+
+ALERT_EVAL_INTERVAL = float(os.getenv("ALERT_EVAL_INTERVAL", "60"))
 
 # ============================================
 # 1. Portfolio Management (포트폴리오 추적)
@@ -55,34 +71,57 @@ class PortfolioManager:
                 last_updated=datetime.now().isoformat()
             )
 
-        positions = self.portfolios[user_id]
-        total_cost = 0
-        total_value = 0
-
-        for pos in positions:
-            try:
-                stock = yf.Ticker(pos.ticker)
-                current_price = stock.info.get('currentPrice', 0)
-                pos_cost = pos.quantity * pos.average_cost
-                pos_value = pos.quantity * current_price
-                total_cost += pos_cost
-                total_value += pos_value
-            except:
-                total_cost += pos.quantity * pos.average_cost
-
+        return self.get_portfolio_values([user_id])[user_id]
+
+    def get_portfolio_values(self, user_ids: Optional[List[str]] = None) -> Dict[str, Portfolio]:
+        """Value many portfolios against one price snapshot"""
+        if user_ids is None:
+            user_ids = list(self.portfolios.keys())
+        user_ids = [u for u in user_ids if u in self.portfolios]
+
+        # One batched quote fetch for the distinct tickers across all portfolios
+        tickers = {pos.ticker for u in user_ids for pos in self.portfolios[u]}
+        prices = market_data.get_last_prices(tickers) if tickers else {}
+        return self.value_portfolios(user_ids, prices)
+
+    def value_portfolios(self, user_ids: List[str], prices: Dict[str, float]) -> Dict[str, Portfolio]:
+        """Compute P&L for the given users from a ticker -> last price snapshot"""
+        owners, quantities, costs, last_prices = [], [], [], []
+        for i, user_id in enumerate(user_ids):
+            for pos in self.portfolios[user_id]:
+                owners.append(i)
+                quantities.append(pos.quantity)
+                costs.append(pos.average_cost)
+                last_prices.append(prices.get(pos.ticker.upper(), np.nan))
+
+        owners = np.asarray(owners, dtype=np.int64)
+        quantities = np.asarray(quantities, dtype=np.float64)
+        position_cost = quantities * np.asarray(costs, dtype=np.float64)
+        # Positions without a price count toward cost but not value
+        position_value = quantities * np.nan_to_num(np.asarray(last_prices, dtype=np.float64))
+
+        total_cost = np.bincount(owners, weights=position_cost, minlength=len(user_ids))
+        total_value = np.bincount(owners, weights=position_value, minlength=len(user_ids))
         total_gain_loss = total_value - total_cost
-        total_gain_loss_percent = (total_gain_loss / total_cost * 100) if total_cost > 0 else 0
-
-        return Portfolio(
-            user_id=user_id,
-            positions=positions,
-            total_value=total_value,
-            total_cost=total_cost,
-            total_gain_loss=total_gain_loss,
-            total_gain_loss_percent=total_gain_loss_percent,
-            last_updated=datetime.now().isoformat()
+        total_gain_loss_percent = np.divide(
+            total_gain_loss * 100, total_cost,
+            out=np.zeros_like(total_cost), where=total_cost > 0
         )
 
+        last_updated = datetime.now().isoformat()
+        return {
+            user_id: Portfolio(
+                user_id=user_id,
+                positions=self.portfolios[user_id],
+                total_value=float(total_value[i]),
+                total_cost=float(total_cost[i]),
+                total_gain_loss=float(total_gain_loss[i]),
+                total_gain_loss_percent=float(total_gain_loss_percent[i]),
+                last_updated=last_updated
+            )
+            for i, user_id in enumerate(user_ids)
+        }
+
 
 # ============================================
 # 2. Price Alerts (가격 알림)
@@ -95,51 +134,126 @@ class PriceAlert(BaseModel):
     is_active: bool = True
     created_at: str
 
+class AlertBook:
+    """Alert thresholds for one ticker, kept sorted for bisect lookups"""
+
+    def __init__(self):
+        self.above_prices: List[float] = []
+        self.above_alerts: List[tuple] = []  # (user_id, PriceAlert), same order as above_prices
+        self.below_prices: List[float] = []
+        self.below_alerts: List[tuple] = []
+
+    def __len__(self) -> int:
+        return len(self.above_prices) + len(self.below_prices)
+
+    def add(self, user_id: str, alert: PriceAlert):
+        """Insert alert keeping its side sorted by target price"""
+        if alert.alert_type == "above":
+            prices, alerts = self.above_prices, self.above_alerts
+        elif alert.alert_type == "below":
+            prices, alerts = self.below_prices, self.below_alerts
+        else:
+            raise ValueError(f"Unknown alert type: {alert.alert_type}")
+
+        idx = bisect.bisect_right(prices, alert.target_price)
+        prices.insert(idx, alert.target_price)
+        alerts.insert(idx, (user_id, alert))
+
+    def pop_crossed(self, price: float) -> List[tuple]:
+        """Remove and return every alert crossed by price in O(log n + k)"""
+        # "above" alerts with target <= price sit at the front
+        i = bisect.bisect_right(self.above_prices, price)
+        crossed = self.above_alerts[:i]
+        del self.above_prices[:i]
+        del self.above_alerts[:i]
+
+        # "below" alerts with target >= price sit at the back
+        j = bisect.bisect_left(self.below_prices, price)
+        crossed.extend(self.below_alerts[j:])
+        del self.below_prices[j:]
+        del self.below_alerts[j:]
+        return crossed
+
+
 class AlertManager:
     def __init__(self):
         self.alerts: Dict[str, List[PriceAlert]] = {}
+        self.books: Dict[str, AlertBook] = {}
+        self.triggered: Dict[str, List[Dict]] = {}
+        self.scheduler_running = False
+        self._lock = threading.Lock()
 
     def create_alert(self, user_id: str, alert: PriceAlert):
         """Create price alert"""
-        if user_id not in self.alerts:
-            self.alerts[user_id] = []
         alert.created_at = datetime.now().isoformat()
-        self.alerts[user_id].append(alert)
-
-    def check_alerts(self, user_id: str) -> List[Dict]:
-        """Check which alerts have been triggered"""
-        if user_id not in self.alerts:
+        with self._lock:
+            if alert.is_active:
+                ticker = alert.ticker.upper()
+                if ticker not in self.books:
+                    self.books[ticker] = AlertBook()
+                self.books[ticker].add(user_id, alert)
+
+            if user_id not in self.alerts:
+                self.alerts[user_id] = []
+            self.alerts[user_id].append(alert)
+
+    def evaluate(self, tickers: Optional[List[str]] = None, prices: Optional[Dict[str, float]] = None) -> List[Dict]:
+        """Evaluate the alert book, fetching each ticker's price once per cycle"""
+        with self._lock:
+            watched = [t for t in self.books if len(self.books[t]) > 0]
+        if tickers is not None:
+            wanted = {t.upper() for t in tickers}
+            watched = [t for t in watched if t in wanted]
+        if not watched:
             return []
 
+        if prices is None:
+            prices = market_data.get_last_prices(watched)
+
+        triggered_at = datetime.now().isoformat()
         triggered = []
-        for alert in self.alerts[user_id]:
-            if not alert.is_active:
-                continue
-
-            try:
-                stock = yf.Ticker(alert.ticker)
-                current_price = stock.info.get('currentPrice', 0)
-
-                is_triggered = False
-                if alert.alert_type == "above" and current_price >= alert.target_price:
-                    is_triggered = True
-                elif alert.alert_type == "below" and current_price <= alert.target_price:
-                    is_triggered = True
-
-                if is_triggered:
-                    triggered.append({
+        with self._lock:
+            for ticker in watched:
+                price = prices.get(ticker)
+                if price is None:
+                    continue
+                for user_id, alert in self.books[ticker].pop_crossed(price):
+                    alert.is_active = False  # Deactivate after trigger
+                    event = {
                         "ticker": alert.ticker,
                         "target_price": alert.target_price,
-                        "current_price": current_price,
+                        "current_price": price,
                         "alert_type": alert.alert_type,
-                        "triggered_at": datetime.now().isoformat()
-                    })
-                    alert.is_active = False  # Deactivate after trigger
+                        "triggered_at": triggered_at
+                    }
+                    self.triggered.setdefault(user_id, []).append(event)
+                    triggered.append(event)
+        return triggered
 
-            except Exception as e:
-                print(f"Error checking alert for {alert.ticker}: {str(e)}")
+    def check_alerts(self, user_id: str) -> List[Dict]:
+        """Return alerts triggered for user since the last check"""
+        if user_id not in self.alerts:
+            return []
 
-        return triggered
+        # Without the background scheduler, evaluate this user's tickers on demand
+        if not self.scheduler_running:
+            self.evaluate(tickers=[a.ticker for a in self.alerts[user_id] if a.is_active])
+
+        with self._lock:
+            return self.triggered.pop(user_id, [])
+
+    async def run_scheduler(self, interval: float = ALERT_EVAL_INTERVAL):
+        """Evaluate the whole alert book periodically in the background"""
+        self.scheduler_running = True
+        try:
+            while True:
+                try:
+                    await upstream_executor.run(self.evaluate)
+                except Exception as e:
+                    print(f"Error evaluating alerts: {str(e)}")
+                await asyncio.sleep(interval)
+        finally:
+            self.scheduler_running = False
 
 
 # ============================================
@@ -160,11 +274,8 @@ class StockComparison(BaseModel):
 def compare_stocks(ticker1: str, ticker2: str) -> StockComparison:
     """Compare two stocks"""
     try:
-        stock1 = yf.Ticker(ticker1)
-        stock2 = yf.Ticker(ticker2)
-
-        info1 = stock1.info
-        info2 = stock2.info
+        info1 = market_data.get_info(ticker1)
+        info2 = market_data.get_info(ticker2)
 
         price1 = info1.get('currentPrice', 0)
         price2 = info2.get('currentPrice', 0)
@@ -220,11 +331,10 @@ def analyze_sentiment(ticker: str) -> SentimentAnalysis:
     NewsAPI, Twitter API, or sentiment analysis ML models
     """
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        info = market_data.get_info(ticker)
 
         # Get technical indicators for sentiment
-        hist = stock.history(period="1mo")
+        hist = bar_store.get_history(ticker, period="1mo")
         if not hist.empty:
             close = hist['Close']
             # Simple momentum-based sentiment
@@ -298,8 +408,7 @@ def predict_stock_price(ticker: str) -> PricePrediction:
     In production, use ML models like ARIMA, LSTM, or XGBoost
     """
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period="1y")
+        hist = bar_store.get_history(ticker, period="1y")
 
         if hist.empty:
             raise ValueError(f"No data available for {ticker}")
@@ -362,8 +471,7 @@ class ChartData(BaseModel):
 def get_chart_data(ticker: str, interval: str = "1d", period: str = "3mo") -> ChartData:
     """Get chart data for real-time visualization"""
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period=period, interval=interval)
+        hist = bar_store.get_history(ticker, period=period, interval=interval)
 
         if hist.empty:
             raise ValueError(f"No data available for {ticker}")
@@ -404,106 +512,373 @@ class BacktestResult(BaseModel):
     losing_trades: int
     win_rate: float
 
-def backtest_simple_ma_strategy(ticker: str, initial_capital: float = 10000, fast_period: int = 20, slow_period: int = 50) -> BacktestResult:
+def backtest_result(ticker: str, strategy: str, hist, initial_capital: float, metrics: Dict) -> BacktestResult:
+    """Wrap engine metrics for one ticker's history in a BacktestResult"""
+    return BacktestResult(
+        ticker=ticker,
+        strategy=strategy,
+        start_date=str(hist.index[0]),
+        end_date=str(hist.index[-1]),
+        initial_capital=initial_capital,
+        final_value=metrics["final_value"],
+        total_return=metrics["total_return"],
+        total_return_percent=metrics["total_return_percent"],
+        annual_return=metrics["annual_return"],
+        max_drawdown=metrics["max_drawdown"],
+        sharpe_ratio=metrics["sharpe_ratio"],
+        num_trades=metrics["num_trades"],
+        winning_trades=metrics["winning_trades"],
+        losing_trades=metrics["losing_trades"],
+        win_rate=metrics["win_rate"]
+    )
+
+def backtest_simple_ma_strategy(
+    ticker: str,
+    hist: pd.DataFrame,
+    initial_capital: float = 10000,
+    fast_period: int = 20,
+    slow_period: int = 50
+) -> BacktestResult:
     """
     Simple Moving Average Crossover Strategy Backtest
-    Buy when fast MA crosses above slow MA
-    Sell when fast MA crosses below slow MA
+    Long while the fast MA is above the slow MA, flat otherwise
+    (vectorized: see backtest.py)
     """
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period="2y")
-
         if hist.empty or len(hist) < max(fast_period, slow_period):
             raise ValueError(f"Insufficient data for {ticker}")
 
-        # Calculate moving averages
-        hist['fast_ma'] = hist['Close'].rolling(window=fast_period).mean()
-        hist['slow_ma'] = hist['Close'].rolling(window=slow_period).mean()
-
-        # Generate signals
-        hist['signal'] = 0
-        hist.loc[hist['fast_ma'] > hist['slow_ma'], 'signal'] = 1
-        hist.loc[hist['fast_ma'] < hist['slow_ma'], 'signal'] = -1
-
-        # Identify crossovers
-        hist['position'] = hist['signal'].diff()
-
-        # Backtest
-        capital = initial_capital
-        position_size = 0
-        entry_price = 0
-        num_trades = 0
-        winning_trades = 0
-        losing_trades = 0
-        max_value = initial_capital
-        peak_capital = initial_capital
-
-        for idx, row in hist.iterrows():
-            if row['position'] == 1:  # Buy signal
-                position_size = capital / row['Close']
-                entry_price = row['Close']
-                num_trades += 1
-            elif row['position'] == -1 and position_size > 0:  # Sell signal
-                capital = position_size * row['Close']
-                if capital > entry_price * position_size:
-                    winning_trades += 1
-                else:
-                    losing_trades += 1
-                position_size = 0
-
-            # Update max drawdown tracking
-            if position_size > 0:
-                current_value = position_size * row['Close']
-            else:
-                current_value = capital
+        close = hist['Close'].to_numpy(dtype=np.float64)
+        metrics = backtest(
+            close,
+            ma_crossover(close, fast_period, slow_period),
+            initial_capital,
+            hist.index.asi8
+        )
+        return backtest_result(
+            ticker, f"Simple MA Crossover ({fast_period}/{slow_period})", hist, initial_capital, metrics
+        )
 
-            if current_value > peak_capital:
-                peak_capital = current_value
-                max_value = current_value
+    except Exception as e:
+        raise ValueError(f"Error running backtest: {str(e)}")
 
-        # Close final position
-        if position_size > 0:
-            final_value = position_size * hist['Close'].iloc[-1]
-        else:
-            final_value = capital
 
-        total_return = final_value - initial_capital
-        total_return_percent = (total_return / initial_capital) * 100
+class StrategyInfo(BaseModel):
+    name: str
+    description: str
+    defaults: Dict[str, Union[int, float]]
+
+class StrategyBacktestRequest(BaseModel):
+    ticker: str
+    params: Dict[str, Union[int, float]] = {}  # overrides for the strategy's defaults
+    initial_capital: float = 10000
+    period: str = "2y"
+
+def list_strategies() -> List[StrategyInfo]:
+    """Registered strategies and their default parameters"""
+    return [
+        StrategyInfo(name=s.name, description=s.description, defaults=s.defaults)
+        for s in STRATEGIES.values()
+    ]
+
+def backtest_registered_strategy(name: str, request: StrategyBacktestRequest, hist: pd.DataFrame) -> BacktestResult:
+    """Run a registered strategy over one ticker's history"""
+    strategy = STRATEGIES[name]
+    params = resolve_params(strategy, request.params)
+    try:
+        if hist.empty:
+            raise ValueError(f"Insufficient data for {request.ticker}")
+
+        bars = bars_from_frames([hist])
+        metrics = backtest(
+            bars["close"],
+            strategy.positions(bars, **params),
+            request.initial_capital,
+            bars["ts"]
+        )
+        return backtest_result(
+            request.ticker, strategy_label(strategy, params), hist, request.initial_capital, metrics
+        )
+
+    except Exception as e:
+        raise ValueError(f"Error running backtest: {str(e)}")
 
-        days = len(hist)
-        years = days / 365
-        annual_return = (total_return_percent / years) if years > 0 else 0
 
-        # Simple max drawdown calculation
-        max_drawdown = ((peak_capital - max_value) / peak_capital * 100) if peak_capital > 0 else 0
+class SweepPoint(BaseModel):
+    fast_period: int
+    slow_period: int
+    total_return_percent: float
+    sharpe_ratio: float
+    max_drawdown: float
+    num_trades: int
+    win_rate: float
 
-        # Simple sharpe ratio (not fully accurate without risk-free rate adjustment)
-        returns = hist['Close'].pct_change().dropna()
-        sharpe_ratio = returns.mean() / returns.std() * (252 ** 0.5) if returns.std() > 0 else 0
+class SweepResult(BaseModel):
+    ticker: str
+    strategy: str
+    start_date: str
+    end_date: str
+    initial_capital: float
+    fast_periods: List[int]
+    slow_periods: List[int]
+    # Rows follow fast_periods, columns slow_periods; null where fast >= slow
+    total_return_percent: List[List[Optional[float]]]
+    sharpe_ratio: List[List[Optional[float]]]
+    max_drawdown: List[List[Optional[float]]]
+    rank_by: str
+    top: List[SweepPoint]
+
+def backtest_ma_sweep(
+    ticker: str,
+    hist: pd.DataFrame,
+    fast_periods: List[int],
+    slow_periods: List[int],
+    initial_capital: float = 10000,
+    top_k: int = 10,
+    rank_by: str = "sharpe_ratio"
+) -> SweepResult:
+    """MA crossover backtest over a (fast, slow) period grid of one ticker's history"""
+    try:
+        if hist.empty or len(hist) < min(slow_periods):
+            raise ValueError(f"Insufficient data for {ticker}")
 
-        win_rate = (winning_trades / num_trades * 100) if num_trades > 0 else 0
+        matrices = sweep_ma_grid(
+            hist['Close'].to_numpy(dtype=np.float64), fast_periods, slow_periods,
+            initial_capital, hist.index.asi8
+        )
 
-        return BacktestResult(
+        # Top-k valid cells by the ranking metric
+        score = rank_score(matrices, rank_by)
+        flat = np.where(np.isnan(score), -np.inf, score).ravel()
+        valid = int(np.count_nonzero(~np.isnan(score)))
+        best = np.argsort(-flat, kind="stable")[:min(top_k, valid)]
+        top = []
+        for cell in best:
+            i, j = np.unravel_index(cell, score.shape)
+            top.append(SweepPoint(
+                fast_period=fast_periods[i],
+                slow_period=slow_periods[j],
+                total_return_percent=matrices["total_return_percent"][i, j],
+                sharpe_ratio=matrices["sharpe_ratio"][i, j],
+                max_drawdown=matrices["max_drawdown"][i, j],
+                num_trades=int(matrices["num_trades"][i, j]),
+                win_rate=matrices["win_rate"][i, j]
+            ))
+
+        as_rows = lambda matrix: [[None if v != v else v for v in row] for row in matrix.tolist()]
+        return SweepResult(
             ticker=ticker,
-            strategy=f"Simple MA Crossover ({fast_period}/{slow_period})",
+            strategy="Simple MA Crossover",
             start_date=str(hist.index[0]),
             end_date=str(hist.index[-1]),
             initial_capital=initial_capital,
-            final_value=final_value,
-            total_return=total_return,
-            total_return_percent=total_return_percent,
-            annual_return=annual_return,
-            max_drawdown=max_drawdown,
-            sharpe_ratio=sharpe_ratio,
-            num_trades=num_trades,
-            winning_trades=winning_trades,
-            losing_trades=losing_trades,
-            win_rate=win_rate
+            fast_periods=fast_periods,
+            slow_periods=slow_periods,
+            total_return_percent=as_rows(matrices["total_return_percent"]),
+            sharpe_ratio=as_rows(matrices["sharpe_ratio"]),
+            max_drawdown=as_rows(matrices["max_drawdown"]),
+            rank_by=rank_by,
+            top=top
         )
 
     except Exception as e:
-        raise ValueError(f"Error running backtest: {str(e)}")
+        raise ValueError(f"Error running backtest sweep: {str(e)}")
+
+
+class PortfolioBacktestRequest(BaseModel):
+    tickers: List[str]
+    weights: Optional[List[float]] = None  # aligned with tickers, normalized; equal if omitted
+    rebalance: str = "monthly"  # none, daily, weekly, monthly, quarterly
+    fast_period: int = 20
+    slow_period: int = 50
+    initial_capital: float = 10000
+    period: str = "2y"
+
+class AssetAttribution(BaseModel):
+    ticker: str
+    weight: float
+    pnl: float
+    contribution_percent: float
+    num_trades: int
+
+class PortfolioBacktestResult(BaseModel):
+    tickers: List[str]
+    strategy: str
+    rebalance: str
+    start_date: str
+    end_date: str
+    initial_capital: float
+    final_value: float
+    total_return: float
+    total_return_percent: float
+    annual_return: float
+    max_drawdown: float
+    sharpe_ratio: float
+    num_rebalances: int
+    # Equity curve, column-oriented (epoch-second timestamps)
+    timestamps: List[int]
+    equity: List[float]
+    attribution: List[AssetAttribution]
+    missing: List[str]  # requested tickers without data, left out
+
+def backtest_portfolio(request: PortfolioBacktestRequest, closes: Dict[str, pd.Series]) -> PortfolioBacktestResult:
+    """
+    MA crossover on every asset of a basket, run as one weighted portfolio
+
+    Prices are aligned into one (assets × bars) matrix; an asset earns
+    nothing before its first bar. Weights of assets without data are
+    dropped and the rest renormalized.
+    """
+    try:
+        tickers = [t for t in request.tickers if t in closes]
+        if not tickers:
+            raise ValueError("No data available for any ticker")
+
+        requested = dict(zip(request.tickers, request.weights or [1.0] * len(request.tickers)))
+        weights = np.array([requested[t] for t in tickers], dtype=np.float64)
+        if weights.sum() <= 0:
+            raise ValueError("Tickers with data have zero total weight")
+        weights /= weights.sum()
+
+        frame = pd.concat([closes[t].rename(t) for t in tickers], axis=1).sort_index().ffill()
+        close = frame.to_numpy(dtype=np.float64).T
+        starts = rebalance_starts(frame.index, request.rebalance)
+
+        result = simulate_portfolio(
+            close,
+            ma_crossover(close, request.fast_period, request.slow_period),
+            weights,
+            starts,
+            request.initial_capital
+        )
+        metrics = equity_metrics(
+            result["equity"][None, :], result["returns"][None, :], request.initial_capital, frame.index.asi8
+        )
+
+        return PortfolioBacktestResult(
+            tickers=tickers,
+            strategy=f"Simple MA Crossover ({request.fast_period}/{request.slow_period})",
+            rebalance=request.rebalance,
+            start_date=str(frame.index[0]),
+            end_date=str(frame.index[-1]),
+            initial_capital=request.initial_capital,
+            final_value=metrics["final_value"][0],
+            total_return=metrics["total_return"][0],
+            total_return_percent=metrics["total_return_percent"][0],
+            annual_return=metrics["annual_return"][0],
+            max_drawdown=metrics["max_drawdown"][0],
+            sharpe_ratio=metrics["sharpe_ratio"][0],
+            num_rebalances=len(starts) - 1,
+            timestamps=(frame.index.asi8 // 10**9).tolist(),
+            equity=result["equity"].tolist(),
+            attribution=[
+                AssetAttribution(
+                    ticker=ticker,
+                    weight=weights[i],
+                    pnl=result["asset_pnl"][i],
+                    contribution_percent=result["asset_pnl"][i] / request.initial_capital * 100,
+                    num_trades=int(result["asset_trades"][i])
+                )
+                for i, ticker in enumerate(tickers)
+            ],
+            missing=[t for t in request.tickers if t not in closes]
+        )
+
+    except Exception as e:
+        raise ValueError(f"Error running portfolio backtest: {str(e)}")
+
+
+class WalkForwardWindow(BaseModel):
+    train_start: str
+    test_start: str
+    test_end: str
+    fast_period: int
+    slow_period: int
+    train_score: float  # rank_by metric of the chosen pair in sample
+    test_total_return_percent: float
+    test_sharpe_ratio: float
+    test_max_drawdown: float
+    test_num_trades: int
+
+class WalkForwardResult(BaseModel):
+    ticker: str
+    strategy: str
+    rank_by: str
+    train_bars: int
+    test_bars: int
+    anchored: bool
+    start_date: str  # first out-of-sample bar
+    end_date: str
+    initial_capital: float
+    final_value: float
+    total_return_percent: float
+    annual_return: float
+    max_drawdown: float
+    sharpe_ratio: float
+    windows: List[WalkForwardWindow]
+    # Stitched out-of-sample equity curve, column-oriented (epoch-second timestamps)
+    timestamps: List[int]
+    equity: List[float]
+
+def backtest_walk_forward(
+    ticker: str,
+    hist: pd.DataFrame,
+    fast_periods: List[int],
+    slow_periods: List[int],
+    train_bars: int = 252,
+    test_bars: int = 63,
+    anchored: bool = False,
+    initial_capital: float = 10000,
+    rank_by: str = "sharpe_ratio"
+) -> WalkForwardResult:
+    """Walk-forward MA optimization: optimize on each train window, trade the next test window"""
+    try:
+        if hist.empty or len(hist) <= train_bars:
+            raise ValueError(f"Insufficient data for {ticker}")
+
+        result = walk_forward(
+            hist['Close'].to_numpy(dtype=np.float64), fast_periods, slow_periods,
+            train_bars, test_bars, anchored, initial_capital, hist.index.asi8, rank_by
+        )
+        index = hist.index
+        curve_index = index[result["start"]:]
+
+        return WalkForwardResult(
+            ticker=ticker,
+            strategy="Simple MA Crossover",
+            rank_by=rank_by,
+            train_bars=train_bars,
+            test_bars=test_bars,
+            anchored=anchored,
+            start_date=str(index[result["start"] + 1]),
+            end_date=str(index[-1]),
+            initial_capital=initial_capital,
+            final_value=result["final_value"],
+            total_return_percent=result["total_return_percent"],
+            annual_return=result["annual_return"],
+            max_drawdown=result["max_drawdown"],
+            sharpe_ratio=result["sharpe_ratio"],
+            windows=[
+                WalkForwardWindow(
+                    train_start=str(index[window["train_start"]]),
+                    test_start=str(index[window["test_start"]]),
+                    test_end=str(index[window["test_end"] - 1]),
+                    fast_period=window["fast_period"],
+                    slow_period=window["slow_period"],
+                    train_score=window["train_score"],
+                    test_total_return_percent=window["test"]["total_return_percent"],
+                    test_sharpe_ratio=window["test"]["sharpe_ratio"],
+                    test_max_drawdown=window["test"]["max_drawdown"],
+                    test_num_trades=window["test"]["num_trades"]
+                )
+                for window in result["windows"]
+            ],
+            timestamps=(curve_index.asi8 // 10**9).tolist(),
+            equity=result["equity"].tolist()
+        )
+
+    except Exception as e:
+        raise ValueError(f"Error running walk-forward backtest: {str(e)}")
 
 
 # ============================================
@@ -0,0 +1,679 @@
+"""
+Vectorized technical indicator engine
+Indicators are computed for many tickers at once over a right-aligned
+close matrix (tickers × bars): every rolling/EMA step is a single NumPy
+operation across all tickers
+"""
+
+import math
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# ============================================
+# Matrix construction
+# ============================================
+
+def align_closes(closes: Dict[str, pd.Series], length: int = None) -> Tuple[List[str], np.ndarray]:
+    """
+    Stack close series into a right-aligned (tickers × bars) matrix
+
+    Each ticker's latest bar sits in the last column; shorter histories are
+    NaN-padded on the left. length defaults to the longest history.
+    """
+    tickers = list(closes)
+    arrays = [np.asarray(closes[t], dtype=np.float64) for t in tickers]
+    width = length or max((len(a) for a in arrays), default=0)
+    matrix = np.full((len(tickers), width), np.nan)
+    for row, values in enumerate(arrays):
+        values = values[-width:] if width else values[:0]
+        if len(values):
+            matrix[row, width - len(values):] = values
+    return tickers, matrix
+
+
+# ============================================
+# Primitives (operate along the bar axis)
+# ============================================
+
+# Largest exponent the closed-form EMA lets (1 - alpha) ** -k reach before
+# starting a new block (float64 overflows near e**709)
+EMA_BLOCK_LOG_LIMIT = 500.0
+
+
+def _ema_packed(x: np.ndarray, alpha: float) -> np.ndarray:
+    """EMA of rows whose values start at column 0, in closed form per block of bars"""
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        return x.copy()
+    out = np.empty(x.shape)
+    out[:, 0] = x[:, 0]
+    block = max(1, int(EMA_BLOCK_LOG_LIMIT / -math.log(decay)))
+    for start in range(1, x.shape[1], block):
+        segment = x[:, start:start + block]
+        powers = decay ** np.arange(1, segment.shape[1] + 1)
+        # y[j] = decay**j * (y[0] + alpha * sum(x[i] / decay**i for i <= j))
+        out[:, start:start + segment.shape[1]] = powers * (
+            out[:, start - 1:start] + alpha * np.cumsum(segment / powers, axis=1)
+        )
+    return out
+
+
+def ema(x: np.ndarray, span: int) -> np.ndarray:
+    """Exponential moving average (pandas ewm(span, adjust=False)), seeded at each row's first value"""
+    x = np.atleast_2d(x)
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] == 0:
+        return out
+    # Pack each row's valid values to the left so every row starts at column 0;
+    # NaN bars then hold the previous value, as if skipped
+    valid = ~np.isnan(x)
+    packed = np.take_along_axis(x, np.argsort(~valid, axis=1, kind="stable"), axis=1)
+    smoothed = _ema_packed(np.nan_to_num(packed), 2.0 / (span + 1.0))
+    rank = np.cumsum(valid, axis=1) - 1
+    started = rank >= 0
+    out[started] = np.take_along_axis(smoothed, np.maximum(rank, 0), axis=1)[started]
+    return out
+
+
+def _window_sums(x: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Rolling sum, sum of squares and valid count via cumulative sums"""
+    filled = np.nan_to_num(x)
+    valid = (~np.isnan(x)).astype(np.float64)
+    pad = np.zeros((x.shape[0], 1))
+    csum = np.concatenate([pad, np.cumsum(filled, axis=1)], axis=1)
+    csq = np.concatenate([pad, np.cumsum(filled * filled, axis=1)], axis=1)
+    ccount = np.concatenate([pad, np.cumsum(valid, axis=1)], axis=1)
+
+    out_shape = x.shape
+    sums = np.full(out_shape, np.nan)
+    squares = np.full(out_shape, np.nan)
+    counts = np.zeros(out_shape)
+    if x.shape[1] >= window:
+        sums[:, window - 1:] = csum[:, window:] - csum[:, :-window]
+        squares[:, window - 1:] = csq[:, window:] - csq[:, :-window]
+        counts[:, window - 1:] = ccount[:, window:] - ccount[:, :-window]
+    return sums, squares, counts
+
+
+def _first_valid(x: np.ndarray) -> np.ndarray:
+    """Each row's first non-NaN value (0 for all-NaN rows)"""
+    has = ~np.isnan(x)
+    idx = np.where(has.any(axis=1), has.argmax(axis=1), 0)
+    first = x[np.arange(x.shape[0]), idx]
+    return np.nan_to_num(first)[:, None]
+
+
+def sma(x: np.ndarray, window: int) -> np.ndarray:
+    """Simple moving average; NaN until a full window of values is available"""
+    x = np.atleast_2d(x)
+    sums, _, counts = _window_sums(x, window)
+    return np.where(counts == window, sums / window, np.nan)
+
+
+def rolling_std(x: np.ndarray, window: int) -> np.ndarray:
+    """Rolling sample standard deviation (ddof=1)"""
+    x = np.atleast_2d(x)
+    # Shift each row by its first value so sum-of-squares doesn't lose precision
+    shifted = x - _first_valid(x)
+    sums, squares, counts = _window_sums(shifted, window)
+    var = (squares - sums * sums / window) / (window - 1)
+    return np.where(counts == window, np.sqrt(np.clip(var, 0.0, None)), np.nan)
+
+
+def diff(x: np.ndarray) -> np.ndarray:
+    """First difference along bars (NaN in the first column)"""
+    x = np.atleast_2d(x)
+    out = np.full(x.shape, np.nan)
+    out[:, 1:] = x[:, 1:] - x[:, :-1]
+    return out
+
+
+# ============================================
+# Indicators
+# ============================================
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal_span: int = 9) -> Tuple[np.ndarray, np.ndarray]:
+    """MACD line and signal line"""
+    line = ema(close, fast) - ema(close, slow)
+    return line, ema(line, signal_span)
+
+
+def rsi(close: np.ndarray, window: int = 14) -> np.ndarray:
+    """Relative Strength Index from simple rolling means of gains and losses"""
+    delta = diff(close)
+    gain = sma(np.where(np.isnan(delta), np.nan, np.clip(delta, 0.0, None)), window)
+    loss = sma(np.where(np.isnan(delta), np.nan, np.clip(-delta, 0.0, None)), window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100.0 - 100.0 / (1.0 + gain / loss)
+
+
+def bollinger(close: np.ndarray, window: int = 20, width: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Bollinger upper, middle and lower bands"""
+    middle = sma(close, window)
+    std = rolling_std(close, window)
+    return middle + width * std, middle, middle - width * std
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """True range; the first bar (no previous close) is just high - low"""
+    high, low, close = (np.atleast_2d(a) for a in (high, low, close))
+    prev = np.full(close.shape, np.nan)
+    prev[:, 1:] = close[:, :-1]
+    return np.fmax(high - low, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+
+
+def _running_total(contributions: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """Cumulative sum along bars, NaN where there is no close"""
+    return np.where(np.isnan(close), np.nan, np.cumsum(np.nan_to_num(contributions), axis=1))
+
+
+def obv(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """On-balance volume, starting at 0 on the first bar"""
+    return _running_total(np.sign(diff(close)) * volume, close)
+
+
+def ad_line(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """Accumulation/distribution line (bars with high == low add nothing)"""
+    spread = high - low
+    with np.errstate(divide="ignore", invalid="ignore"):
+        multiplier = np.where(spread > 0, ((close - low) - (high - close)) / spread, 0.0)
+    return _running_total(multiplier * volume, close)
+
+
+# ============================================
+# Indicator column registry
+# ============================================
+
+class _Inputs:
+    """OHLCV matrices plus memoized columns, so shared terms are computed once"""
+
+    def __init__(self, close, high=None, low=None, volume=None):
+        self.close = np.atleast_2d(np.asarray(close, dtype=np.float64))
+        self.high = self.close if high is None else np.atleast_2d(np.asarray(high, dtype=np.float64))
+        self.low = self.close if low is None else np.atleast_2d(np.asarray(low, dtype=np.float64))
+        self.volume = (
+            np.zeros(self.close.shape) if volume is None
+            else np.atleast_2d(np.asarray(volume, dtype=np.float64))
+        )
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in self._columns:
+            compute = INDICATOR_COLUMNS.get(name) or _INTERMEDIATES[name]
+            self._columns[name] = compute(self)
+        return self._columns[name]
+
+
+_INTERMEDIATES: Dict[str, Callable[[_Inputs], np.ndarray]] = {
+    "std_20": lambda x: rolling_std(x.close, 20),
+}
+
+# Named after the technical_data columns; insertion order is the output order
+INDICATOR_COLUMNS: Dict[str, Callable[[_Inputs], np.ndarray]] = {
+    "rsi_14": lambda x: rsi(x.close, 14),
+    "macd": lambda x: x["ema_12"] - x["ema_26"],
+    "macd_signal": lambda x: ema(x["macd"], 9),
+    "macd_histogram": lambda x: x["macd"] - x["macd_signal"],
+    "sma_20": lambda x: sma(x.close, 20),
+    "sma_50": lambda x: sma(x.close, 50),
+    "sma_200": lambda x: sma(x.close, 200),
+    "ema_12": lambda x: ema(x.close, 12),
+    "ema_26": lambda x: ema(x.close, 26),
+    "bollinger_upper": lambda x: x["sma_20"] + 2.0 * x["std_20"],
+    "bollinger_middle": lambda x: x["sma_20"],
+    "bollinger_lower": lambda x: x["sma_20"] - 2.0 * x["std_20"],
+    "atr_14": lambda x: sma(true_range(x.high, x.low, x.close), 14),
+    "obv": lambda x: obv(x.close, x.volume),
+    "ad_line": lambda x: ad_line(x.high, x.low, x.close, x.volume),
+}
+
+# /api/technical response field -> indicator column
+API_INDICATORS = {
+    "macd": "macd",
+    "signal": "macd_signal",
+    "rsi": "rsi_14",
+    "sma_20": "sma_20",
+    "sma_50": "sma_50",
+    "bollinger_upper": "bollinger_upper",
+    "bollinger_lower": "bollinger_lower",
+}
+
+
+def compute_indicator_frame(ohlcv: pd.DataFrame, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Indicator columns for every bar of one yfinance-shaped OHLCV frame
+
+    Only the requested columns (default: all of INDICATOR_COLUMNS) and the
+    terms they depend on are computed.
+    """
+    columns = list(INDICATOR_COLUMNS) if columns is None else list(columns)
+    unknown = [name for name in columns if name not in INDICATOR_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown indicators: {', '.join(unknown)}")
+
+    inputs = _Inputs(
+        ohlcv["Close"].to_numpy(dtype=np.float64),
+        ohlcv["High"].to_numpy(dtype=np.float64) if "High" in ohlcv else None,
+        ohlcv["Low"].to_numpy(dtype=np.float64) if "Low" in ohlcv else None,
+        ohlcv["Volume"].to_numpy(dtype=np.float64) if "Volume" in ohlcv else None
+    )
+    return pd.DataFrame({name: inputs[name][0] for name in columns}, index=ohlcv.index)
+
+
+def api_indicators(values: Dict[str, float], current_price: float) -> Dict[str, float]:
+    """Map indicator column values to the /api/technical indicator fields"""
+    latest = {field: values[column] for field, column in API_INDICATORS.items()}
+    latest["current_price"] = current_price
+    return latest
+
+
+def indicator_series(
+    ohlcv: pd.DataFrame,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+    columns: Optional[Sequence[str]] = None
+) -> Dict[str, Any]:
+    """
+    Column-oriented indicator series for the bars of ohlcv within [start, end]
+
+    Indicators are computed over the whole frame, so bars before start act
+    as warm-up. Every array shares one list of epoch-second timestamps;
+    naive bounds are read in the frame's timezone.
+    """
+    frame = compute_indicator_frame(ohlcv, columns)
+    index = pd.DatetimeIndex(ohlcv.index)
+
+    def localize(bound: pd.Timestamp) -> pd.Timestamp:
+        if index.tz is None:
+            return bound
+        return bound.tz_localize(index.tz) if bound.tzinfo is None else bound.tz_convert(index.tz)
+
+    window = np.ones(len(index), dtype=bool)
+    if start is not None:
+        window &= index >= localize(start)
+    if end is not None:
+        window &= index <= localize(end)
+
+    return {
+        "timestamps": (index.asi8[window] // 10**9).tolist(),
+        "close": ohlcv["Close"].to_numpy(dtype=np.float64)[window].tolist(),
+        "indicators": {name: frame[name].to_numpy()[window].tolist() for name in frame.columns},
+    }
+
+
+def compute_indicators(close: np.ndarray) -> Dict[str, np.ndarray]:
+    """Standard /api/technical indicator set for every row of a close matrix"""
+    inputs = _Inputs(close)
+    indicators = {field: inputs[column] for field, column in API_INDICATORS.items()}
+    indicators["current_price"] = inputs.close
+    return indicators
+
+
+def latest_values(indicators: Dict[str, np.ndarray], row: int) -> Dict[str, float]:
+    """Last-bar value of each indicator for one row"""
+    return {name: float(values[row, -1]) for name, values in indicators.items()}
+
+
+# ============================================
+# Interpretation
+# ============================================
+
+def interpret(latest: Dict[str, float]) -> Dict:
+    """Trend, strength and trading signals from latest indicator values"""
+    # Determine trend
+    if latest["macd"] > latest["signal"] and latest["rsi"] > 50:
+        trend = "BULLISH"
+        strength = min((latest["rsi"] - 50) / 50, 1.0)
+    elif latest["macd"] < latest["signal"] and latest["rsi"] < 50:
+        trend = "BEARISH"
+        strength = min((50 - latest["rsi"]) / 50, 1.0)
+    else:
+        trend = "NEUTRAL"
+        strength = 0.5
+
+    # Generate signals
+    signals = []
+    if latest["rsi"] > 70:
+        signals.append("Overbought - Consider selling")
+    elif latest["rsi"] < 30:
+        signals.append("Oversold - Consider buying")
+
+    if latest["current_price"] > latest["bollinger_upper"]:
+        signals.append("Price above upper Bollinger Band")
+    elif latest["current_price"] < latest["bollinger_lower"]:
+        signals.append("Price below lower Bollinger Band")
+
+    if latest["sma_20"] > latest["sma_50"]:
+        signals.append("Golden Cross - Bullish signal")
+    elif latest["sma_20"] < latest["sma_50"]:
+        signals.append("Death Cross - Bearish signal")
+
+    return {
+        "indicators": latest,
+        "trend": trend,
+        "strength": strength,
+        "signals": signals
+    }
+
+
+def analyze_closes(closes: Dict[str, Sequence[float]]) -> Dict[str, Dict]:
+    """Indicators plus interpretation for many tickers in one vectorized pass"""
+    tickers, matrix = align_closes({t: pd.Series(c) for t, c in closes.items()})
+    if not tickers:
+        return {}
+    indicators = compute_indicators(matrix)
+    return {ticker: interpret(latest_values(indicators, row)) for row, ticker in enumerate(tickers)}
+
+
+# ============================================
+# Incremental (streaming) indicator state
+# ============================================
+
+def _ema_step(prev: Optional[float], value: float, span: int) -> float:
+    if prev is None:
+        return value
+    alpha = 2.0 / (span + 1.0)
+    return alpha * value + (1.0 - alpha) * prev
+
+
+class IndicatorState:
+    """
+    O(1)-per-bar state for the full indicator column set
+
+    Keeps EMA values, running sums over the last 14 RSI deltas and true
+    ranges, rolling sum / sum-of-squares of recent closes and the running
+    OBV and A/D totals. update() appends a bar; replace_last() revises the
+    latest (still forming) bar by undoing the previous update. Results
+    match compute_indicator_frame() over the same bars. Serializes to
+    plain dicts for the cache.
+    """
+
+    VERSION = 2
+    FAST, SLOW, SIGNAL = 12, 26, 9
+    RSI_WINDOW = 14
+    ATR_WINDOW = 14
+    SHORT_WINDOW, LONG_WINDOW, TREND_WINDOW = 20, 50, 200
+    BAND_WIDTH = 2.0
+    RESYNC_EVERY = 500  # recompute running sums exactly to cancel float drift
+
+    def __init__(self):
+        self.ema_fast: Optional[float] = None
+        self.ema_slow: Optional[float] = None
+        self.ema_signal: Optional[float] = None
+        self.closes: deque = deque(maxlen=self.TREND_WINDOW)
+        self.sum_short = 0.0
+        self.sumsq_short = 0.0
+        self.sum_long = 0.0
+        self.sum_trend = 0.0
+        self.gains: deque = deque(maxlen=self.RSI_WINDOW)
+        self.losses: deque = deque(maxlen=self.RSI_WINDOW)
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        self.true_ranges: deque = deque(maxlen=self.ATR_WINDOW)
+        self.tr_sum = 0.0
+        self.obv = 0.0
+        self.ad_line = 0.0
+        self.last_close: Optional[float] = None
+        self.last_ts: Optional[int] = None
+        self.count = 0
+        self._undo: Optional[Dict] = None
+
+    @classmethod
+    def from_closes(cls, closes: Sequence[float], timestamps: Optional[Sequence[int]] = None) -> "IndicatorState":
+        """Build state by replaying a close series (skipping NaN bars)"""
+        state = cls()
+        for i, close in enumerate(closes):
+            if close == close:
+                state.update(close, int(timestamps[i]) if timestamps is not None else None)
+        return state
+
+    @classmethod
+    def from_frame(cls, ohlcv: pd.DataFrame) -> "IndicatorState":
+        """Build state by replaying a yfinance-shaped OHLCV frame"""
+        state = cls()
+        state.sync(
+            ohlcv.index.asi8, ohlcv["Close"].to_numpy(),
+            ohlcv["High"].to_numpy(), ohlcv["Low"].to_numpy(), ohlcv["Volume"].to_numpy()
+        )
+        return state
+
+    _SCALARS = (
+        "ema_fast", "ema_slow", "ema_signal", "sum_short", "sumsq_short", "sum_long", "sum_trend",
+        "gain_sum", "loss_sum", "tr_sum", "obv", "ad_line", "last_close", "last_ts", "count"
+    )
+
+    def update(self, close: float, ts: Optional[int] = None, high: Optional[float] = None,
+               low: Optional[float] = None, volume: Optional[float] = None):
+        """Append a new bar (high/low default to the close, volume to 0)"""
+        close = float(close)
+        high = close if high is None or high != high else float(high)
+        low = close if low is None or low != low else float(low)
+        volume = 0.0 if volume is None or volume != volume else float(volume)
+        undo = {
+            "scalars": [getattr(self, name) for name in self._SCALARS],
+            "close_evicted": None,
+            "rsi_evicted": None,
+            "rsi_appended": False,
+            "tr_evicted": None
+        }
+
+        # EMAs and MACD signal
+        self.ema_fast = _ema_step(self.ema_fast, close, self.FAST)
+        self.ema_slow = _ema_step(self.ema_slow, close, self.SLOW)
+        self.ema_signal = _ema_step(self.ema_signal, self.ema_fast - self.ema_slow, self.SIGNAL)
+
+        # RSI running sums and OBV
+        if self.last_close is not None:
+            if len(self.gains) == self.RSI_WINDOW:
+                undo["rsi_evicted"] = [self.gains[0], self.losses[0]]
+                self.gain_sum -= self.gains[0]
+                self.loss_sum -= self.losses[0]
+            delta = close - self.last_close
+            gain, loss = max(delta, 0.0), max(-delta, 0.0)
+            self.gains.append(gain)
+            self.losses.append(loss)
+            self.gain_sum += gain
+            self.loss_sum += loss
+            undo["rsi_appended"] = True
+            self.obv += volume * ((delta > 0) - (delta < 0))
+
+        # ATR running sum
+        tr = high - low
+        if self.last_close is not None:
+            tr = max(tr, abs(high - self.last_close), abs(low - self.last_close))
+        if len(self.true_ranges) == self.ATR_WINDOW:
+            undo["tr_evicted"] = self.true_ranges[0]
+            self.tr_sum -= self.true_ranges[0]
+        self.true_ranges.append(tr)
+        self.tr_sum += tr
+
+        # Accumulation/distribution
+        if high > low:
+            self.ad_line += ((close - low) - (high - close)) / (high - low) * volume
+
+        # Rolling windows
+        if len(self.closes) == self.TREND_WINDOW:
+            undo["close_evicted"] = self.closes[0]
+            self.sum_trend -= self.closes[0]
+        if len(self.closes) >= self.LONG_WINDOW:
+            self.sum_long -= self.closes[-self.LONG_WINDOW]
+        if len(self.closes) >= self.SHORT_WINDOW:
+            leaving = self.closes[-self.SHORT_WINDOW]
+            self.sum_short -= leaving
+            self.sumsq_short -= leaving * leaving
+        self.closes.append(close)
+        self.sum_trend += close
+        self.sum_long += close
+        self.sum_short += close
+        self.sumsq_short += close * close
+
+        self.last_close = close
+        self.last_ts = ts
+        self.count += 1
+        self._undo = undo
+        if self.count % self.RESYNC_EVERY == 0:
+            self._resync()
+
+    def replace_last(self, close: float, ts: Optional[int] = None, high: Optional[float] = None,
+                     low: Optional[float] = None, volume: Optional[float] = None):
+        """Revise the most recent bar (e.g. an intraday close that moved)"""
+        undo = self._undo
+        if undo is None:
+            raise ValueError("No bar to replace")
+
+        ts = self.last_ts if ts is None else ts
+        for name, value in zip(self._SCALARS, undo["scalars"]):
+            setattr(self, name, value)
+        self.closes.pop()
+        if undo["close_evicted"] is not None:
+            self.closes.appendleft(undo["close_evicted"])
+        if undo["rsi_appended"]:
+            self.gains.pop()
+            self.losses.pop()
+        if undo["rsi_evicted"] is not None:
+            self.gains.appendleft(undo["rsi_evicted"][0])
+            self.losses.appendleft(undo["rsi_evicted"][1])
+        self.true_ranges.pop()
+        if undo["tr_evicted"] is not None:
+            self.true_ranges.appendleft(undo["tr_evicted"])
+        self._undo = None
+        self.update(close, ts, high, low, volume)
+
+    def _resync(self):
+        closes = list(self.closes)
+        short = closes[-self.SHORT_WINDOW:]
+        self.sum_short = sum(short)
+        self.sumsq_short = sum(c * c for c in short)
+        self.sum_long = sum(closes[-self.LONG_WINDOW:])
+        self.sum_trend = sum(closes)
+        self.gain_sum = sum(self.gains)
+        self.loss_sum = sum(self.losses)
+        self.tr_sum = sum(self.true_ranges)
+
+    def sync(self, timestamps: Sequence[int], closes: Sequence[float],
+             highs: Optional[Sequence[float]] = None, lows: Optional[Sequence[float]] = None,
+             volumes: Optional[Sequence[float]] = None,
+             on_bar: Optional[Callable[["IndicatorState"], None]] = None) -> bool:
+        """
+        Apply bars newer than the state from a recent OHLCV series
+
+        The latest stored bar is revised if its close changed; on_bar is
+        called after each bar applied. An empty state replays the whole
+        series. Bars with a non-finite value (a partial upstream bar) are
+        skipped, since one NaN would poison every running sum. Returns False
+        when the series does not contain the state's last bar, in which case
+        the state should be rebuilt from full history.
+        """
+        def bar(i: int) -> tuple:
+            return (
+                closes[i], int(timestamps[i]),
+                highs[i] if highs is not None else None,
+                lows[i] if lows is not None else None,
+                volumes[i] if volumes is not None else None
+            )
+
+        def finite(i: int) -> bool:
+            series = (closes, highs, lows, volumes)
+            return all(math.isfinite(values[i]) for values in series if values is not None)
+
+        if len(timestamps) == 0:
+            return True
+        if self.count == 0:
+            position = -1
+        elif self.last_ts is None:
+            return False
+        else:
+            position = int(np.searchsorted(timestamps, self.last_ts))
+            if position >= len(timestamps) or int(timestamps[position]) != self.last_ts:
+                return False
+            if finite(position) and float(closes[position]) != self.last_close:
+                self.replace_last(*bar(position))
+                if on_bar is not None:
+                    on_bar(self)
+
+        for i in range(position + 1, len(timestamps)):
+            if finite(i):
+                self.update(*bar(i))
+                if on_bar is not None:
+                    on_bar(self)
+        return True
+
+    def columns(self) -> Dict[str, float]:
+        """Current value of every INDICATOR_COLUMNS column (NaN until enough bars)"""
+        nan = float("nan")
+        n = len(self.closes)
+
+        if n >= self.SHORT_WINDOW:
+            middle = self.sum_short / self.SHORT_WINDOW
+            var = (self.sumsq_short - self.sum_short * middle) / (self.SHORT_WINDOW - 1)
+            std = math.sqrt(max(var, 0.0))
+            upper, lower = middle + self.BAND_WIDTH * std, middle - self.BAND_WIDTH * std
+        else:
+            middle = upper = lower = nan
+
+        if len(self.gains) == self.RSI_WINDOW:
+            avg_gain = self.gain_sum / self.RSI_WINDOW
+            avg_loss = self.loss_sum / self.RSI_WINDOW
+            if avg_loss > 0:
+                rsi_value = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+            else:
+                rsi_value = 100.0 if avg_gain > 0 else nan
+        else:
+            rsi_value = nan
+
+        started = self.count > 0
+        macd_value = (self.ema_fast - self.ema_slow) if started else nan
+        signal_value = self.ema_signal if started else nan
+        return {
+            "rsi_14": rsi_value,
+            "macd": macd_value,
+            "macd_signal": signal_value,
+            "macd_histogram": macd_value - signal_value,
+            "sma_20": middle,
+            "sma_50": self.sum_long / self.LONG_WINDOW if n >= self.LONG_WINDOW else nan,
+            "sma_200": self.sum_trend / self.TREND_WINDOW if n >= self.TREND_WINDOW else nan,
+            "ema_12": self.ema_fast if started else nan,
+            "ema_26": self.ema_slow if started else nan,
+            "bollinger_upper": upper,
+            "bollinger_middle": middle,
+            "bollinger_lower": lower,
+            "atr_14": self.tr_sum / self.ATR_WINDOW if len(self.true_ranges) == self.ATR_WINDOW else nan,
+            "obv": self.obv if started else nan,
+            "ad_line": self.ad_line if started else nan,
+        }
+
+    def latest(self) -> Dict[str, float]:
+        """Current /api/technical indicator values (NaN until enough bars)"""
+        return api_indicators(self.columns(), self.last_close if self.last_close is not None else float("nan"))
+
+    def to_dict(self) -> Dict:
+        """Plain-data form for the cache"""
+        data = {name: getattr(self, name) for name in self._SCALARS}
+        data.update({
+            "version": self.VERSION,
+            "closes": list(self.closes),
+            "gains": list(self.gains),
+            "losses": list(self.losses),
+            "true_ranges": list(self.true_ranges),
+            "undo": self._undo
+        })
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "IndicatorState":
+        """Restore state from to_dict() output; ValueError if it was written by another version"""
+        if data.get("version") != cls.VERSION:
+            raise ValueError("Indicator state version mismatch")
+        state = cls()
+        for name in cls._SCALARS:
+            setattr(state, name, data[name])
+        state.closes.extend(data["closes"])
+        state.gains.extend(data["gains"])
+        state.losses.extend(data["losses"])
+        state.true_ranges.extend(data["true_ranges"])
+        state._undo = data["undo"]
+        return state
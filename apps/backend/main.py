@@ -3,15 +3,33 @@ Nexus-Alpha Backend API
 FastAPI server integrating TradingAgents and yfinance
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Optional, Dict, List
-import yfinance as yf
+from typing import Optional, Dict, List, Tuple
 from datetime import datetime, timedelta
+import asyncio
+import hashlib
 import sys
 import os
 
+import pandas as pd
+
+from market_data import market_data, upstream_executor
+from compute import compute_executor
+from bar_store import bar_store, period_covering
+from cache import (
+    CacheMiddleware, CacheTTL, MSGPACK_AVAILABLE, PREFETCH_ENABLED, cache_manager, cache_warmup, invalidate_ticker_cache,
+    prefetcher, ticker_tag
+)
+from durable_cache import DURABLE_CACHE_ENABLED, durable_cache
+from exceptions import InvalidParameterError, NexusAlphaException
+from indicators import (
+    INDICATOR_COLUMNS, IndicatorState, analyze_closes, api_indicators, compute_indicator_frame,
+    indicator_series, interpret
+)
+from technical_store import TECHNICAL_STORE_ENABLED, bar_date, frame_rows, technical_row, technical_store
+
 # TradingAgents 경로 추가
 TRADINGAGENTS_PATH = "/Users/jeonhyeonmin/Simulation/TradingAgents"
 if TRADINGAGENTS_PATH not in sys.path:
@@ -23,6 +41,9 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Response cache (added before CORS so CORS headers also wrap cached responses)
+app.add_middleware(CacheMiddleware)
+
 # CORS 설정
 app.add_middleware(
     CORSMiddleware,
@@ -83,90 +104,155 @@ class TechnicalResponse(BaseModel):
 # Helper Functions
 # ============================================
 
-def calculate_technical_indicators(ticker: str) -> Dict:
-    """Calculate technical indicators using yfinance data"""
+# History every indicator calculation starts from (sma_200 needs 200 bars), so
+# single and batch results agree once EMA seeds have decayed
+INDICATOR_WARMUP_PERIOD = "1y"
+
+def cached_indicator_state(ticker: str) -> Optional[IndicatorState]:
+    """The ticker's cached streaming indicator state, None if missing or written by an older version"""
+    cached = cache_manager.get(f"indicator_state:{ticker.upper()}")
+    if cached is None:
+        return None
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period="3mo")
-
-        if hist.empty:
-            raise ValueError(f"No data available for {ticker}")
-
-        close = hist['Close']
-
-        # MACD
-        exp12 = close.ewm(span=12, adjust=False).mean()
-        exp26 = close.ewm(span=26, adjust=False).mean()
-        macd = exp12 - exp26
-        signal = macd.ewm(span=9, adjust=False).mean()
-
-        # RSI
-        delta = close.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-
-        # Moving Averages
-        sma_20 = close.rolling(window=20).mean()
-        sma_50 = close.rolling(window=50).mean()
-
-        # Bollinger Bands
-        bb_middle = sma_20
-        bb_std = close.rolling(window=20).std()
-        bb_upper = bb_middle + (bb_std * 2)
-        bb_lower = bb_middle - (bb_std * 2)
-
-        # Get latest values
-        latest = {
-            "macd": float(macd.iloc[-1]),
-            "signal": float(signal.iloc[-1]),
-            "rsi": float(rsi.iloc[-1]),
-            "sma_20": float(sma_20.iloc[-1]),
-            "sma_50": float(sma_50.iloc[-1]),
-            "bollinger_upper": float(bb_upper.iloc[-1]),
-            "bollinger_lower": float(bb_lower.iloc[-1]),
-            "current_price": float(close.iloc[-1])
-        }
+        return IndicatorState.from_dict(cached)
+    except ValueError:
+        return None
+
+def advance_indicator_state(state: IndicatorState, recent: pd.DataFrame) -> Optional[Dict[datetime, Dict]]:
+    """Apply recent bars to state, returning the daily rows produced (None if state must be rebuilt)"""
+    rows: Dict[datetime, Dict] = {}
+
+    def record(bar_state: IndicatorState):
+        date = bar_date(bar_state.last_ts, recent.index.tz)
+        rows[date] = technical_row(date, bar_state.columns(), bar_state.last_close)
+
+    synced = state.sync(
+        recent.index.asi8, recent['Close'].to_numpy(), recent['High'].to_numpy(),
+        recent['Low'].to_numpy(), recent['Volume'].to_numpy(), on_bar=record
+    )
+    if not synced:
+        return None
+    if not recent.empty:
+        record(state)  # rewrite the latest row so it counts as fresh again
+    return rows
+
+def build_indicator_state(ticker: str, hist: pd.DataFrame) -> Tuple[IndicatorState, Dict[datetime, Dict]]:
+    """Streaming indicator state and daily rows for every bar of hist"""
+    if hist.empty:
+        raise ValueError(f"No data available for {ticker}")
+    rows = {row["date"]: row for row in frame_rows(hist, compute_indicator_frame(hist))}
+    return IndicatorState.from_frame(hist), rows
+
+def save_indicator_state(ticker: str, state: IndicatorState, rows: Dict[datetime, Dict]):
+    """Cache the streaming state and persist its rows to technical_data"""
+    cache_manager.set(
+        f"indicator_state:{ticker.upper()}", state.to_dict(), CacheTTL.MACRO_DATA.seconds, [ticker_tag(ticker)]
+    )
+    if TECHNICAL_STORE_ENABLED:
+        technical_store.write_rows(ticker, list(rows.values()))
+
+async def refresh_technical_data(ticker: str) -> IndicatorState:
+    """
+    Advance the ticker's streaming indicator state to the latest bar and
+    persist the daily rows it produced to technical_data
+
+    The cached state only needs the last few bars applied; it is rebuilt
+    from one year of history (sma_200 needs 200 bars) when missing or when
+    the gap is too large, which also backfills the table. Reads and writes
+    run on the upstream executor, indicator math on the compute executor.
+    """
+    state = await upstream_executor.run(cached_indicator_state, ticker)
+    rows = None
+    if state is not None:
+        recent = await upstream_executor.run(bar_store.get_history, ticker, "5d")
+        rows = await compute_executor.run(advance_indicator_state, state, recent)
+
+    if rows is None:
+        hist = await upstream_executor.run(bar_store.get_history, ticker, INDICATOR_WARMUP_PERIOD)
+        state, rows = await compute_executor.run(build_indicator_state, ticker, hist)
+
+    await upstream_executor.run(save_indicator_state, ticker, state, rows)
+    return state
+
+def stored_row_prices(tickers: List[str]) -> Dict[str, float]:
+    """Last prices to pair with stored indicator rows, empty if the quote lookup fails"""
+    try:
+        return market_data.get_last_prices(tickers)
+    except Exception as e:
+        # The indicators are already stored; without a price only the band signals are skipped
+        print(f"⚠️  Last price lookup failed: {str(e)}")
+        return {}
 
-        # Determine trend
-        if latest["macd"] > latest["signal"] and latest["rsi"] > 50:
-            trend = "BULLISH"
-            strength = min((latest["rsi"] - 50) / 50, 1.0)
-        elif latest["macd"] < latest["signal"] and latest["rsi"] < 50:
-            trend = "BEARISH"
-            strength = min((50 - latest["rsi"]) / 50, 1.0)
-        else:
-            trend = "NEUTRAL"
-            strength = 0.5
-
-        # Generate signals
-        signals = []
-        if latest["rsi"] > 70:
-            signals.append("Overbought - Consider selling")
-        elif latest["rsi"] < 30:
-            signals.append("Oversold - Consider buying")
-
-        if latest["current_price"] > latest["bollinger_upper"]:
-            signals.append("Price above upper Bollinger Band")
-        elif latest["current_price"] < latest["bollinger_lower"]:
-            signals.append("Price below lower Bollinger Band")
-
-        if latest["sma_20"] > latest["sma_50"]:
-            signals.append("Golden Cross - Bullish signal")
-        elif latest["sma_20"] < latest["sma_50"]:
-            signals.append("Death Cross - Bearish signal")
+async def calculate_technical_indicators(ticker: str) -> Dict:
+    """Calculate technical indicators, served from technical_data while the latest row is fresh"""
+    try:
+        if TECHNICAL_STORE_ENABLED:
+            row = await upstream_executor.run(technical_store.latest, ticker)
+            if row is not None:
+                prices = await upstream_executor.run(stored_row_prices, [ticker])
+                return interpret(api_indicators(row, prices.get(ticker.upper(), float("nan"))))
 
-        return {
-            "indicators": latest,
-            "trend": trend,
-            "strength": strength,
-            "signals": signals
-        }
+        state = await refresh_technical_data(ticker)
+        return interpret(state.latest())
 
+    except NexusAlphaException:
+        raise  # upstream timeouts and overload keep their own status
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error calculating indicators: {str(e)}")
 
+def stored_technical_indicators(tickers: List[str]) -> Dict[str, Dict]:
+    """Indicators for the tickers whose latest technical_data row is fresh"""
+    rows = {ticker: technical_store.latest(ticker) for ticker in tickers}
+    rows = {ticker: row for ticker, row in rows.items() if row is not None}
+    prices = stored_row_prices(list(rows)) if rows else {}
+    return {
+        ticker: interpret(api_indicators(row, prices.get(ticker, float("nan"))))
+        for ticker, row in rows.items()
+    }
+
+MAX_BATCH_TICKERS = int(os.getenv("MAX_BATCH_TICKERS", "50"))
+
+def technical_response(ticker: str, result: Dict) -> TechnicalResponse:
+    """Build the /api/technical response from calculated indicators"""
+    indicators = TechnicalIndicators(
+        macd=result["indicators"]["macd"],
+        signal=result["indicators"]["signal"],
+        rsi=result["indicators"]["rsi"],
+        sma_20=result["indicators"]["sma_20"],
+        sma_50=result["indicators"]["sma_50"],
+        bollinger_upper=result["indicators"]["bollinger_upper"],
+        bollinger_lower=result["indicators"]["bollinger_lower"]
+    )
+
+    return TechnicalResponse(
+        ticker=ticker.upper(),
+        indicators=indicators,
+        trend=result["trend"],
+        strength=result["strength"],
+        signals=result["signals"]
+    )
+
+# Extra history loaded before a series start so long windows (sma_200) are warm
+SERIES_WARMUP_DAYS = int(os.getenv("SERIES_WARMUP_DAYS", "300"))
+SERIES_FORMATS = ("json", "msgpack")
+
+def parse_date_param(name: str, value: Optional[str]) -> Optional[pd.Timestamp]:
+    """Parse an optional date/datetime query parameter"""
+    if value is None:
+        return None
+    try:
+        return pd.Timestamp(value)
+    except ValueError:
+        raise InvalidParameterError(name, f"Not a valid date: {value}")
+
+def load_series_history(ticker: str, start: pd.Timestamp) -> pd.DataFrame:
+    """History from SERIES_WARMUP_DAYS before start, from one bar store read"""
+    period = period_covering(start - pd.DateOffset(days=SERIES_WARMUP_DAYS))
+    hist = bar_store.get_history(ticker, period=period)
+    if hist.empty:
+        raise ValueError(f"No data available for {ticker}")
+    return hist
+
 # ============================================
 # API Endpoints
 # ============================================
@@ -181,6 +267,7 @@ async def root():
             "stock_price": "/api/stock/{ticker}",
             "fundamental": "/api/fundamental/{ticker}",
             "technical": "/api/technical/{ticker}",
+            "technical_series": "/api/technical/{ticker}/series",
             "news": "/api/news/{ticker}"
         },
         "advanced_features": {
@@ -197,69 +284,130 @@ async def root():
         "features_status": "/api/features/status"
     }
 
+async def load_stock_price(ticker: str) -> Dict:
+    """Fetch current stock price and basic info from upstream"""
+    info, hist = await asyncio.gather(
+        upstream_executor.run(market_data.get_info, ticker),
+        upstream_executor.run(bar_store.get_history, ticker, period="1mo")
+    )
+
+    if hist.empty:
+        raise HTTPException(status_code=404, detail=f"Stock {ticker} not found")
+
+    current_price = float(hist['Close'].iloc[-1])
+    prev_close_1d = float(hist['Close'].iloc[-2]) if len(hist) > 1 else current_price
+    prev_close_1w = float(hist['Close'].iloc[-5]) if len(hist) > 5 else current_price
+
+    return StockPriceResponse(
+        ticker=ticker.upper(),
+        current_price=current_price,
+        price_change_1d=((current_price - prev_close_1d) / prev_close_1d) * 100,
+        price_change_1w=((current_price - prev_close_1w) / prev_close_1w) * 100,
+        volume=int(hist['Volume'].iloc[-1]),
+        market_cap=info.get('marketCap'),
+        last_updated=datetime.now().isoformat()
+    ).model_dump()
+
 @app.get("/api/stock/{ticker}", response_model=StockPriceResponse)
 async def get_stock_price(ticker: str):
-    """Get current stock price and basic info"""
+    """Get current stock price and basic info (stale-while-revalidate cached)"""
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        hist = stock.history(period="1mo")
-
-        if hist.empty:
-            raise HTTPException(status_code=404, detail=f"Stock {ticker} not found")
-
-        current_price = float(hist['Close'].iloc[-1])
-        prev_close_1d = float(hist['Close'].iloc[-2]) if len(hist) > 1 else current_price
-        prev_close_1w = float(hist['Close'].iloc[-5]) if len(hist) > 5 else current_price
-
-        return StockPriceResponse(
-            ticker=ticker.upper(),
-            current_price=current_price,
-            price_change_1d=((current_price - prev_close_1d) / prev_close_1d) * 100,
-            price_change_1w=((current_price - prev_close_1w) / prev_close_1w) * 100,
-            volume=int(hist['Volume'].iloc[-1]),
-            market_cap=info.get('marketCap'),
-            last_updated=datetime.now().isoformat()
+        data = await cache_manager.aget_or_load(
+            f"stock_price:{ticker.upper()}",
+            lambda: load_stock_price(ticker),
+            CacheTTL.STOCK_PRICE,
+            tags=[ticker_tag(ticker)]
         )
+        return StockPriceResponse(**data)
 
+    except NexusAlphaException as e:
+        raise e.to_http_exception()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def load_fundamental_analysis(ticker: str) -> Dict:
+    """Fetch fundamental analysis data from upstream"""
+    info = await upstream_executor.run(market_data.get_info, ticker)
+
+    # Extract financial ratios
+    ratios = FinancialRatios(
+        roe=info.get('returnOnEquity'),
+        roa=info.get('returnOnAssets'),
+        pe_ratio=info.get('trailingPE'),
+        pb_ratio=info.get('priceToBook'),
+        debt_to_equity=info.get('debtToEquity'),
+        current_ratio=info.get('currentRatio')
+    )
+
+    # Basic recommendation logic
+    recommendation = "HOLD"
+    if ratios.pe_ratio and ratios.pe_ratio < 15:
+        recommendation = "BUY - Undervalued (Low P/E)"
+    elif ratios.pe_ratio and ratios.pe_ratio > 30:
+        recommendation = "SELL - Overvalued (High P/E)"
+
+    return FundamentalResponse(
+        ticker=ticker.upper(),
+        company_name=info.get('longName', ticker),
+        sector=info.get('sector', 'Unknown'),
+        ratios=ratios,
+        revenue=info.get('totalRevenue'),
+        net_income=info.get('netIncomeToCommon'),
+        total_assets=info.get('totalAssets'),
+        recommendation=recommendation
+    ).model_dump()
+
 @app.get("/api/fundamental/{ticker}", response_model=FundamentalResponse)
 async def get_fundamental_analysis(ticker: str):
-    """Get fundamental analysis data"""
+    """Get fundamental analysis data (stale-while-revalidate cached)"""
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
-
-        # Extract financial ratios
-        ratios = FinancialRatios(
-            roe=info.get('returnOnEquity'),
-            roa=info.get('returnOnAssets'),
-            pe_ratio=info.get('trailingPE'),
-            pb_ratio=info.get('priceToBook'),
-            debt_to_equity=info.get('debtToEquity'),
-            current_ratio=info.get('currentRatio')
+        data = await cache_manager.aget_or_load(
+            f"fundamental:{ticker.upper()}",
+            lambda: load_fundamental_analysis(ticker),
+            CacheTTL.FUNDAMENTAL,
+            tags=[ticker_tag(ticker)],
+            persist="fundamental"
         )
+        return FundamentalResponse(**data)
 
-        # Basic recommendation logic
-        recommendation = "HOLD"
-        if ratios.pe_ratio and ratios.pe_ratio < 15:
-            recommendation = "BUY - Undervalued (Low P/E)"
-        elif ratios.pe_ratio and ratios.pe_ratio > 30:
-            recommendation = "SELL - Overvalued (High P/E)"
-
-        return FundamentalResponse(
-            ticker=ticker.upper(),
-            company_name=info.get('longName', ticker),
-            sector=info.get('sector', 'Unknown'),
-            ratios=ratios,
-            revenue=info.get('totalRevenue'),
-            net_income=info.get('netIncomeToCommon'),
-            total_assets=info.get('totalAssets'),
-            recommendation=recommendation
+    except NexusAlphaException as e:
+        raise e.to_http_exception()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/technical/batch", response_model=List[TechnicalResponse])
+async def get_technical_analysis_batch(tickers: str):
+    """Technical analysis for many tickers (comma-separated), computed in one vectorized pass"""
+    try:
+        symbols = list(dict.fromkeys(t.strip().upper() for t in tickers.split(",") if t.strip()))
+        if not symbols:
+            raise InvalidParameterError("tickers", "At least one ticker is required")
+        if len(symbols) > MAX_BATCH_TICKERS:
+            raise InvalidParameterError("tickers", f"At most {MAX_BATCH_TICKERS} tickers per request")
+
+        # Fresh persisted rows are served as the single-ticker endpoint serves them
+        results = {}
+        if TECHNICAL_STORE_ENABLED:
+            results = await upstream_executor.run(stored_technical_indicators, symbols)
+        missing = [symbol for symbol in symbols if symbol not in results]
+
+        histories = await asyncio.gather(
+            *[upstream_executor.run(bar_store.get_history, symbol, INDICATOR_WARMUP_PERIOD) for symbol in missing],
+            return_exceptions=True
         )
+        # Tickers without data are left out of the response
+        closes = {
+            symbol: hist['Close']
+            for symbol, hist in zip(missing, histories)
+            if not isinstance(hist, Exception) and not hist.empty
+        }
+        # One vectorized pass over the aligned close matrix
+        if closes:
+            results.update(await compute_executor.run(analyze_closes, closes))
+        return [technical_response(symbol, results[symbol]) for symbol in symbols if symbol in results]
 
+    except NexusAlphaException as e:
+        raise e.to_http_exception()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -267,26 +415,67 @@ async def get_fundamental_analysis(ticker: str):
 async def get_technical_analysis(ticker: str):
     """Get technical analysis with indicators"""
     try:
-        result = calculate_technical_indicators(ticker)
-
-        indicators = TechnicalIndicators(
-            macd=result["indicators"]["macd"],
-            signal=result["indicators"]["signal"],
-            rsi=result["indicators"]["rsi"],
-            sma_20=result["indicators"]["sma_20"],
-            sma_50=result["indicators"]["sma_50"],
-            bollinger_upper=result["indicators"]["bollinger_upper"],
-            bollinger_lower=result["indicators"]["bollinger_lower"]
-        )
+        result = await calculate_technical_indicators(ticker)
+        return technical_response(ticker, result)
 
-        return TechnicalResponse(
-            ticker=ticker.upper(),
-            indicators=indicators,
-            trend=result["trend"],
-            strength=result["strength"],
-            signals=result["signals"]
-        )
+    except NexusAlphaException as e:
+        raise e.to_http_exception()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/technical/{ticker}/series")
+async def get_technical_series(
+    ticker: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    indicators: Optional[str] = None,
+    format: str = "json"
+):
+    """
+    Indicator time series, column-oriented: shared epoch-second timestamps
+    and one array per indicator (default range: the last year)
+    """
+    try:
+        if format not in SERIES_FORMATS:
+            raise InvalidParameterError("format", f"Must be one of: {', '.join(SERIES_FORMATS)}")
+        if format == "msgpack" and not MSGPACK_AVAILABLE:
+            raise InvalidParameterError("format", "msgpack encoding is not available on this server")
+
+        columns = None
+        if indicators:
+            columns = list(dict.fromkeys(name.strip() for name in indicators.split(",") if name.strip()))
+            unknown = [name for name in columns if name not in INDICATOR_COLUMNS]
+            if unknown:
+                raise InvalidParameterError(
+                    "indicators",
+                    f"Unknown indicators: {', '.join(unknown)} (available: {', '.join(INDICATOR_COLUMNS)})"
+                )
+
+        start_ts = parse_date_param("start", start)
+        end_ts = parse_date_param("end", end)
+        if start_ts is None:
+            start_ts = (end_ts or pd.Timestamp.now(tz="UTC")) - pd.DateOffset(years=1)
+        if end_ts is not None and start_ts.tz_localize(None) > end_ts.tz_localize(None):
+            raise InvalidParameterError("start", "Must not be after end")
+
+        hist = await upstream_executor.run(load_series_history, ticker, start_ts)
+        series = await compute_executor.run(indicator_series, hist, start_ts, end_ts, columns)
+        payload = {"ticker": ticker.upper(), **series}
+
+        if format == "msgpack":
+            import msgpack
+            return Response(content=msgpack.packb(payload, use_bin_type=True), media_type="application/msgpack")
+
+        # JSON has no NaN: warm-up gaps become null
+        payload["close"] = [None if v != v else v for v in payload["close"]]
+        payload["indicators"] = {
+            name: [None if v != v else v for v in values]
+            for name, values in payload["indicators"].items()
+        }
+        return payload
+
+    except NexusAlphaException as e:
+        raise e.to_http_exception()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -294,8 +483,7 @@ async def get_technical_analysis(ticker: str):
 async def get_news_analysis(ticker: str):
     """Get news data for ticker"""
     try:
-        stock = yf.Ticker(ticker)
-        news = stock.news
+        news = await upstream_executor.run(market_data.get_news, ticker)
 
         return {
             "ticker": ticker.upper(),
@@ -303,6 +491,8 @@ async def get_news_analysis(ticker: str):
             "count": len(news)
         }
 
+    except NexusAlphaException as e:
+        raise e.to_http_exception()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -314,6 +504,36 @@ async def health_check():
         "timestamp": datetime.now().isoformat()
     }
 
+@app.delete("/api/admin/cache/ticker/{ticker}")
+async def invalidate_ticker(ticker: str):
+    """Drop every cached entry derived from ticker (e.g. after a corporate action)"""
+    removed = invalidate_ticker_cache(ticker)
+    return {"ticker": ticker.upper(), "invalidated": removed}
+
+@app.get("/api/admin/cache/stats")
+async def get_cache_stats():
+    """Per-namespace cache counters and latency histograms"""
+    stats = cache_manager.get_stats()
+    stats["prefetch"] = prefetcher.get_stats()
+    stats["durable"] = durable_cache.get_stats()
+    return stats
+
+@app.delete("/api/admin/cache/stats")
+async def reset_cache_stats():
+    """Reset per-namespace telemetry (start a fresh measurement window)"""
+    cache_manager.telemetry.reset()
+    return {"reset": True}
+
+@app.get("/api/market-data/stats")
+async def get_market_data_stats():
+    """Upstream request coalescing and executor utilization statistics"""
+    stats = market_data.get_stats()
+    stats["executor"] = upstream_executor.get_stats()
+    stats["compute"] = compute_executor.get_stats()
+    stats["prefetch"] = prefetcher.get_stats()
+    stats["technical_store"] = technical_store.get_stats()
+    return stats
+
 # ============================================
 # AI-Powered Report Generation (OpenAI)
 # ============================================
@@ -355,14 +575,12 @@ class AIReport(BaseModel):
     recommendation: str
     generated_at: str
 
-@app.post("/api/ai-report", response_model=AIReport)
-async def generate_ai_report(request: AIReportRequest):
+async def build_ai_report(request: AIReportRequest) -> dict:
     """Generate AI-powered investment report using OpenAI"""
 
-    try:
-        if AI_ENABLED:
-            # Generate report using OpenAI
-            prompt = f"""
+    if AI_ENABLED:
+        # Generate report using OpenAI
+        prompt = f"""
 You are an expert financial analyst. Generate a professional investment report for {request.company_name} ({request.ticker}).
 
 Company Details:
@@ -393,64 +611,79 @@ Provide your analysis in the following JSON format:
 Be concise and data-driven. Focus on the macro impacts relevant to {request.sector}.
 """
 
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a professional financial analyst. Always respond with valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=1000,
-                response_format={"type": "json_object"}
-            )
-
-            import json
-            report_data = json.loads(response.choices[0].message.content)
-
-            return AIReport(
-                ticker=request.ticker,
-                title=f"{request.company_name} Investment Analysis Report",
-                summary=report_data.get("summary", ""),
-                sentiment=report_data.get("sentiment", "neutral"),
-                confidence=report_data.get("confidence", 0.5),
-                key_points=report_data.get("key_points", []),
-                macro_impact_analysis=report_data.get("macro_impact", {}),
-                recommendation=report_data.get("recommendation", "HOLD"),
-                generated_at=datetime.now().isoformat()
-            )
-
-        else:
-            # Fallback: Generate simulated response
-            sentiments = ["bullish", "neutral", "bearish"]
-            sentiment = sentiments[hash(request.ticker) % 3]
-
-            # Determine sentiment based on macro factors
-            if request.sector == "BANKING" and request.interest_rate > 3:
-                sentiment = "bullish"
-            elif request.sector == "MANUFACTURING" and request.tariff_rate > 20:
-                sentiment = "bearish"
-            elif request.sector == "SEMICONDUCTOR" and request.fx_rate < 1100:
-                sentiment = "bullish"
-
-            return AIReport(
-                ticker=request.ticker,
-                title=f"{request.company_name} Investment Analysis Report",
-                summary=f"{request.company_name} ({request.ticker}) in {request.sector} sector shows {sentiment} indicators based on current macro environment. Interest rates at {request.interest_rate}% and tariff rates at {request.tariff_rate}% suggest {sentiment.upper()} positioning.",
-                sentiment=sentiment,
-                confidence=0.75,
-                key_points=[
-                    f"Company operates in {request.sector} sector",
-                    f"Current macro environment: Rates {request.interest_rate}%, Tariffs {request.tariff_rate}%",
-                    f"FX rate at {request.fx_rate} KRW/USD impacts export competitiveness"
-                ],
-                macro_impact_analysis={
-                    "rate_impact": "Higher rates impact borrowing costs and consumer spending",
-                    "tariff_impact": f"Tariff rate of {request.tariff_rate}% affects {request.sector} competitiveness",
-                    "fx_impact": f"FX rate at {request.fx_rate} impacts export margins"
-                },
-                recommendation=f"{'BUY - Strong fundamentals in current macro environment' if sentiment == 'bullish' else 'HOLD - Monitor macro changes' if sentiment == 'neutral' else 'SELL - Headwinds in current environment'}",
-                generated_at=datetime.now().isoformat()
-            )
+        response = client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": "You are a professional financial analyst. Always respond with valid JSON."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.7,
+            max_tokens=1000,
+            response_format={"type": "json_object"}
+        )
+
+        import json
+        report_data = json.loads(response.choices[0].message.content)
+
+        return AIReport(
+            ticker=request.ticker,
+            title=f"{request.company_name} Investment Analysis Report",
+            summary=report_data.get("summary", ""),
+            sentiment=report_data.get("sentiment", "neutral"),
+            confidence=report_data.get("confidence", 0.5),
+            key_points=report_data.get("key_points", []),
+            macro_impact_analysis=report_data.get("macro_impact", {}),
+            recommendation=report_data.get("recommendation", "HOLD"),
+            generated_at=datetime.now().isoformat()
+        ).model_dump()
+
+    else:
+        # Fallback: Generate simulated response
+        sentiments = ["bullish", "neutral", "bearish"]
+        sentiment = sentiments[hash(request.ticker) % 3]
+
+        # Determine sentiment based on macro factors
+        if request.sector == "BANKING" and request.interest_rate > 3:
+            sentiment = "bullish"
+        elif request.sector == "MANUFACTURING" and request.tariff_rate > 20:
+            sentiment = "bearish"
+        elif request.sector == "SEMICONDUCTOR" and request.fx_rate < 1100:
+            sentiment = "bullish"
+
+        return AIReport(
+            ticker=request.ticker,
+            title=f"{request.company_name} Investment Analysis Report",
+            summary=f"{request.company_name} ({request.ticker}) in {request.sector} sector shows {sentiment} indicators based on current macro environment. Interest rates at {request.interest_rate}% and tariff rates at {request.tariff_rate}% suggest {sentiment.upper()} positioning.",
+            sentiment=sentiment,
+            confidence=0.75,
+            key_points=[
+                f"Company operates in {request.sector} sector",
+                f"Current macro environment: Rates {request.interest_rate}%, Tariffs {request.tariff_rate}%",
+                f"FX rate at {request.fx_rate} KRW/USD impacts export competitiveness"
+            ],
+            macro_impact_analysis={
+                "rate_impact": "Higher rates impact borrowing costs and consumer spending",
+                "tariff_impact": f"Tariff rate of {request.tariff_rate}% affects {request.sector} competitiveness",
+                "fx_impact": f"FX rate at {request.fx_rate} impacts export margins"
+            },
+            recommendation=f"{'BUY - Strong fundamentals in current macro environment' if sentiment == 'bullish' else 'HOLD - Monitor macro changes' if sentiment == 'neutral' else 'SELL - Headwinds in current environment'}",
+            generated_at=datetime.now().isoformat()
+        ).model_dump()
+
+@app.post("/api/ai-report", response_model=AIReport)
+async def generate_ai_report(request: AIReportRequest):
+    """Generate AI-powered investment report (cached per request, persisted across restarts)"""
+
+    try:
+        request_hash = hashlib.md5(request.model_dump_json().encode()).hexdigest()
+        data = await cache_manager.aget_or_load(
+            f"ai_report:{request.ticker.upper()}:{request_hash}",
+            lambda: build_ai_report(request),
+            CacheTTL.AI_REPORT,
+            tags=[ticker_tag(request.ticker)],
+            persist="ai_report"
+        )
+        return AIReport(**data)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating AI report: {str(e)}")
@@ -507,19 +740,29 @@ async def get_trading_agents_analysis(ticker: str, date: Optional[str] = None):
         if date is None:
             date = datetime.now().strftime("%Y-%m-%d")
 
-        # Run TradingAgents analysis
-        state, decision = ta.propagate(ticker, date)
-
-        return TradingAgentsAnalysis(
-            ticker=ticker.upper(),
-            date=date,
-            decision=decision,
-            confidence=state.get("confidence", 0.5),
-            fundamental_analysis=state.get("fundamental_analyst_report"),
-            technical_analysis=state.get("technical_analyst_report"),
-            news_analysis=state.get("news_analyst_report"),
-            final_recommendation=state.get("final_recommendation")
+        async def run_analysis() -> dict:
+            # Run TradingAgents analysis
+            state, decision = ta.propagate(ticker, date)
+
+            return TradingAgentsAnalysis(
+                ticker=ticker.upper(),
+                date=date,
+                decision=decision,
+                confidence=state.get("confidence", 0.5),
+                fundamental_analysis=state.get("fundamental_analyst_report"),
+                technical_analysis=state.get("technical_analyst_report"),
+                news_analysis=state.get("news_analyst_report"),
+                final_recommendation=state.get("final_recommendation")
+            ).model_dump()
+
+        data = await cache_manager.aget_or_load(
+            f"trading_agents:{ticker.upper()}:{date}",
+            run_analysis,
+            CacheTTL.TRADING_AGENTS,
+            tags=[ticker_tag(ticker)],
+            persist="trading_agents"
         )
+        return TradingAgentsAnalysis(**data)
 
     except Exception as e:
         raise HTTPException(
@@ -553,6 +796,71 @@ except ImportError as e:
 except Exception as e:
     print(f"⚠️  Error loading extended features: {str(e)}")
 
+prefetcher.register(
+    "stock", load_stock_price, lambda t: f"stock_price:{t.upper()}", CacheTTL.STOCK_PRICE
+)
+prefetcher.register(
+    "fundamental", load_fundamental_analysis, lambda t: f"fundamental:{t.upper()}",
+    CacheTTL.FUNDAMENTAL, persist="fundamental"
+)
+prefetch_task: Optional[asyncio.Task] = None
+durable_cache_writer: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def start_durable_cache():
+    """Preload persisted analyses and start the write-behind task"""
+    global durable_cache_writer
+    if not DURABLE_CACHE_ENABLED:
+        return
+    try:
+        await asyncio.to_thread(durable_cache.purge_expired)
+        loaded = await asyncio.to_thread(durable_cache.preload, cache_manager)
+        cache_manager.durable_store = durable_cache
+        durable_cache_writer = asyncio.create_task(durable_cache.run_writer())
+        print(f"✅ Durable cache preloaded ({loaded} entries)")
+    except Exception as e:
+        print(f"⚠️  Durable cache not available: {str(e)}")
+
+@app.on_event("startup")
+async def start_prefetcher():
+    """Warm the hot set, then keep it refreshed ahead of expiry"""
+    global prefetch_task
+    if not PREFETCH_ENABLED:
+        return
+
+    async def warm_then_refresh():
+        await cache_warmup()
+        await prefetcher.run()
+
+    # Registered after the durable cache so warmed entries are persisted too;
+    # runs in the background so startup doesn't wait on upstream
+    prefetch_task = asyncio.create_task(warm_then_refresh())
+
+@app.on_event("shutdown")
+async def stop_prefetcher():
+    if prefetch_task is not None:
+        prefetch_task.cancel()
+        await prefetcher.snapshot()
+
+@app.on_event("shutdown")
+async def stop_durable_cache():
+    if durable_cache_writer is not None:
+        durable_cache_writer.cancel()
+        try:
+            await durable_cache_writer
+        except asyncio.CancelledError:
+            pass
+
+@app.on_event("shutdown")
+async def shutdown_upstream_executor():
+    upstream_executor.shutdown()
+    compute_executor.shutdown()
+
+@app.on_event("shutdown")
+async def close_cache_invalidation_bus():
+    if cache_manager.bus is not None:
+        cache_manager.bus.close()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,347 @@
+"""
+Market data provider shared by all backend endpoints
+Coalesces concurrent upstream (yfinance) requests for the same data
+and runs blocking upstream I/O on a bounded thread pool
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+import yfinance as yf
+
+from cache import CacheTTL, cache_manager, namespace_tag, ticker_tag
+from exceptions import UpstreamBusyError, UpstreamTimeoutError
+
+UPSTREAM_MAX_WORKERS = int(os.getenv("UPSTREAM_MAX_WORKERS", "16"))
+UPSTREAM_MAX_QUEUE = int(os.getenv("UPSTREAM_MAX_QUEUE", "64"))
+UPSTREAM_TIMEOUT = float(os.getenv("YFINANCE_TIMEOUT", "30"))
+
+
+# ============================================
+# Single-flight request coalescing
+# ============================================
+
+class _InFlightCall:
+    """One upstream call that concurrent callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; duplicates share its result"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _InFlightCall] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> tuple:
+        """Execute fn for key, returns (result, shared)"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                leader = False
+            else:
+                call = _InFlightCall()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result, False
+
+    def in_flight(self) -> int:
+        """Number of keys currently being fetched"""
+        with self._lock:
+            return len(self._calls)
+
+
+# ============================================
+# Market Data Provider
+# ============================================
+
+class MarketDataProvider:
+    """Single entry point for upstream market data (info, history, news)"""
+
+    def __init__(
+        self,
+        ticker_factory: Callable[[str], Any] = yf.Ticker,
+        download_fn: Callable[..., Any] = yf.download
+    ):
+        self.ticker_factory = ticker_factory
+        self.download_fn = download_fn
+        self._flight = SingleFlight()
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def _fetch(self, key: tuple, fn: Callable[[], Any]) -> Any:
+        """Route an upstream call through single-flight and record counters"""
+        with self._stats_lock:
+            self.requests += 1
+
+        def upstream():
+            with self._stats_lock:
+                self.upstream_calls += 1
+            return fn()
+
+        try:
+            result, shared = self._flight.do(key, upstream)
+        except Exception:
+            with self._stats_lock:
+                self.errors += 1
+            raise
+
+        if shared:
+            with self._stats_lock:
+                self.coalesced += 1
+        return result
+
+    def get_info(self, ticker: str) -> Dict[str, Any]:
+        """Get quote/fundamental info dict for ticker"""
+        ticker = ticker.upper()
+        return self._fetch(
+            (ticker, "info", None),
+            lambda: self.ticker_factory(ticker).info
+        )
+
+    def get_history(
+        self,
+        ticker: str,
+        period: Optional[str] = "1mo",
+        interval: str = "1d",
+        start: Optional[Any] = None
+    ):
+        """Get OHLCV history DataFrame for ticker (by period, or from start onwards)"""
+        ticker = ticker.upper()
+        if start is not None:
+            return self._fetch(
+                (ticker, "history", f"start={start}", interval),
+                lambda: self.ticker_factory(ticker).history(start=start, interval=interval)
+            )
+        return self._fetch(
+            (ticker, "history", period, interval),
+            lambda: self.ticker_factory(ticker).history(period=period, interval=interval)
+        )
+
+    def _download_last_prices(self, tickers: List[str]) -> Dict[str, float]:
+        """One batched download for many tickers, returns last close per ticker"""
+        frame = self.download_fn(
+            tickers,
+            period="5d",
+            interval="1d",
+            group_by="column",
+            progress=False,
+            threads=True
+        )
+        if frame is None or frame.empty:
+            return {}
+
+        close = frame["Close"]
+        if not hasattr(close, "columns"):  # single ticker without ticker level
+            close = close.to_frame(name=tickers[0])
+
+        last = close.ffill().iloc[-1]
+        return {
+            str(ticker).upper(): float(price)
+            for ticker, price in last.items()
+            if price == price  # skip NaN
+        }
+
+    def get_last_prices(self, tickers: Iterable[str]) -> Dict[str, float]:
+        """Get last prices for distinct tickers from the quote cache or one batched fetch"""
+        tickers = sorted({t.upper() for t in tickers})
+        cached = cache_manager.get_many([f"quote:{ticker}" for ticker in tickers], CacheTTL.QUOTE.namespace)
+        prices: Dict[str, float] = {
+            key.split(":", 1)[1]: value for key, value in cached.items()
+        }
+        missing = [ticker for ticker in tickers if ticker not in prices]
+
+        if missing:
+            fetched = self._fetch(
+                ("quotes", tuple(missing)),
+                lambda: self._download_last_prices(missing)
+            )
+            for ticker, price in fetched.items():
+                cache_manager.set(
+                    f"quote:{ticker}", price, CacheTTL.QUOTE.seconds,
+                    [namespace_tag(CacheTTL.QUOTE), ticker_tag(ticker)]
+                )
+            prices.update(fetched)
+
+        return prices
+
+    def get_news(self, ticker: str) -> list:
+        """Get latest news items for ticker"""
+        ticker = ticker.upper()
+        return self._fetch(
+            (ticker, "news", None),
+            lambda: self.ticker_factory(ticker).news
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request coalescing statistics"""
+        with self._stats_lock:
+            requests = self.requests
+            upstream_calls = self.upstream_calls
+            coalesced = self.coalesced
+            errors = self.errors
+
+        return {
+            "requests": requests,
+            "upstream_calls": upstream_calls,
+            "coalesced": coalesced,
+            "errors": errors,
+            "in_flight": self._flight.in_flight(),
+            "saved_ratio": (coalesced / requests) if requests > 0 else 0.0
+        }
+
+    def reset_stats(self):
+        """Reset counters"""
+        with self._stats_lock:
+            self.requests = 0
+            self.upstream_calls = 0
+            self.coalesced = 0
+            self.errors = 0
+
+
+# ============================================
+# Bounded executor for blocking upstream I/O
+# ============================================
+
+class UpstreamExecutor:
+    """Thread pool for blocking upstream calls with timeout and queue cap"""
+
+    def __init__(
+        self,
+        max_workers: int = UPSTREAM_MAX_WORKERS,
+        max_queue: int = UPSTREAM_MAX_QUEUE,
+        timeout: float = UPSTREAM_TIMEOUT
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upstream")
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+
+        self.pending = 0  # submitted and not yet finished (queued + running)
+        self.active = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.busy_seconds = 0.0
+        self.queue_wait_seconds = 0.0
+
+    def _invoke(self, submitted_at: float, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        """Run fn on a worker thread, tracking busy and queue-wait time"""
+        started = time.monotonic()
+        with self._lock:
+            self.active += 1
+            self.queue_wait_seconds += started - submitted_at
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.busy_seconds += time.monotonic() - started
+
+    def _on_done(self, future):
+        """Release the queue slot once the worker finishes or the call is cancelled"""
+        with self._lock:
+            self.pending -= 1
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Await fn(*args, **kwargs) on the pool without blocking the event loop"""
+        with self._lock:
+            if self.pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise UpstreamBusyError("yfinance", self.max_queue)
+            self.pending += 1
+            self.submitted += 1
+
+        try:
+            future = self._pool.submit(self._invoke, time.monotonic(), fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self.pending -= 1
+            raise
+        future.add_done_callback(self._on_done)
+
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            # A call that already started keeps its worker until it returns;
+            # its slot stays counted in pending until then.
+            with self._lock:
+                self.timeouts += 1
+            raise UpstreamTimeoutError("yfinance", timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool utilization statistics"""
+        with self._lock:
+            elapsed = time.monotonic() - self._started_at
+            started = self.completed + self.failed + self.active
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "timeout": self.timeout,
+                "active": self.active,
+                "queued": max(self.pending - self.active, 0),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "utilization": self.active / self.max_workers,
+                "avg_utilization": (
+                    self.busy_seconds / (elapsed * self.max_workers) if elapsed > 0 else 0.0
+                ),
+                "avg_queue_wait_ms": (
+                    self.queue_wait_seconds / started * 1000 if started > 0 else 0.0
+                )
+            }
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting work and release worker threads"""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+# ============================================
+# Global provider instances
+# ============================================
+
+market_data = MarketDataProvider()
+upstream_executor = UpstreamExecutor()
@@ -0,0 +1,151 @@
+"""
+Backtest strategies
+A strategy turns aligned OHLCV arrays (assets × bars) into target
+positions of the same shape; every strategy then runs through the same
+vectorized execution and metrics core in backtest.py
+"""
+
+from typing import Callable, Dict, List, Protocol, Union
+
+import numpy as np
+import pandas as pd
+
+from backtest import ma_crossover
+from indicators import bollinger, macd, rsi
+
+Number = Union[int, float]
+Bars = Dict[str, np.ndarray]  # open/high/low/close/volume, each assets × bars
+
+BAR_FIELDS = {"Open": "open", "High": "high", "Low": "low", "Close": "close", "Volume": "volume"}
+
+
+class Strategy(Protocol):
+    """Anything with a name, parameter defaults and a positions() function"""
+
+    name: str
+    description: str
+    defaults: Dict[str, Number]
+
+    def positions(self, bars: Bars, **params: Number) -> np.ndarray:
+        """Target position per asset and bar (1 long, 0 flat, -1 short, fractions allowed)"""
+        ...
+
+
+class FunctionStrategy:
+    """Strategy backed by a plain positions function"""
+
+    def __init__(self, name: str, description: str, fn: Callable[..., np.ndarray], defaults: Dict[str, Number]):
+        self.name = name
+        self.description = description
+        self.defaults = defaults
+        self._fn = fn
+
+    def positions(self, bars: Bars, **params: Number) -> np.ndarray:
+        return self._fn(bars, **params)
+
+
+STRATEGIES: Dict[str, Strategy] = {}
+
+
+def register_strategy(strategy: Strategy) -> Strategy:
+    """Add a strategy to the registry (replacing one with the same name)"""
+    STRATEGIES[strategy.name] = strategy
+    return strategy
+
+
+def strategy(name: str, description: str, **defaults: Number):
+    """Decorator registering a positions function as a strategy"""
+    def decorator(fn: Callable[..., np.ndarray]) -> Callable[..., np.ndarray]:
+        register_strategy(FunctionStrategy(name, description, fn, defaults))
+        return fn
+    return decorator
+
+
+def resolve_params(strategy: Strategy, params: Dict[str, Number]) -> Dict[str, Number]:
+    """
+    Defaults overridden by params, cast to the defaults' types
+
+    Raises ValueError on unknown names and on integer (window) parameters
+    that are fractional or below 1.
+    """
+    unknown = [name for name in params if name not in strategy.defaults]
+    if unknown:
+        raise ValueError(
+            f"Unknown parameters for {strategy.name}: {', '.join(unknown)} "
+            f"(available: {', '.join(strategy.defaults)})"
+        )
+    resolved = dict(strategy.defaults)
+    for name, value in params.items():
+        if isinstance(strategy.defaults[name], int) and not float(value).is_integer():
+            raise ValueError(f"{name} must be a whole number")
+        resolved[name] = type(strategy.defaults[name])(value)
+        if isinstance(resolved[name], int) and resolved[name] < 1:
+            raise ValueError(f"{name} must be at least 1")
+    return resolved
+
+
+def strategy_label(strategy: Strategy, params: Dict[str, Number]) -> str:
+    """Human-readable name with parameters, e.g. "rsi_mean_reversion(window=14, ...)" """
+    return f"{strategy.name}({', '.join(f'{k}={v}' for k, v in params.items())})"
+
+
+# ============================================
+# Bars
+# ============================================
+
+def bars_from_frames(frames: List[pd.DataFrame]) -> Bars:
+    """Align yfinance-shaped frames on their combined index (forward-filled)"""
+    index = frames[0].index
+    for frame in frames[1:]:
+        index = index.union(frame.index)
+    bars = {}
+    for column, field in BAR_FIELDS.items():
+        aligned = pd.concat(
+            [frame[column].reindex(index) for frame in frames], axis=1
+        ).ffill()
+        bars[field] = aligned.to_numpy(dtype=np.float64).T
+    bars["ts"] = index.asi8
+    return bars
+
+
+def hold(enter: np.ndarray, exit: np.ndarray) -> np.ndarray:
+    """1 from each enter bar until the next exit bar, 0 otherwise (enter wins ties)"""
+    event = np.where(enter, 1.0, np.where(exit, 0.0, np.nan))
+    has_event = ~np.isnan(event)
+    last = np.maximum.accumulate(np.where(has_event, np.arange(event.shape[1]), 0), axis=1)
+    held = np.take_along_axis(event, last, axis=1)
+    return np.nan_to_num(held, nan=0.0)
+
+
+# ============================================
+# Built-in strategies
+# ============================================
+
+@strategy("ma_crossover", "Long while the fast SMA is above the slow SMA",
+          fast_period=20, slow_period=50)
+def _ma_crossover(bars: Bars, fast_period: int, slow_period: int) -> np.ndarray:
+    return ma_crossover(bars["close"], fast_period, slow_period)
+
+
+@strategy("rsi_mean_reversion", "Buy when RSI falls below lower, sell once it recovers above exit",
+          window=14, lower=30.0, exit=50.0)
+def _rsi_mean_reversion(bars: Bars, window: int, lower: float, exit: float) -> np.ndarray:
+    value = rsi(bars["close"], window)
+    with np.errstate(invalid="ignore"):
+        return hold(value < lower, value > exit)
+
+
+@strategy("bollinger_breakout", "Buy a close above the upper band, sell a close below the middle band",
+          window=20, width=2.0)
+def _bollinger_breakout(bars: Bars, window: int, width: float) -> np.ndarray:
+    upper, middle, _ = bollinger(bars["close"], window, width)
+    with np.errstate(invalid="ignore"):
+        return hold(bars["close"] > upper, bars["close"] < middle)
+
+
+@strategy("macd_cross", "Long while the MACD line is above its signal line",
+          fast=12, slow=26, signal=9)
+def _macd_cross(bars: Bars, fast: int, slow: int, signal: int) -> np.ndarray:
+    line, signal_line = macd(bars["close"], fast, slow, signal)
+    with np.errstate(invalid="ignore"):
+        return (line > signal_line).astype(np.float64)
@@ -0,0 +1,199 @@
+"""
+Technical indicator persistence
+Daily indicator rows are bulk-written to the technical_data table and the
+latest row is served back while it is fresh
+"""
+
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from cache import CacheTTL
+from indicators import INDICATOR_COLUMNS, api_indicators, interpret
+
+TECHNICAL_STORE_ENABLED = os.getenv("ENABLE_DATABASE_PERSISTENCE", "True").lower() == "true"
+TECHNICAL_ROW_MAX_AGE = int(os.getenv("TECHNICAL_ROW_MAX_AGE", str(CacheTTL.TECHNICAL.seconds)))
+
+
+def _default_session_factory():
+    # Imported lazily: database creates the engine and tables on import
+    from database import SessionLocal
+    return SessionLocal()
+
+
+def _default_session_lock():
+    # Shared by every store on SessionLocal (see database.session_lock)
+    from database import session_lock
+    return session_lock
+
+
+def bar_date(ts: int, tz: Any) -> datetime:
+    """Exchange-local (naive) datetime of a bar timestamp in epoch ns"""
+    stamp = pd.Timestamp(int(ts), unit="ns", tz="UTC")
+    if tz is not None:
+        stamp = stamp.tz_convert(tz)
+    return stamp.tz_localize(None).to_pydatetime()
+
+
+def technical_row(date: datetime, values: Dict[str, float], close: float) -> Dict[str, Any]:
+    """technical_data row values for one bar, with trend and strength filled in"""
+    summary = interpret(api_indicators(values, close))
+    row = {
+        column: (float(values[column]) if values[column] == values[column] else None)
+        for column in INDICATOR_COLUMNS
+    }
+    row.update(date=date, trend=summary["trend"], strength=float(summary["strength"]))
+    return row
+
+
+def frame_rows(ohlcv: pd.DataFrame, indicators: pd.DataFrame) -> List[Dict[str, Any]]:
+    """technical_data rows for every bar of an indicator frame"""
+    dates = ohlcv.index.tz_localize(None) if ohlcv.index.tz is not None else ohlcv.index
+    closes = ohlcv["Close"].to_numpy()
+    return [
+        technical_row(dates[i].to_pydatetime(), values, float(closes[i]))
+        for i, values in enumerate(indicators.to_dict("records"))
+    ]
+
+
+class TechnicalStore:
+    """Bulk upserts of daily indicator rows and fresh-row lookups"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Any] = _default_session_factory,
+        max_age: int = TECHNICAL_ROW_MAX_AGE,
+        session_lock: Callable[[], Any] = _default_session_lock
+    ):
+        self.session_factory = session_factory
+        self.session_lock = session_lock
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self.rows_written = 0
+        self.fresh_hits = 0
+        self.misses = 0
+        self.write_errors = 0
+
+    @staticmethod
+    def _stock_id(db, ticker: str, create: bool) -> Optional[int]:
+        from models import Stock
+
+        stock = db.query(Stock).filter(Stock.ticker == ticker).first()
+        if stock is None:
+            if not create:
+                return None
+            # Company details are filled in by whoever first loads fundamentals
+            stock = Stock(ticker=ticker, company_name=ticker)
+            db.add(stock)
+            db.flush()
+        return stock.id
+
+    def write_rows(self, ticker: str, rows: List[Dict[str, Any]]) -> int:
+        """Upsert rows (keyed by stock and date) in one transaction, returns rows written"""
+        if not rows:
+            return 0
+        ticker = ticker.upper()
+        now = datetime.utcnow()
+
+        with self.session_lock():
+            return self._write_rows(ticker, rows, now)
+
+    def _write_rows(self, ticker: str, rows: List[Dict[str, Any]], now: datetime) -> int:
+        from models import TechnicalData
+
+        db = self.session_factory()
+        try:
+            stock_id = self._stock_id(db, ticker, create=True)
+            existing = {
+                row.date: row
+                for row in db.query(TechnicalData)
+                .filter(TechnicalData.stock_id == stock_id)
+                .filter(TechnicalData.date.in_([values["date"] for values in rows]))
+            }
+            inserts = []
+            for values in rows:
+                row = existing.get(values["date"])
+                if row is None:
+                    inserts.append({**values, "stock_id": stock_id, "created_at": now})
+                else:
+                    for column, value in values.items():
+                        setattr(row, column, value)
+                    row.created_at = now
+            if inserts:
+                db.bulk_insert_mappings(TechnicalData, inserts)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            with self._lock:
+                self.write_errors += 1
+            print(f"⚠️  Technical data write failed: {str(e)}")
+            return 0
+        finally:
+            db.close()
+
+        with self._lock:
+            self.rows_written += len(rows)
+        return len(rows)
+
+    def latest(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """Most recent row for ticker if it was computed within max_age, else None"""
+        from models import TechnicalData
+
+        with self.session_lock():
+            db = self.session_factory()
+            try:
+                stock_id = self._stock_id(db, ticker.upper(), create=False)
+                row = None
+                if stock_id is not None:
+                    row = (
+                        db.query(TechnicalData)
+                        .filter(TechnicalData.stock_id == stock_id)
+                        .order_by(TechnicalData.date.desc())
+                        .first()
+                    )
+            except Exception as e:
+                # The caller recomputes; a database outage must not fail the request
+                print(f"⚠️  Technical data read failed: {str(e)}")
+                row = None
+            finally:
+                db.close()
+
+        fresh = (
+            row is not None and row.created_at is not None
+            and datetime.utcnow() - row.created_at <= timedelta(seconds=self.max_age)
+        )
+        with self._lock:
+            if fresh:
+                self.fresh_hits += 1
+            else:
+                self.misses += 1
+        if not fresh:
+            return None
+
+        values = {column: getattr(row, column) for column in INDICATOR_COLUMNS}
+        values.update(date=row.date, trend=row.trend, strength=row.strength)
+        return {
+            name: (float("nan") if value is None and name in INDICATOR_COLUMNS else value)
+            for name, value in values.items()
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get read/write statistics"""
+        with self._lock:
+            return {
+                "enabled": TECHNICAL_STORE_ENABLED,
+                "rows_written": self.rows_written,
+                "fresh_hits": self.fresh_hits,
+                "misses": self.misses,
+                "write_errors": self.write_errors
+            }
+
+
+# ============================================
+# Global technical store instance
+# ============================================
+
+technical_store = TechnicalStore()
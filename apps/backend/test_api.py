@@ -247,6 +247,1398 @@ def test_cache_stats(client):
     assert "hit_rate" in stats["memory_cache"]
 
 
+def test_cache_middleware_serves_cached_body_and_304():
+    """Cached responses replay the body and honor If-None-Match"""
+    from fastapi import FastAPI
+    from cache import CacheMiddleware, CacheTTL
+
+    cache_manager.clear()
+    calls = []
+    mini_app = FastAPI()
+    mini_app.add_middleware(CacheMiddleware)
+
+    @mini_app.get("/api/stock/{ticker}")
+    async def stock(ticker: str):
+        calls.append(ticker)
+        return {"ticker": ticker, "price": 100.0}
+
+    mini_client = TestClient(mini_app)
+    first = mini_client.get("/api/stock/AAPL")
+    second = mini_client.get("/api/stock/AAPL")
+
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert second.json() == first.json() == {"ticker": "AAPL", "price": 100.0}
+    assert calls == ["AAPL"]
+
+    etag = first.headers["etag"]
+    not_modified = mini_client.get("/api/stock/AAPL", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert calls == ["AAPL"]
+
+    assert CacheMiddleware.ttl_for("/api/fundamental/AAPL") == CacheTTL.FUNDAMENTAL
+    assert CacheMiddleware.ttl_for("/api/portfolio/alice") is None
+    cache_manager.clear()
+
+
+def test_cache_result_single_recompute_under_stampede():
+    """Concurrent misses on one key run the function once"""
+    import asyncio
+    from cache import cache_result, CacheTTL
+
+    cache_manager.clear()
+    calls = []
+
+    @cache_result(CacheTTL.TECHNICAL)
+    async def expensive(ticker):
+        calls.append(ticker)
+        await asyncio.sleep(0.05)
+        return {"ticker": ticker}
+
+    async def burst():
+        return await asyncio.gather(*[expensive("AAPL") for _ in range(10)])
+
+    results = asyncio.run(burst())
+    assert calls == ["AAPL"]
+    assert all(r == {"ticker": "AAPL"} for r in results)
+    cache_manager.clear()
+
+
+def test_cache_result_serves_stale_while_one_caller_recomputes():
+    """After expiry, waiting callers get the stale value while one recomputes"""
+    import threading
+    import time
+    from cache import cache_result, CacheTTL, generate_cache_key
+
+    cache_manager.clear()
+    calls = []
+    release = threading.Event()
+
+    @cache_result(CacheTTL.TECHNICAL, stale_ttl=60)
+    def expensive(ticker):
+        calls.append(ticker)
+        if len(calls) > 1:
+            release.wait(1)
+        return len(calls)
+
+    assert expensive("AAPL") == 1
+
+    # Force logical expiry of the cached envelope
+    key = generate_cache_key("expensive", ("AAPL",), {})
+    cache_manager.get(key)["expires_at"] = time.time() - 1
+
+    refresher = threading.Thread(target=expensive, args=("AAPL",))
+    refresher.start()
+    time.sleep(0.05)
+    assert expensive("AAPL") == 1  # stale value, no second recompute
+    release.set()
+    refresher.join()
+
+    assert len(calls) == 2
+    assert expensive("AAPL") == 2
+    cache_manager.clear()
+
+
+def test_cache_manager_stale_while_revalidate():
+    """Between soft and hard TTL the stale value is served and refreshed in the background"""
+    import asyncio
+    import time
+    from cache import CacheManager, CacheTTL
+
+    manager = CacheManager()
+    loads = []
+
+    async def loader():
+        loads.append(time.time())
+        await asyncio.sleep(0.01)
+        return len(loads)
+
+    async def scenario():
+        assert await manager.aget_or_load("stock_price:AAPL", loader, CacheTTL.STOCK_PRICE) == 1
+        assert await manager.aget_or_load("stock_price:AAPL", loader, CacheTTL.STOCK_PRICE) == 1
+        assert len(loads) == 1
+
+        # Past the soft TTL: stale value now, one background refresh
+        manager.memory_cache.get("stock_price:AAPL")["expires_at"] = time.time() - 1
+        assert await manager.aget_or_load("stock_price:AAPL", loader, CacheTTL.STOCK_PRICE) == 1
+        assert await manager.aget_or_load("stock_price:AAPL", loader, CacheTTL.STOCK_PRICE) == 1
+        await asyncio.sleep(0.05)
+        assert len(loads) == 2
+        assert await manager.aget_or_load("stock_price:AAPL", loader, CacheTTL.STOCK_PRICE) == 2
+
+        # Past the hard TTL: the request blocks on the loader
+        manager.delete("stock_price:AAPL")
+        assert await manager.aget_or_load("stock_price:AAPL", loader, CacheTTL.STOCK_PRICE) == 3
+
+    asyncio.run(scenario())
+    assert manager.get_stats()["stale_served"] == 2
+    assert manager.soft_ttl(CacheTTL.STOCK_PRICE) < CacheTTL.STOCK_PRICE.seconds
+
+
+def test_invalidate_ticker_cache_removes_tagged_entries():
+    """Invalidating a ticker drops decorator, SWR and middleware entries for it only"""
+    from cache import cache_result, CacheTTL, invalidate_ticker_cache, ticker_tag
+
+    cache_manager.clear()
+    calls = []
+
+    @cache_result(CacheTTL.TECHNICAL)
+    def indicators(ticker, period="3mo"):
+        calls.append(ticker)
+        return {"ticker": ticker}
+
+    indicators("AAPL")
+    indicators(ticker="MSFT")
+    cache_manager.set("http_/api/stock/AAPL_", {"body": b"{}"}, 60, [ticker_tag("AAPL")])
+
+    assert invalidate_ticker_cache("aapl") == 2
+    assert cache_manager.get("http_/api/stock/AAPL_") is None
+
+    indicators("AAPL")
+    indicators(ticker="MSFT")
+    assert calls == ["AAPL", "MSFT", "AAPL"]
+    cache_manager.clear()
+
+
+def test_batch_cache_entries_tagged_with_every_ticker():
+    """Batch entries (decorator or HTTP middleware) are dropped when any of their tickers is invalidated"""
+    from starlette.requests import Request
+    from cache import CacheMiddleware, cache_result, CacheTTL, invalidate_ticker_cache
+
+    cache_manager.clear()
+    calls = []
+
+    @cache_result(CacheTTL.TECHNICAL)
+    def batch(tickers):
+        calls.append(tickers)
+        return tickers
+
+    batch("AAPL, MSFT")
+    invalidate_ticker_cache("MSFT")
+    batch("AAPL, MSFT")
+    assert len(calls) == 2
+
+    request = Request({"type": "http", "method": "GET", "path": "/api/technical/batch",
+                       "query_string": b"tickers=aapl,%20msft,", "headers": []})
+    assert CacheMiddleware.tickers_for(request) == ["aapl", "msft"]
+    request = Request({"type": "http", "method": "GET", "path": "/api/technical/NVDA",
+                       "query_string": b"", "headers": []})
+    assert CacheMiddleware.tickers_for(request) == ["NVDA"]
+    cache_manager.clear()
+
+
+def test_admin_invalidate_ticker_endpoint(client):
+    """Test ticker invalidation endpoint"""
+    response = client.delete("/api/admin/cache/ticker/AAPL")
+    assert response.status_code == 200
+    assert response.json()["ticker"] == "AAPL"
+
+
+def test_memory_cache_lru_eviction():
+    """Least recently used entry is evicted when the entry limit is reached"""
+    from cache import InMemoryCache
+
+    cache = InMemoryCache(max_entries=2, max_bytes=10**6, policy="lru")
+    cache.set("a", 1, 60)
+    cache.set("b", 2, 60)
+    cache.get("a")
+    cache.set("c", 3, 60)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_memory_cache_lfu_and_byte_budget():
+    """LFU keeps hot keys, and the byte budget bounds total size"""
+    from cache import InMemoryCache
+
+    cache = InMemoryCache(max_entries=100, max_bytes=2500, policy="lfu")
+    cache.set("hot", "x" * 500, 60)
+    for _ in range(5):
+        cache.get("hot")
+    cache.set("cold", "y" * 500, 60)
+    cache.set("new", "z" * 1500, 60)
+
+    assert cache.get("hot") is not None
+    assert cache.get("cold") is None
+    stats = cache.get_stats()
+    assert stats["bytes"] <= 2500
+    assert stats["evictions"] >= 1
+
+
+def test_memory_cache_expiry_heap():
+    """Expired entries are purged without reads"""
+    import time
+    from cache import InMemoryCache
+
+    cache = InMemoryCache()
+    cache.set("short", 1, 0)
+    time.sleep(0.01)
+    assert cache.cleanup_expired() == 1
+
+    # Writes also purge whatever has expired so far
+    cache.set("short", 1, 0)
+    time.sleep(0.01)
+    cache.set("long", 2, 60)
+
+    stats = cache.get_stats()
+    assert stats["entries"] == 1
+    assert stats["expirations"] == 2
+
+
+
+def test_cache_codec_round_trip_and_compression():
+    """Codec round-trips bytes and numpy scalars, compressing large payloads"""
+    import numpy as np
+    from cache import CacheCodec
+
+    codec = CacheCodec(compress_threshold=256)
+    small = {"status": 200, "body": b"\x00\x01payload", "price": np.float64(101.5)}
+    encoded = codec.encode(small)
+    assert encoded[1:2] == b"n"
+    assert codec.decode(encoded) == {"status": 200, "body": b"\x00\x01payload", "price": 101.5}
+
+    large = {"rows": [{"ticker": "AAPL", "close": 100.0 + i} for i in range(200)]}
+    encoded = codec.encode(large)
+    assert encoded[1:2] != b"n"
+    assert codec.decode(encoded) == large
+
+    # Without msgpack, bytes (cached response bodies) survive the JSON fallback
+    json_codec = CacheCodec(compress_threshold=256, use_msgpack=False)
+    response = {"status": 200, "body": b'{"ticker": "AAPL"}\xff', "headers": {"a": "b"}}
+    encoded = json_codec.encode(response)
+    assert encoded[:1] == b"j"
+    assert json_codec.decode(encoded) == response
+    assert json_codec.decode(json_codec.encode(large)) == large
+
+
+def test_cache_manager_get_many_and_set_many():
+    """Batch get/set return only present keys"""
+    from cache import CacheManager
+
+    manager = CacheManager(use_redis=False)
+    manager.set_many({"quote:AAPL": 1.0, "quote:MSFT": 2.0}, 60)
+
+    assert manager.get_many(["quote:AAPL", "quote:MSFT", "quote:NVDA"]) == {
+        "quote:AAPL": 1.0,
+        "quote:MSFT": 2.0
+    }
+
+
+def test_async_cache_falls_back_to_memory_when_redis_down():
+    """Async API keeps working from memory when Redis is unreachable"""
+    import asyncio
+    from cache import AsyncRedisCache, CacheManager
+
+    manager = CacheManager(use_redis=False)
+    manager.async_redis_cache = AsyncRedisCache(port=1, retry_seconds=60)
+
+    async def scenario():
+        await manager.aset("stock_price:AAPL", {"price": 1.0}, 60)
+        value = await manager.aget("stock_price:AAPL")
+        await manager.adelete("stock_price:AAPL")
+        return value, await manager.aget("stock_price:AAPL")
+
+    assert asyncio.run(scenario()) == ({"price": 1.0}, None)
+    assert manager.async_redis_cache.available is False
+
+
+def test_near_cache_broadcasts_invalidations_to_other_workers():
+    """Writes and tag invalidations in one worker evict L1 copies in the others"""
+    from cache import CacheManager, LocalInvalidationBus, ticker_tag
+
+    bus = LocalInvalidationBus()
+    worker_a = CacheManager(near_cache=True, bus=bus, worker_id="a")
+    worker_b = CacheManager(near_cache=True, bus=bus, worker_id="b")
+
+    worker_b.set("stock_price:AAPL", {"price": 1.0}, 300, [ticker_tag("AAPL")])
+    worker_b.set("stock_price:MSFT", {"price": 2.0}, 300, [ticker_tag("MSFT")])
+    assert worker_a.get("stock_price:AAPL") is None
+
+    # A's write makes B drop its now-outdated copy
+    worker_a.set("stock_price:AAPL", {"price": 1.5}, 300, [ticker_tag("AAPL")])
+    assert worker_b.get("stock_price:AAPL") is None
+    assert worker_a.get("stock_price:AAPL") == {"price": 1.5}
+
+    worker_a.invalidate_tag(ticker_tag("MSFT"))
+    assert worker_b.get("stock_price:MSFT") is None
+    assert worker_b.get_stats()["invalidations_received"] == 2
+
+
+def test_invalidation_bus_requires_publish_and_subscribe():
+    """A bus missing an override fails on construction, not on first publish"""
+    from cache import InvalidationBus
+
+    class PublishOnlyBus(InvalidationBus):
+        def publish(self, message):
+            pass
+
+    with pytest.raises(TypeError):
+        PublishOnlyBus()
+
+
+def test_durable_cache_write_behind_preload_and_purge():
+    """Entries are batch-written, preloaded into a cold cache, and purged when expired"""
+    from datetime import datetime, timedelta
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from cache import CacheManager, ticker_tag
+    from durable_cache import DurableCache
+    from models import AnalysisCache, Base
+
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    store = DurableCache(session_factory=Session)
+
+    store.put("ai_report:AAPL:x", {"value": {"summary": "v1"}}, 7200, "ai_report", "AAPL")
+    store.put("ai_report:AAPL:x", {"value": {"summary": "v2"}}, 7200, "ai_report", "AAPL")
+    store.put("fundamental:MSFT", {"value": {"pe": 30}}, 3600, "fundamental", "MSFT")
+    assert store.flush() == 2
+    assert store.pending() == 0
+
+    cold = CacheManager()
+    assert store.preload(cold) == 2
+    assert cold.get("ai_report:AAPL:x") == {"value": {"summary": "v2"}}
+    assert cold.invalidate_tag(ticker_tag("MSFT")) == 1
+
+    db = Session()
+    db.query(AnalysisCache).filter(AnalysisCache.cache_key == "fundamental:MSFT").update(
+        {"expires_at": datetime.utcnow() - timedelta(seconds=1)}
+    )
+    db.commit()
+    db.close()
+    assert store.purge_expired() == 1
+    assert store.preload(CacheManager()) == 1
+
+
+def test_durable_cache_and_technical_store_share_the_sqlite_connection():
+    """Write-behind flushes and technical_data writes from other threads don't collide"""
+    from concurrent.futures import ThreadPoolExecutor
+    import numpy as np
+    import pandas as pd
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from durable_cache import DurableCache
+    from indicators import compute_indicator_frame
+    from models import AnalysisCache, Base
+    from technical_store import TechnicalStore, frame_rows
+
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    durable = DurableCache(session_factory=Session)
+    technical = TechnicalStore(session_factory=Session)
+
+    close = 100 + np.cumsum(np.random.default_rng(12).normal(size=230))
+    ohlcv = pd.DataFrame(
+        {"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1000.0},
+        index=pd.date_range("2025-01-01", periods=230, tz="America/New_York")
+    )
+    rows = frame_rows(ohlcv, compute_indicator_frame(ohlcv))
+
+    def flush_batch(i):
+        for j in range(50):
+            durable.put(f"ai_report:T{i}:{j}", {"value": j}, 3600, "ai_report", f"T{i}")
+        return durable.flush()
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        for _ in range(3):
+            flushes = [pool.submit(flush_batch, i) for i in range(8)]
+            writes = [pool.submit(technical.write_rows, f"T{i}", rows) for i in range(8)]
+            assert [f.result() for f in writes] == [230] * 8
+            assert sum(f.result() for f in flushes) == 400
+
+    assert durable.get_stats()["write_errors"] == 0
+    assert technical.get_stats()["write_errors"] == 0
+    db = Session()
+    assert db.query(AnalysisCache).count() == 400
+    db.close()
+
+
+def test_prefetcher_refreshes_hot_entries_within_budget():
+    """Only the hot set is prefetched, before expiry, limited by the budget"""
+    import asyncio
+    from cache import CacheManager, CacheTTL, Prefetcher
+
+    manager = CacheManager()
+    loads = []
+
+    async def load_price(ticker):
+        loads.append(ticker)
+        return {"ticker": ticker}
+
+    prefetcher = Prefetcher(manager, top_n=2, lead_seconds=30, budget_per_minute=2)
+    prefetcher.register("stock", load_price, lambda t: f"stock_price:{t}", CacheTTL.STOCK_PRICE)
+    for ticker, hits in [("AAPL", 5), ("MSFT", 3), ("NVDA", 1)]:
+        for _ in range(hits):
+            prefetcher.record_access("stock", ticker)
+    prefetcher.record_access("news", "AAPL")  # counted, but not prefetchable
+
+    assert prefetcher.hot_set() == [("stock", "AAPL"), ("stock", "MSFT")]
+
+    async def scenario():
+        first = await prefetcher.refresh_due()
+        # Fresh entries are left alone
+        second = await prefetcher.refresh_due()
+        return first, second
+
+    assert asyncio.run(scenario()) == (2, 0)
+    assert loads == ["AAPL", "MSFT"]
+    # Probing for due entries is not counted as cache traffic
+    stats = manager.get_stats()["namespaces"]["stock_price"]
+    assert (stats["hits"], stats["misses"], stats["loads"]) == (0, 0, 2)
+    assert manager.get("stock_price:AAPL")["value"] == {"ticker": "AAPL"}
+
+    # Entries close to expiry are due again, but the first cycle used the budget
+    manager.get("stock_price:AAPL")["expires_at"] = 0
+    assert asyncio.run(prefetcher.refresh_due()) == 0
+    assert prefetcher.get_stats()["skipped_budget"] == 1
+
+
+def test_cache_telemetry_per_namespace():
+    """Hits, misses, stale serves, coalescing and loader latency are counted per namespace"""
+    import asyncio
+    from cache import CacheManager, CacheTTL, namespace_tag
+
+    manager = CacheManager()
+
+    async def load():
+        await asyncio.sleep(0.01)
+        return {"decision": "BUY"}
+
+    async def scenario():
+        # Two concurrent misses: one loads, the other is coalesced
+        await asyncio.gather(*[
+            manager.aget_or_load("trading_agents:AAPL:2024-01-02", load, CacheTTL.TRADING_AGENTS)
+            for _ in range(2)
+        ])
+        await manager.aget_or_load("trading_agents:AAPL:2024-01-02", load, CacheTTL.TRADING_AGENTS)
+
+    asyncio.run(scenario())
+    manager.get("news:AAPL")
+
+    namespaces = manager.get_stats()["namespaces"]
+    agents = namespaces["trading_agents"]
+    assert (agents["hits"], agents["misses"], agents["coalesced"], agents["loads"]) == (1, 2, 1, 1)
+    assert agents["hit_rate"] == 1 / 3
+    assert agents["load_latency"]["count"] == 1
+    assert agents["load_latency"]["p50_ms"] >= 10
+    assert agents["get_latency"]["buckets"]["+Inf"] == 3
+    # Same TTL as trading_agents, but tracked separately
+    assert namespaces["news"]["misses"] == 1
+    assert CacheTTL.TRADING_AGENTS is not CacheTTL.NEWS
+    assert namespace_tag(CacheTTL.TRADING_AGENTS) == "ns:trading_agents" != namespace_tag(CacheTTL.NEWS)
+
+
+def test_admin_cache_stats_endpoint(client):
+    """Test cache telemetry endpoint returns numeric stats"""
+    response = client.get("/api/admin/cache/stats")
+    assert response.status_code == 200
+    data = response.json()
+    assert isinstance(data["memory_cache"]["hit_rate"], float)
+    assert "namespaces" in data
+
+# ============================================
+# Market Data Provider Tests
+# ============================================
+
+def test_market_data_coalesces_concurrent_requests():
+    """Concurrent requests for the same data share one upstream call"""
+    import threading
+    import time
+    from market_data import MarketDataProvider
+
+    upstream_calls = []
+
+    class FakeTicker:
+        def __init__(self, ticker):
+            self.ticker = ticker
+
+        @property
+        def info(self):
+            upstream_calls.append(self.ticker)
+            time.sleep(0.2)
+            return {"currentPrice": 100.0}
+
+    provider = MarketDataProvider(ticker_factory=FakeTicker)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(provider.get_info("AAPL")))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(results) == 8
+    assert all(r == {"currentPrice": 100.0} for r in results)
+    assert upstream_calls == ["AAPL"]
+
+    stats = provider.get_stats()
+    assert stats["requests"] == 8
+    assert stats["upstream_calls"] == 1
+    assert stats["coalesced"] == 7
+    assert stats["in_flight"] == 0
+
+
+def test_market_data_propagates_upstream_errors():
+    """Upstream errors reach the caller and are counted"""
+    from market_data import MarketDataProvider
+
+    class FailingTicker:
+        def __init__(self, ticker):
+            pass
+
+        @property
+        def info(self):
+            raise RuntimeError("upstream down")
+
+    provider = MarketDataProvider(ticker_factory=FailingTicker)
+    with pytest.raises(RuntimeError):
+        provider.get_info("AAPL")
+
+    assert provider.get_stats()["errors"] == 1
+
+
+def test_upstream_executor_timeout_and_queue_cap():
+    """Executor enforces per-call timeout and rejects calls beyond the queue cap"""
+    import asyncio
+    import time
+    from market_data import UpstreamExecutor
+    from exceptions import UpstreamBusyError, UpstreamTimeoutError
+
+    executor = UpstreamExecutor(max_workers=1, max_queue=1, timeout=0.05)
+
+    async def scenario():
+        with pytest.raises(UpstreamTimeoutError):
+            await executor.run(time.sleep, 0.3)
+
+        # Worker still busy with the timed-out call: one slot left in the queue
+        queued = asyncio.ensure_future(executor.run(lambda: "ok", timeout=1.0))
+        await asyncio.sleep(0)
+        with pytest.raises(UpstreamBusyError):
+            await executor.run(lambda: "rejected")
+        return await queued
+
+    assert asyncio.run(scenario()) == "ok"
+
+    stats = executor.get_stats()
+    assert stats["timeouts"] == 1
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 2
+    assert stats["queued"] == 0
+    executor.shutdown()
+
+
+def test_market_data_stats_endpoint(client):
+    """Test market data stats endpoint"""
+    response = client.get("/api/market-data/stats")
+    assert response.status_code == 200
+    data = response.json()
+    assert "upstream_calls" in data
+    assert "coalesced" in data
+    assert "utilization" in data["executor"]
+
+
+def test_market_data_batches_last_prices():
+    """Distinct tickers are fetched in one batched call and then served from the quote cache"""
+    import pandas as pd
+    from cache import CacheTTL, invalidate_namespace_cache
+    from market_data import MarketDataProvider
+
+    cache_manager.clear()
+    downloads = []
+
+    def fake_download(tickers, **kwargs):
+        downloads.append(list(tickers))
+        columns = pd.MultiIndex.from_product([["Close"], tickers])
+        return pd.DataFrame([[10.0 * (i + 1) for i in range(len(tickers))]], columns=columns)
+
+    def counts(namespace):
+        stats = cache_manager.get_stats()["namespaces"].get(namespace, {})
+        return stats.get("hits", 0), stats.get("misses", 0)
+
+    before = {namespace: counts(namespace) for namespace in ("quote", "stock_price")}
+    provider = MarketDataProvider(download_fn=fake_download)
+    prices = provider.get_last_prices(["msft", "AAPL", "MSFT"])
+    assert downloads == [["AAPL", "MSFT"]]
+    assert prices == {"AAPL": 10.0, "MSFT": 20.0}
+
+    assert provider.get_last_prices(["AAPL", "MSFT"]) == prices
+    assert len(downloads) == 1
+
+    # Reads, writes and purges all account quotes under one namespace
+    hits, misses = counts("quote")
+    assert (hits - before["quote"][0], misses - before["quote"][1]) == (2, 2)
+    assert counts("stock_price") == before["stock_price"]
+    assert invalidate_namespace_cache(CacheTTL.QUOTE) == 2
+    cache_manager.clear()
+
+
+# ============================================
+# Portfolio Valuation Tests
+# ============================================
+
+def test_portfolio_valuation_from_price_snapshot():
+    """Many portfolios are valued against one snapshot; unpriced lots count toward cost only"""
+    from features import PortfolioManager, Position
+
+    manager = PortfolioManager()
+    manager.add_position("alice", Position(ticker="AAPL", quantity=10, average_cost=100, entry_date="2024-01-01"))
+    manager.add_position("alice", Position(ticker="AAPL", quantity=5, average_cost=120, entry_date="2024-02-01"))
+    manager.add_position("bob", Position(ticker="MSFT", quantity=2, average_cost=300, entry_date="2024-01-01"))
+    manager.add_position("bob", Position(ticker="DELISTED", quantity=1, average_cost=50, entry_date="2024-01-01"))
+
+    result = manager.value_portfolios(["alice", "bob"], {"AAPL": 150.0, "MSFT": 400.0})
+
+    assert result["alice"].total_cost == 1600
+    assert result["alice"].total_value == 2250
+    assert result["alice"].total_gain_loss == 650
+    assert result["bob"].total_cost == 650
+    assert result["bob"].total_value == 800
+    assert abs(result["bob"].total_gain_loss_percent - 150 / 650 * 100) < 1e-9
+
+
+# ============================================
+# Price Alert Tests
+# ============================================
+
+def test_alert_engine_triggers_crossed_thresholds_once():
+    """Only crossed thresholds fire, each once, into the owner's inbox"""
+    from features import AlertManager, PriceAlert
+
+    manager = AlertManager()
+    for user_id, target, kind in [
+        ("alice", 100, "above"), ("alice", 150, "above"),
+        ("bob", 90, "below"), ("bob", 120, "below"), ("carol", 95, "above")
+    ]:
+        manager.create_alert(user_id, PriceAlert(ticker="AAPL", target_price=target,
+                                                 alert_type=kind, created_at=""))
+
+    triggered = manager.evaluate(prices={"AAPL": 110.0})
+    assert sorted((t["alert_type"], t["target_price"]) for t in triggered) == [
+        ("above", 95), ("above", 100), ("below", 120)
+    ]
+    assert manager.evaluate(prices={"AAPL": 110.0}) == []
+
+    manager.scheduler_running = True  # inbox only, no on-demand fetch
+    assert [t["target_price"] for t in manager.check_alerts("alice")] == [100]
+    assert manager.check_alerts("alice") == []
+    assert [t["target_price"] for t in manager.check_alerts("bob")] == [120]
+
+    triggered = manager.evaluate(prices={"AAPL": 80.0})
+    assert [t["target_price"] for t in triggered] == [90]
+    assert len(manager.books["AAPL"]) == 1
+
+
+# ============================================
+# Bar Store Tests
+# ============================================
+
+class FakeHistoryProvider:
+    """Serves synthetic daily bars and records upstream history calls"""
+
+    def __init__(self, days: int = 800):
+        import numpy as np
+        import pandas as pd
+
+        index = pd.date_range(end=pd.Timestamp.now(tz="America/New_York").normalize(),
+                              periods=days, freq="D")
+        close = np.linspace(100.0, 200.0, days)
+        self.frame = pd.DataFrame({
+            "Open": close, "High": close + 1, "Low": close - 1,
+            "Close": close, "Volume": np.full(days, 1000)
+        }, index=index)
+        self.calls = []
+
+    def get_history(self, ticker, period="1mo", interval="1d", start=None):
+        from bar_store import period_start
+
+        self.calls.append({"period": period, "start": start})
+        if start is not None:
+            return self.frame[self.frame.index >= start]
+        return self.frame[self.frame.index.asi8 >= period_start(period)]
+
+
+def test_bar_store_serves_shorter_periods_locally(tmp_path):
+    """A cold 2y load followed by a 3mo read costs no extra download"""
+    from bar_store import BarStore
+
+    provider = FakeHistoryProvider()
+    store = BarStore(root=str(tmp_path), provider=provider, refresh_seconds=3600)
+
+    two_years = store.get_history("AAPL", period="2y")
+    three_months = store.get_history("AAPL", period="3mo")
+
+    assert len(provider.calls) == 1
+    assert provider.calls[0]["period"] == "2y"
+    assert 85 <= len(three_months) <= 93
+    assert three_months["Close"].iloc[-1] == two_years["Close"].iloc[-1]
+    assert str(three_months.index.tz) == "America/New_York"
+
+
+def test_bar_store_fetches_only_missing_tail(tmp_path):
+    """Stale data triggers an incremental fetch from the last stored bar"""
+    from bar_store import BarStore
+
+    provider = FakeHistoryProvider()
+    store = BarStore(root=str(tmp_path), provider=provider, refresh_seconds=0)
+
+    first = store.get_history("AAPL", period="1y")
+    second = store.get_history("AAPL", period="1y")
+
+    assert len(provider.calls) == 2
+    assert provider.calls[0]["start"] is None
+    assert provider.calls[1]["start"] is not None
+    assert len(second) == len(first)
+    assert (second["Close"].values == first["Close"].values).all()
+
+    # A longer period than stored forces one full re-download
+    store.get_history("AAPL", period="2y")
+    assert provider.calls[-1]["period"] == "2y"
+
+
+def test_bar_store_refetches_adjusted_history(tmp_path):
+    """A split-adjusted overlap bar replaces the stored history instead of appending to it"""
+    import os
+    from bar_store import BarStore, period_start
+
+    provider = FakeHistoryProvider()
+    store = BarStore(root=str(tmp_path), provider=provider, refresh_seconds=0)
+    store.get_history("AAPL", period="1y")
+
+    provider.frame[["Open", "High", "Low", "Close"]] /= 2
+    adjusted = store.get_history("AAPL", period="6mo")
+
+    assert provider.calls[-1] == {"period": "1y", "start": None}
+    assert store.get_stats()["adjustment_refetches"] == 1
+    assert (adjusted["Close"].values == provider.frame["Close"].values[-len(adjusted):]).all()
+    assert not [name for name in os.listdir(tmp_path / "1d") if name.endswith(".tmp")]
+
+    # Free-form periods map to start dates; cleared tickers are downloaded again
+    assert period_start("60d") < period_start("1mo")
+    assert len(store.get_history("AAPL", period="60d")) in (60, 61)
+    assert store.invalidate("AAPL") == 2
+    store.get_history("AAPL", period="1mo")
+    assert provider.calls[-1] == {"period": "1mo", "start": None}
+
+
+def test_bar_store_keeps_files_under_its_root(tmp_path, client):
+    """Intervals and tickers that would escape the store root are rejected before any write"""
+    import os
+    from bar_store import BarStore
+
+    provider = FakeHistoryProvider()
+    root = tmp_path / "bars"
+    store = BarStore(root=str(root), provider=provider)
+
+    for ticker, interval in [("AAPL", "../../x"), ("AAPL", "/tmp"), ("../X", "1d"), ("A/B", "1d")]:
+        with pytest.raises(ValueError):
+            store.get_history(ticker, period="1mo", interval=interval)
+    assert provider.calls == []
+    assert list(tmp_path.iterdir()) == []
+    assert store.invalidate("../X") == 0
+
+    store.get_history("brk-b", period="1mo", interval="1wk")
+    assert sorted(name for name in os.listdir(root / "1wk")) == ["BRK-B.bars", "BRK-B.json"]
+
+    assert client.get("/api/chart/AAPL?interval=..%2F..%2Fx").status_code == 400
+    assert client.get("/api/chart/..AAPL").status_code == 400
+
+
+# ============================================
+# Indicator Engine Tests
+# ============================================
+
+def test_indicator_engine_matches_pandas_per_ticker():
+    """Vectorized matrix indicators equal the per-ticker pandas computation"""
+    import numpy as np
+    import pandas as pd
+    from indicators import align_closes, compute_indicators
+
+    rng = np.random.default_rng(7)
+    closes = {
+        "AAPL": pd.Series(150 + np.cumsum(rng.normal(size=63))),
+        "NEW": pd.Series(20 + np.cumsum(rng.normal(size=30))),  # short history, left-padded
+    }
+    tickers, matrix = align_closes(closes)
+    assert matrix.shape == (2, 63)
+    indicators = compute_indicators(matrix)
+
+    for row, ticker in enumerate(tickers):
+        close = closes[ticker]
+        macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+        delta = close.diff()
+        gain = delta.where(delta > 0, 0).rolling(window=14).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+        expected = {
+            "macd": macd,
+            "signal": macd.ewm(span=9, adjust=False).mean(),
+            "rsi": 100 - (100 / (1 + gain / loss)),
+            "sma_20": close.rolling(window=20).mean(),
+            "bollinger_upper": close.rolling(window=20).mean() + close.rolling(window=20).std() * 2,
+        }
+        for name, series in expected.items():
+            assert np.isclose(indicators[name][row, -1], series.iloc[-1]), (ticker, name)
+
+    assert np.isnan(indicators["sma_50"][1, -1])
+
+
+def test_ema_closed_form_matches_pandas_across_blocks():
+    """Block-wise closed-form EMA equals pandas over long, left-padded rows with gaps"""
+    import numpy as np
+    import pandas as pd
+    from indicators import ema
+
+    rng = np.random.default_rng(9)
+    x = 100 + np.cumsum(rng.normal(size=(3, 2000)), axis=1)
+    x[1, :300] = np.nan  # left padding
+    x[2, 1000:1010] = np.nan  # gap: held, not decayed
+
+    for span in (2, 12, 26):  # span 2 spans several closed-form blocks
+        out = ema(x, span)
+        for row in range(3):
+            expected = pd.Series(x[row]).ewm(span=span, adjust=False, ignore_na=True).mean()
+            np.testing.assert_allclose(out[row], expected.to_numpy(), rtol=1e-12)
+    assert np.isnan(out[1, :300]).all()
+    assert out[2, 1005] == out[2, 999]
+
+
+def test_indicator_state_incremental_updates():
+    """O(1) updates, last-bar revision and cache round trip match a full recompute"""
+    import numpy as np
+    from cache import CacheCodec
+    from indicators import IndicatorState, compute_indicators, latest_values
+
+    rng = np.random.default_rng(3)
+    closes = 100 + np.cumsum(rng.normal(size=120))
+    timestamps = np.arange(120) * 86_400 * 10**9
+
+    state = IndicatorState.from_closes(closes[:100], timestamps[:100])
+    codec = CacheCodec()
+    state = IndicatorState.from_dict(codec.decode(codec.encode(state.to_dict())))
+
+    # A partial last bar arrives, then is revised, then new bars follow
+    state.update(closes[100] + 5, int(timestamps[100]))
+    assert state.sync(timestamps[95:], np.concatenate([closes[95:100], closes[100:]]))
+
+    expected = latest_values(compute_indicators(closes), 0)
+    for name, value in state.latest().items():
+        assert np.isclose(value, expected[name]), name
+
+    # Bars that don't reach back to the state's last bar require a rebuild
+    assert not state.sync(np.array([timestamps[-1] + 86_400 * 10**9]), np.array([1.0]))
+
+
+def test_indicator_state_skips_nan_bars():
+    """A partial NaN bar from upstream is skipped instead of poisoning the running sums"""
+    import math
+    import numpy as np
+    import pandas as pd
+    from indicators import IndicatorState
+
+    rng = np.random.default_rng(4)
+    close = 100 + np.cumsum(rng.normal(size=240))
+    ohlcv = pd.DataFrame(
+        {"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1000.0},
+        index=pd.date_range("2025-01-01", periods=240, tz="America/New_York")
+    )
+
+    def sync(state, frame):
+        return state.sync(
+            frame.index.asi8, frame["Close"].to_numpy(), frame["High"].to_numpy(),
+            frame["Low"].to_numpy(), frame["Volume"].to_numpy()
+        )
+
+    state = IndicatorState.from_frame(ohlcv.iloc[:230])
+    partial = ohlcv.iloc[225:232].copy()
+    partial.iloc[-1, partial.columns.get_loc("Close")] = np.nan  # new bar, close missing
+    partial.iloc[4, partial.columns.get_loc("Close")] = np.nan  # stored last bar re-sent without a close
+    assert sync(state, partial)
+
+    expected = IndicatorState.from_frame(ohlcv.iloc[:231]).columns()
+    columns = IndicatorState.from_dict(state.to_dict()).columns()
+    assert all(math.isfinite(value) for value in columns.values())
+    for name, value in columns.items():
+        assert np.isclose(value, expected[name]), name
+
+    # Once the bar completes it is applied normally
+    assert sync(state, ohlcv.iloc[225:233])
+    for name, value in state.columns().items():
+        assert np.isclose(value, IndicatorState.from_frame(ohlcv.iloc[:233]).columns()[name]), name
+
+
+def test_indicator_frame_full_column_set_and_persistence():
+    """One OHLCV frame yields every technical_data column; rows upsert and read back fresh"""
+    import numpy as np
+    import pandas as pd
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from indicators import INDICATOR_COLUMNS, IndicatorState, compute_indicator_frame
+    from models import Base, TechnicalData
+    from technical_store import TechnicalStore, frame_rows
+
+    rng = np.random.default_rng(11)
+    close = 100 + np.cumsum(rng.normal(size=230))
+    ohlcv = pd.DataFrame({
+        "Open": close,
+        "High": close + rng.random(230),
+        "Low": close - rng.random(230),
+        "Close": close,
+        "Volume": rng.integers(10**5, 10**6, 230).astype(float),
+    }, index=pd.date_range("2025-01-01", periods=230, tz="America/New_York"))
+    frame = compute_indicator_frame(ohlcv)
+    assert list(frame.columns) == list(INDICATOR_COLUMNS)
+
+    c, prev = ohlcv["Close"], ohlcv["Close"].shift()
+    true_range = pd.concat([
+        ohlcv["High"] - ohlcv["Low"], (ohlcv["High"] - prev).abs(), (ohlcv["Low"] - prev).abs()
+    ], axis=1).max(axis=1)
+    expected = {
+        "sma_200": c.rolling(window=200).mean(),
+        "atr_14": true_range.rolling(window=14).mean(),
+        "obv": (np.sign(c.diff()) * ohlcv["Volume"]).fillna(0).cumsum(),
+        "ad_line": (((c - ohlcv["Low"]) - (ohlcv["High"] - c)) / (ohlcv["High"] - ohlcv["Low"]) * ohlcv["Volume"]).cumsum(),
+    }
+    for name, series in expected.items():
+        assert np.isclose(frame[name].iloc[-1], series.iloc[-1]), name
+
+    # The streaming state tracks the same columns
+    columns = IndicatorState.from_frame(ohlcv).columns()
+    for name in INDICATOR_COLUMNS:
+        assert np.isclose(columns[name], frame[name].iloc[-1]), name
+
+    # Only requested columns are returned
+    assert list(compute_indicator_frame(ohlcv, ["obv"]).columns) == ["obv"]
+
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    store = TechnicalStore(session_factory=Session)
+
+    assert store.latest("AAPL") is None
+    rows = frame_rows(ohlcv, frame)
+    assert store.write_rows("AAPL", rows) == 230
+    assert store.write_rows("AAPL", rows[-2:]) == 2  # upsert, not duplicate
+
+    db = Session()
+    assert db.query(TechnicalData).count() == 230
+    db.close()
+
+    latest = store.latest("AAPL")
+    assert latest["date"] == rows[-1]["date"]
+    assert np.isclose(latest["sma_200"], frame["sma_200"].iloc[-1])
+
+    assert TechnicalStore(session_factory=Session, max_age=-1).latest("AAPL") is None
+
+    # Executor threads share the single StaticPool connection
+    from concurrent.futures import ThreadPoolExecutor
+    symbols = [f"T{i}" for i in range(16)]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        for _ in range(3):
+            written = list(pool.map(lambda symbol: store.write_rows(symbol, rows), symbols))
+            fresh = list(pool.map(store.latest, symbols))
+            assert written == [230] * 16
+            assert all(row is not None for row in fresh)
+    assert store.get_stats()["write_errors"] == 0
+
+
+def test_technical_series_columnar_json_and_msgpack(client, monkeypatch):
+    """Series endpoint returns only requested indicators over the range, in either encoding"""
+    import msgpack
+    import numpy as np
+    import pandas as pd
+    from bar_store import bar_store
+    from compute import compute_executor
+
+    index = pd.date_range("2025-01-01", periods=120, tz="America/New_York")
+    close = 100 + np.cumsum(np.random.default_rng(5).normal(size=120))
+    hist = pd.DataFrame(
+        {"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1000},
+        index=index
+    )
+    monkeypatch.setattr(bar_store, "get_history", lambda ticker, period="1mo", interval="1d": hist)
+
+    computed = compute_executor.get_stats()["completed"]
+    response = client.get(
+        "/api/technical/SERIESTEST/series?start=2025-01-10&end=2025-03-31&indicators=rsi_14,sma_50"
+    )
+    assert response.status_code == 200
+    assert compute_executor.get_stats()["completed"] == computed + 1
+    data = response.json()
+    assert set(data["indicators"]) == {"rsi_14", "sma_50"}
+    assert data["timestamps"][0] == index[9].value // 10**9
+    assert data["timestamps"][-1] == pd.Timestamp("2025-03-31", tz="America/New_York").value // 10**9
+    assert all(len(values) == len(data["timestamps"]) for values in data["indicators"].values())
+    assert data["indicators"]["sma_50"][0] is None  # not enough bars yet
+    assert np.isclose(data["indicators"]["sma_50"][-1], close[40:90].mean())
+
+    response = client.get("/api/technical/SERIESTEST/series?indicators=obv&format=msgpack")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    packed = msgpack.unpackb(response.content)
+    assert list(packed["indicators"]) == ["obv"]
+    assert len(packed["timestamps"]) == len(packed["indicators"]["obv"])
+
+    assert client.get("/api/technical/SERIESTEST/series?indicators=bogus").status_code == 400
+    assert client.get("/api/technical/SERIESTEST/series?format=xml").status_code == 400
+
+def test_technical_batch_rejects_empty_ticker_list(client):
+    """Test batch technical endpoint validation"""
+    response = client.get("/api/technical/batch?tickers=,")
+    assert response.status_code == 400
+
+def test_technical_batch_matches_single_ticker(client, monkeypatch):
+    """Batch and single-ticker indicators agree; fresh stored rows are served in batches too"""
+    import numpy as np
+    import pandas as pd
+    import main
+    from bar_store import bar_store, period_start
+    from compute import compute_executor
+    from indicators import IndicatorState, api_indicators, interpret
+    from market_data import market_data
+    from technical_store import technical_store
+
+    index = pd.date_range("2024-01-01", periods=260, freq="B", tz="America/New_York")
+    close = 100 + np.cumsum(np.random.default_rng(12).normal(size=260))
+    hist = pd.DataFrame(
+        {"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1000},
+        index=index
+    )
+    def get_history(ticker, period="1mo", interval="1d"):
+        return hist[hist.index.asi8 >= period_start(period, now=hist.index[-1])]
+
+    monkeypatch.setattr(bar_store, "get_history", get_history)
+    monkeypatch.setattr(main, "TECHNICAL_STORE_ENABLED", False)
+    cache_manager.clear()
+
+    batch = client.get("/api/technical/batch?tickers=BATCHA,BATCHB").json()
+    computed = compute_executor.get_stats()["completed"]
+    single = client.get("/api/technical/BATCHA").json()
+    # Cold state: one year of bars loaded on upstream, indicators built on the compute pool
+    assert compute_executor.get_stats()["completed"] == computed + 1
+    for name, value in single["indicators"].items():
+        assert np.isclose(batch[0]["indicators"][name], value), name
+    assert batch[0]["trend"] == single["trend"]
+
+    row = IndicatorState.from_frame(hist).columns()
+    monkeypatch.setattr(main, "TECHNICAL_STORE_ENABLED", True)
+    monkeypatch.setattr(technical_store, "latest", lambda ticker: row if ticker == "BATCHB" else None)
+    monkeypatch.setattr(market_data, "get_last_prices", lambda tickers: {t: 123.0 for t in tickers})
+    cache_manager.clear()
+
+    stored = client.get("/api/technical/batch?tickers=BATCHA,BATCHB").json()
+    assert [r["ticker"] for r in stored] == ["BATCHA", "BATCHB"]
+    assert stored[1]["signals"] == interpret(api_indicators(row, 123.0))["signals"]
+    cache_manager.clear()
+
+    def quote_outage(tickers):
+        raise TimeoutError("upstream timed out")
+
+    # A failed quote lookup doesn't fail requests whose indicators are already stored
+    monkeypatch.setattr(market_data, "get_last_prices", quote_outage)
+    single = client.get("/api/technical/BATCHB")
+    assert single.status_code == 200
+    assert np.isclose(single.json()["indicators"]["macd"], row["macd"])
+    assert client.get("/api/technical/batch?tickers=BATCHB").status_code == 200
+    cache_manager.clear()
+
+# ============================================
+# Backtest Engine Tests
+# ============================================
+
+def test_vectorized_backtest_matches_bar_loop():
+    """Equity, running-max drawdown and trade counts equal a bar-by-bar simulation"""
+    import numpy as np
+    from backtest import backtest, ma_crossover
+
+    rng = np.random.default_rng(0)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.01, 500))
+    target = ma_crossover(close, 10, 30)[0]
+    metrics = backtest(close, target, 10000, np.arange(500) * 86_400 * 10**9)
+
+    # Reference: hold yesterday's target over today's return
+    equity, peak, drawdown = [10000.0], 10000.0, 0.0
+    trades = wins = 0
+    for i in range(1, 500):
+        held = target[i - 1]
+        equity.append(equity[-1] * (1 + held * (close[i] / close[i - 1] - 1)))
+        peak = max(peak, equity[-1])
+        drawdown = max(drawdown, (peak - equity[-1]) / peak)
+        if held and not (i > 1 and target[i - 2]):
+            trades += 1
+            entry_value = equity[-2]
+        if held and (i == 499 or not target[i]):
+            wins += equity[-1] > entry_value
+
+    assert np.isclose(metrics["final_value"], equity[-1])
+    assert np.isclose(metrics["max_drawdown"], drawdown * 100)
+    assert metrics["max_drawdown"] > 0
+    assert metrics["num_trades"] == trades
+    assert metrics["winning_trades"] == wins
+    assert metrics["losing_trades"] == trades - wins
+
+
+def test_ma_backtest_endpoint_uses_engine(client, monkeypatch):
+    """/api/backtest returns a BacktestResult computed from the stored history"""
+    import numpy as np
+    import pandas as pd
+    from bar_store import bar_store
+    from compute import compute_executor
+
+    close = 100 * np.cumprod(1 + np.random.default_rng(1).normal(0, 0.01, 300))
+    hist = pd.DataFrame(
+        {"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1000},
+        index=pd.date_range("2024-01-01", periods=300, freq="B", tz="America/New_York")
+    )
+    monkeypatch.setattr(bar_store, "get_history", lambda ticker, period="1mo", interval="1d": hist)
+    computed = compute_executor.get_stats()["completed"]
+
+    response = client.get("/api/backtest/BTTEST?fast_period=5&slow_period=20")
+    assert response.status_code == 200
+    assert compute_executor.get_stats()["completed"] == computed + 1
+    data = response.json()
+    assert data["strategy"] == "Simple MA Crossover (5/20)"
+    assert data["num_trades"] == data["winning_trades"] + data["losing_trades"]
+    assert 0 <= data["max_drawdown"] <= 100
+
+
+def test_backtest_sweep_matrix_and_top_k(client, monkeypatch):
+    """Sweep cells equal single backtests; invalid pairs are null and top-k is ranked"""
+    import numpy as np
+    import pandas as pd
+    from backtest import backtest, ma_crossover
+    from bar_store import bar_store
+
+    close = 100 * np.cumprod(1 + np.random.default_rng(2).normal(0, 0.01, 300))
+    hist = pd.DataFrame(
+        {"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1000},
+        index=pd.date_range("2024-01-01", periods=300, freq="B", tz="America/New_York")
+    )
+    monkeypatch.setattr(bar_store, "get_history", lambda ticker, period="1mo", interval="1d": hist)
+
+    response = client.get(
+        "/api/backtest/SWEEPTEST/sweep?fast_min=5&fast_max=30&fast_step=5&slow_min=20&slow_max=60&slow_step=20&top_k=3"
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["fast_periods"] == [5, 10, 15, 20, 25, 30]
+    assert data["slow_periods"] == [20, 40, 60]
+    assert data["sharpe_ratio"][3][0] is None  # fast 20 vs slow 20
+
+    single = backtest(close, ma_crossover(close, 10, 40), 10000, hist.index.asi8)
+    assert np.isclose(data["sharpe_ratio"][1][1], single["sharpe_ratio"])
+    assert np.isclose(data["max_drawdown"][1][1], single["max_drawdown"])
+
+    sharpes = [point["sharpe_ratio"] for point in data["top"]]
+    assert len(sharpes) == 3 and sharpes == sorted(sharpes, reverse=True)
+    assert sharpes[0] == max(v for row in data["sharpe_ratio"] for v in row if v is not None)
+
+    assert client.get("/api/backtest/SWEEPTEST/sweep?fast_min=10&fast_max=5").status_code == 400
+    assert client.get("/api/backtest/SWEEPTEST/sweep?rank_by=luck").status_code == 400
+
+
+def test_sweep_splits_typical_grid_across_process_pool(monkeypatch):
+    """A 2y daily grid is spread over the worker processes and matches the in-process result"""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    import numpy as np
+    import backtest
+
+    close = 100 * np.cumprod(1 + np.random.default_rng(9).normal(0, 0.01, 504))
+    fast, slow = list(range(5, 55, 5)), list(range(20, 220, 10))
+    serial = backtest.sweep_ma_grid(close, fast, slow, parallel=False)
+
+    chunks = []
+    pool = ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn"))
+
+    class RecordingPool:
+        def map(self, fn, *iterables):
+            iterables = [list(items) for items in iterables]
+            chunks.extend(len(pairs) for pairs in iterables[2])
+            return pool.map(fn, *iterables)
+
+    monkeypatch.setattr(backtest, "BACKTEST_WORKERS", 2)
+    monkeypatch.setattr(backtest, "process_pool", lambda: RecordingPool())
+    try:
+        pooled = backtest.sweep_ma_grid(close, fast, slow)
+    finally:
+        pool.shutdown()
+
+    pairs = sum(1 for f in fast for s in slow if f < s)
+    assert pairs * len(close) < backtest.SWEEP_CHUNK_CELLS  # one chunk under the old sizing
+    assert len(chunks) == 2 and sum(chunks) == pairs
+    for name, matrix in serial.items():
+        assert np.allclose(pooled[name], matrix, equal_nan=True), name
+
+
+def test_portfolio_backtest_equity_and_attribution(client, monkeypatch):
+    """Basket backtest returns one equity curve whose P&L is split across assets"""
+    import numpy as np
+    import pandas as pd
+    from bar_store import bar_store
+
+    rng = np.random.default_rng(4)
+    index = pd.date_range("2024-01-01", periods=260, freq="B", tz="America/New_York")
+    histories = {}
+    for ticker, listed in (("AAA", 0), ("BBB", 0), ("CCC", 100)):  # CCC lists later
+        close = 50 * np.cumprod(1 + rng.normal(0, 0.01, 260 - listed))
+        histories[ticker] = pd.DataFrame(
+            {"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1000},
+            index=index[listed:]
+        )
+
+    def get_history(ticker, period="1mo", interval="1d"):
+        if ticker not in histories:
+            raise ValueError("unknown ticker")
+        return histories[ticker]
+
+    monkeypatch.setattr(bar_store, "get_history", get_history)
+
+    response = client.post("/api/backtest/portfolio", json={
+        "tickers": ["AAA", "BBB", "CCC", "NOPE"],
+        "weights": [2, 1, 1, 4],
+        "rebalance": "monthly",
+        "fast_period": 5,
+        "slow_period": 20
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert data["missing"] == ["NOPE"]
+    assert len(data["equity"]) == len(data["timestamps"]) == 260
+    assert np.isclose(data["equity"][-1], data["final_value"])
+    assert [a["weight"] for a in data["attribution"]] == [0.5, 0.25, 0.25]
+    assert np.isclose(sum(a["pnl"] for a in data["attribution"]), data["total_return"])
+    assert data["num_rebalances"] == 11
+
+    # Padded / lowercase symbols keep their own weights
+    messy = client.post("/api/backtest/portfolio", json={
+        "tickers": [" aaa", "bbb ", "ccc", "nope"],
+        "weights": [2, 1, 1, 4],
+        "rebalance": "monthly",
+        "fast_period": 5,
+        "slow_period": 20
+    })
+    assert messy.status_code == 200
+    assert messy.json()["tickers"] == ["AAA", "BBB", "CCC"]
+    assert [a["weight"] for a in messy.json()["attribution"]] == [0.5, 0.25, 0.25]
+    assert np.isclose(messy.json()["final_value"], data["final_value"])
+
+    bad = client.post("/api/backtest/portfolio", json={"tickers": ["AAA"], "rebalance": "hourly"})
+    assert bad.status_code == 400
+    blank = client.post("/api/backtest/portfolio", json={"tickers": ["AAA", " ", "BBB"], "weights": [1, 1, 1]})
+    assert blank.status_code == 400
+
+
+def test_walk_forward_windows_and_out_of_sample_curve(client, monkeypatch):
+    """Each test window trades the pair chosen on its train window; windows chain into one curve"""
+    import numpy as np
+    import pandas as pd
+    from backtest import backtest, rolling_mean_from_cumsum
+    from bar_store import bar_store
+    from compute import compute_executor
+
+    close = 100 * np.cumprod(1 + np.random.default_rng(6).normal(0.0003, 0.01, 600))
+    hist = pd.DataFrame(
+        {"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1000},
+        index=pd.date_range("2022-01-03", periods=600, freq="B", tz="America/New_York")
+    )
+    monkeypatch.setattr(bar_store, "get_history", lambda ticker, period="1mo", interval="1d": hist)
+    computed = compute_executor.get_stats()["completed"]
+
+    response = client.get(
+        "/api/backtest/WFTEST/walk-forward?fast_min=5&fast_max=20&fast_step=5"
+        "&slow_min=30&slow_max=90&slow_step=30&train_bars=200&test_bars=100"
+    )
+    assert response.status_code == 200
+    # Optimization runs on the CPU pool, not the upstream I/O pool
+    assert compute_executor.get_stats()["completed"] == computed + 1
+    data = response.json()
+    assert len(data["windows"]) == 4
+    assert data["windows"][1]["train_start"] == str(hist.index[100])
+    assert data["windows"][1]["test_start"] == str(hist.index[300])
+    assert len(data["equity"]) == len(data["timestamps"]) == 600 - 199
+
+    # Out-of-sample windows compound into the stitched curve
+    csum = np.concatenate([[0.0], np.cumsum(close)])
+    growth = 1.0
+    for i, window in enumerate(data["windows"]):
+        test_start, test_end = 200 + 100 * i, min(300 + 100 * i, 600)
+        target = (rolling_mean_from_cumsum(csum, window["fast_period"])
+                  > rolling_mean_from_cumsum(csum, window["slow_period"])).astype(float)
+        single = backtest(close[test_start - 1:test_end], target[test_start - 1:test_end])
+        assert np.isclose(single["total_return_percent"], window["test_total_return_percent"])
+        growth *= 1 + single["total_return_percent"] / 100
+    assert np.isclose(data["final_value"], 10000 * growth)
+
+    assert client.get("/api/backtest/WFTEST/walk-forward?fast_min=100&fast_max=100&slow_max=90").status_code == 400
+
+
+def test_hold_fills_between_enter_and_exit():
+    """Positions stay on from an entry bar until the next exit bar"""
+    import numpy as np
+    from strategies import hold
+
+    enter = np.array([[0, 1, 0, 0, 0, 1, 1, 0]], dtype=bool)
+    exit = np.array([[1, 0, 1, 1, 0, 1, 0, 0]], dtype=bool)
+    assert hold(enter, exit).tolist() == [[0, 1, 0, 0, 0, 1, 1, 1]]
+
+
+def test_registered_strategies_endpoints(client, monkeypatch):
+    """Every registered strategy runs through the shared engine; ma_crossover matches the GET endpoint"""
+    import numpy as np
+    import pandas as pd
+    from bar_store import bar_store
+    from compute import compute_executor
+    from strategies import STRATEGIES
+
+    close = 100 * np.cumprod(1 + np.random.default_rng(8).normal(0.0003, 0.015, 500))
+    hist = pd.DataFrame(
+        {"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close, "Volume": 1000},
+        index=pd.date_range("2022-01-03", periods=500, freq="B", tz="America/New_York")
+    )
+    monkeypatch.setattr(bar_store, "get_history", lambda ticker, period="1mo", interval="1d": hist)
+
+    listing = client.get("/api/backtest/strategies")
+    assert listing.status_code == 200
+    names = [s["name"] for s in listing.json()]
+    assert {"ma_crossover", "rsi_mean_reversion", "bollinger_breakout", "macd_cross"} <= set(names)
+    assert names == list(STRATEGIES)
+
+    computed = compute_executor.get_stats()["completed"]
+    for name in names:
+        response = client.post(f"/api/backtest/{name}", json={"ticker": "strat"})
+        assert response.status_code == 200, name
+        assert response.json()["ticker"] == "STRAT"
+        assert response.json()["strategy"].startswith(name)
+    # Strategy evaluation runs on the CPU pool, not the upstream I/O pool
+    assert compute_executor.get_stats()["completed"] == computed + len(names)
+
+    custom = client.post("/api/backtest/ma_crossover", json={"ticker": "STRAT", "params": {"fast_period": 10, "slow_period": 40}})
+    legacy = client.get("/api/backtest/STRAT?fast_period=10&slow_period=40")
+    assert np.isclose(custom.json()["final_value"], legacy.json()["final_value"])
+    assert custom.json()["num_trades"] == legacy.json()["num_trades"]
+
+    assert client.post("/api/backtest/unknown", json={"ticker": "STRAT"}).status_code == 400
+    assert client.post("/api/backtest/macd_cross", json={"ticker": "STRAT", "params": {"length": 5}}).status_code == 400
+    assert client.post("/api/backtest/rsi_mean_reversion", json={"ticker": "STRAT", "params": {"window": 0}}).status_code == 400
+    assert client.post("/api/backtest/rsi_mean_reversion", json={"ticker": "STRAT", "params": {"window": 14.9}}).status_code == 400
+    assert client.post("/api/backtest/rsi_mean_reversion", json={"ticker": "STRAT", "params": {"window": 14.0}}).status_code == 200
+
 # ============================================
 # Error Handling Tests
 # ============================================